@@ -0,0 +1,102 @@
+"""
+Project Asset Index
+------------------
+
+这个工具用于一次性扫描项目目录并建立资源索引，主要功能：
+
+1. 扫描功能:
+   - 使用os.scandir单次遍历整个项目
+   - 记录文件路径、大小、修改时间
+   - 按扩展名分桶索引
+
+2. 优化目标:
+   - 所有分析器共享同一次目录遍历
+   - 避免网络盘上重复的os.walk开销
+
+3. 使用方法:
+   index = AssetIndex(project_path).build()
+   shader_files = index.paths(('.frag', '.vert'))
+"""
+
+import os
+from collections import defaultdict, namedtuple
+from typing import Dict, List
+
+# 单个资源文件的索引记录, mtime为纳秒精度的修改时间
+AssetEntry = namedtuple('AssetEntry', ['path', 'size', 'mtime'])
+
+class AssetIndex:
+    def __init__(self, root: str):
+        self.root = os.path.normpath(root)
+        self.assets = defaultdict(list)  # 小写扩展名 -> [AssetEntry]
+        self.file_count = 0
+        self.dir_count = 0
+
+    def build(self) -> 'AssetIndex':
+        """遍历项目目录, 建立扩展名索引"""
+        self.assets.clear()
+        self.file_count = 0
+        self.dir_count = 0
+
+        pending = [self.root]
+        while pending:
+            current = pending.pop()
+            self.dir_count += 1
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif entry.is_file():
+                                self._add_entry(entry)
+                        except OSError as e:
+                            print(f"Error indexing {entry.path}: {e}")
+            except OSError as e:
+                print(f"Error scanning directory {current}: {e}")
+
+        return self
+
+    def _add_entry(self, entry: os.DirEntry):
+        """记录单个文件"""
+        ext = os.path.splitext(entry.name)[1].lower()
+        if not ext:
+            return
+        stat = entry.stat()
+        self.assets[ext].append(AssetEntry(entry.path, stat.st_size, stat.st_mtime_ns))
+        self.file_count += 1
+
+    def select(self, extensions, root: str = None) -> List[AssetEntry]:
+        """
+        获取指定扩展名的资源切片
+
+        参数:
+            extensions: 扩展名元组, 如('.png', '.dds'), 不区分大小写
+            root: 只返回该目录下的文件, 默认为整个项目
+
+        返回:
+            List[AssetEntry]: 按路径排序的资源记录
+        """
+        entries = []
+        for ext in {ext.lower() for ext in extensions}:
+            entries.extend(self.assets.get(ext, ()))
+
+        if root is not None and os.path.normpath(root) != os.path.normpath(self.root):
+            prefix = os.path.join(os.path.normpath(root), '')
+            entries = [entry for entry in entries if entry.path.startswith(prefix)]
+
+        entries.sort(key=lambda entry: entry.path)
+        return entries
+
+    def paths(self, extensions, root: str = None) -> List[str]:
+        """获取指定扩展名的文件路径列表"""
+        return [entry.path for entry in self.select(extensions, root)]
+
+    def summary(self) -> Dict:
+        """索引统计信息"""
+        return {
+            'root': self.root,
+            'directories': self.dir_count,
+            'files': self.file_count,
+            'extensions': {ext: len(entries) for ext, entries in sorted(self.assets.items())}
+        }
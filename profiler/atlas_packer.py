@@ -0,0 +1,145 @@
+"""
+Texture Atlas Packer
+-------------------
+
+这个工具用于模拟把一组贴图打包进图集，主要功能：
+
+1. 装箱算法:
+   - Skyline底部-左侧(Bottom-Left)策略
+   - 按高度降序放入, 放不下时开新图集
+
+2. 图集约束:
+   - 贴图四周留出间隙(padding)
+   - mip防渗色: 间隙至少为2^bleed_mips, 保证第bleed_mips级mip仍有1像素间隙
+   - 位置和尺寸按块压缩的4像素(及2^bleed_mips)对齐
+
+3. 使用方法:
+   result = simulate_atlases([(key, width, height), ...], atlas_size=2048)
+   result['atlases'], result['occupancy']
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+BLOCK_ALIGNMENT = 4  # 块压缩格式的块大小
+
+class SkylinePacker:
+    """单张图集的Skyline装箱器"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.skyline = [[0, 0, width]]  # 轮廓线段: [x, y, 宽度]
+        self.free_area = width * height
+
+    def _fit(self, index: int, width: int, height: int) -> Optional[int]:
+        """矩形左边对齐第index段时的放置高度, 放不下返回None"""
+        x = self.skyline[index][0]
+        if x + width > self.width:
+            return None
+        y = 0
+        remaining = width
+        i = index
+        while remaining > 0:
+            y = max(y, self.skyline[i][1])
+            if y + height > self.height:
+                return None
+            remaining -= self.skyline[i][2]
+            i += 1
+        return y
+
+    def insert(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """放入矩形, 返回左下角坐标; 放不下返回None"""
+        if width * height > self.free_area:
+            return None
+
+        best = None  # (顶边高度, x, 段序号, y)
+        for index in range(len(self.skyline)):
+            y = self._fit(index, width, height)
+            if y is not None:
+                candidate = (y + height, self.skyline[index][0], index, y)
+                if best is None or candidate < best:
+                    best = candidate
+        if best is None:
+            return None
+
+        _, x, index, y = best
+        self._add_segment(index, x, y + height, width)
+        self.free_area -= width * height
+        return x, y
+
+    def _add_segment(self, index: int, x: int, y: int, width: int):
+        """在轮廓线上加入新段, 裁掉被覆盖的旧段并合并等高段"""
+        skyline = self.skyline
+        skyline.insert(index, [x, y, width])
+        end = x + width
+        i = index + 1
+        while i < len(skyline) and skyline[i][0] < end:
+            segment_end = skyline[i][0] + skyline[i][2]
+            if segment_end <= end:
+                del skyline[i]
+            else:
+                skyline[i][2] = segment_end - end
+                skyline[i][0] = end
+                break
+
+        i = 0
+        while i < len(skyline) - 1:
+            if skyline[i][1] == skyline[i + 1][1]:
+                skyline[i][2] += skyline[i + 1][2]
+                del skyline[i + 1]
+            else:
+                i += 1
+
+def _round_up(value: int, alignment: int) -> int:
+    return -(-value // alignment) * alignment
+
+def simulate_atlases(rects: List[Tuple[str, int, int]], atlas_size: int = 2048,
+                     padding: int = 2, bleed_mips: int = 2) -> Dict:
+    """
+    模拟把矩形打包进若干张atlas_size×atlas_size的图集
+
+    参数:
+        rects: (标识, 宽, 高)列表
+        padding: 贴图四周的最小间隙
+        bleed_mips: 需要避免渗色的mip级数
+
+    返回:
+        Dict: 图集数量、占用率(贴图有效面积/图集总面积)、每个矩形的(图集序号, x, y)
+              以及超过图集尺寸无法打包的矩形
+    """
+    gutter = max(padding, 1 << bleed_mips)
+    alignment = max(BLOCK_ALIGNMENT, 1 << bleed_mips)
+
+    items = []
+    unpacked = []
+    for key, width, height in rects:
+        padded_width = _round_up(width + 2 * gutter, alignment)
+        padded_height = _round_up(height + 2 * gutter, alignment)
+        if padded_width > atlas_size or padded_height > atlas_size:
+            unpacked.append(key)
+        else:
+            items.append((padded_height, padded_width, key, width * height))
+    items.sort(key=lambda item: (-item[0], -item[1]))
+
+    pages = []
+    placements = {}
+    used_area = 0
+    for padded_height, padded_width, key, area in items:
+        for page_index, page in enumerate(pages):
+            position = page.insert(padded_width, padded_height)
+            if position is not None:
+                break
+        else:
+            page_index = len(pages)
+            pages.append(SkylinePacker(atlas_size, atlas_size))
+            position = pages[-1].insert(padded_width, padded_height)
+        placements[key] = (page_index, position[0] + gutter, position[1] + gutter)
+        used_area += area
+
+    return {
+        'atlas_size': atlas_size,
+        'atlases': len(pages),
+        'occupancy': used_area / (len(pages) * atlas_size * atlas_size) if pages else 0.0,
+        'placements': placements,
+        'unpacked': unpacked
+    }
@@ -0,0 +1,146 @@
+"""
+Vectorized Frustum Culling
+-------------------------
+
+这个工具用于批量计算多个相机下物件包围盒的视锥体可见性，主要功能：
+
+1. 相机定义:
+   - 位置、朝向(forward/up或看向目标点)、垂直FOV、宽高比、近/远平面
+   - 由相机得到六个朝内的视锥平面(法线已归一化)
+
+2. 包围盒测试:
+   - 用中心/半尺寸表示AABB, 物件在平面外侧当且仅当
+     dot(n, c) + d + dot(|n|, e) < 0
+   - 所有相机的所有平面合成一个(相机数×6, 6)矩阵, 一次矩阵乘法得到
+     每个物件到每个平面的有符号距离, 取六个平面的最小值判断
+   - 按物件分块, 中间结果的内存与块大小×相机数成正比
+
+3. 使用方法:
+   cameras = [make_camera([0, 10, -50], target=[0, 0, 0], fov=60)]
+   visible = frustum_visibility(frustum_planes(cameras), bounds_min, bounds_max)
+"""
+
+import math
+from collections import namedtuple
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+Camera = namedtuple('Camera', ['position', 'forward', 'up', 'fov', 'aspect', 'near', 'far'])
+
+DEFAULT_FOV = 60.0  # 垂直FOV(度)
+DEFAULT_ASPECT = 16 / 9
+DEFAULT_NEAR = 0.1
+DEFAULT_FAR = 1000.0
+CHUNK_ELEMENTS = 1 << 22  # 每块的物件数×平面数上限
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    length = np.linalg.norm(vector)
+    if length == 0:
+        raise ValueError("Camera direction must be non-zero")
+    return vector / length
+
+def make_camera(position: Sequence[float], forward: Optional[Sequence[float]] = None,
+                target: Optional[Sequence[float]] = None, up: Sequence[float] = (0.0, 1.0, 0.0),
+                fov: float = DEFAULT_FOV, aspect: float = DEFAULT_ASPECT,
+                near: float = DEFAULT_NEAR, far: float = DEFAULT_FAR) -> Camera:
+    """
+    创建相机
+
+    参数:
+        position: 相机位置
+        forward: 视线方向; 为空时由target计算, 两者都为空时为-Z
+        target: 看向的目标点
+        up: 上方向, 与视线平行时自动改用Z轴
+        fov: 垂直FOV(度)
+        aspect: 宽高比
+        near, far: 近/远平面距离
+    """
+    position = np.asarray(position, dtype=np.float64)
+    if forward is None:
+        forward = (np.asarray(target, dtype=np.float64) - position if target is not None
+                   else np.array([0.0, 0.0, -1.0]))
+    forward = _normalize(np.asarray(forward, dtype=np.float64))
+    up = np.asarray(up, dtype=np.float64)
+    if np.linalg.norm(np.cross(forward, up)) < 1e-6:
+        up = np.array([0.0, 0.0, 1.0])
+    right = _normalize(np.cross(forward, up))
+    return Camera(position, forward, np.cross(right, forward), float(fov), float(aspect),
+                  float(near), float(far))
+
+def orbit_cameras(center: Sequence[float], radius: float, count: int = 8,
+                  height: float = 0.0, **kwargs) -> List[Camera]:
+    """绕中心点均匀分布、看向中心的一圈相机"""
+    center = np.asarray(center, dtype=np.float64)
+    cameras = []
+    for i in range(count):
+        angle = 2 * math.pi * i / count
+        position = center + [radius * math.cos(angle), height, radius * math.sin(angle)]
+        cameras.append(make_camera(position, target=center, **kwargs))
+    return cameras
+
+def frustum_planes(cameras: List[Camera]) -> np.ndarray:
+    """
+    相机的视锥平面
+
+    返回:
+        np.ndarray: (相机数, 6, 4), 每个平面为(nx, ny, nz, d), 法线朝向视锥内部,
+                    点p在内侧当且仅当dot(n, p) + d >= 0
+    """
+    planes = np.empty((len(cameras), 6, 4), dtype=np.float64)
+    for i, camera in enumerate(cameras):
+        forward = camera.forward
+        right = np.cross(forward, camera.up)
+        tan_v = math.tan(math.radians(camera.fov) / 2)
+        tan_h = tan_v * camera.aspect
+        normals = np.array([
+            forward,                       # 近平面
+            -forward,                      # 远平面
+            right + tan_h * forward,       # 左
+            -right + tan_h * forward,      # 右
+            camera.up + tan_v * forward,   # 下
+            -camera.up + tan_v * forward   # 上
+        ])
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        offsets = -normals @ camera.position
+        offsets[0] -= camera.near
+        offsets[1] += camera.far
+        planes[i, :, :3] = normals
+        planes[i, :, 3] = offsets
+    return planes
+
+def frustum_visibility(planes: np.ndarray, bounds_min: np.ndarray, bounds_max: np.ndarray,
+                       chunk_size: Optional[int] = None) -> np.ndarray:
+    """
+    批量测试AABB与视锥体是否相交
+
+    参数:
+        planes: frustum_planes的结果, (相机数, 6, 4)
+        bounds_min, bounds_max: (物件数, 3)的包围盒
+        chunk_size: 每块的物件数, 默认按CHUNK_ELEMENTS计算
+
+    返回:
+        np.ndarray: (相机数, 物件数)的布尔数组, True表示与视锥体相交(不被剔除)
+    """
+    camera_count = len(planes)
+    count = len(bounds_min)
+    visible = np.empty((camera_count, count), dtype=bool)
+    if camera_count == 0 or count == 0:
+        return visible
+
+    # 每行为[n, |n|]: 与[中心, 半尺寸]相乘得到"最靠内的角点"到平面的距离(不含d)
+    normals = planes[:, :, :3].reshape(-1, 3)
+    weights = np.concatenate([normals, np.abs(normals)], axis=1).astype(np.float32)
+    offsets = planes[:, :, 3].reshape(-1, 1).astype(np.float32)
+    chunk_size = chunk_size or max(1, CHUNK_ELEMENTS // (camera_count * 6))
+
+    for start in range(0, count, chunk_size):
+        lower = np.asarray(bounds_min[start:start + chunk_size], dtype=np.float32)
+        upper = np.asarray(bounds_max[start:start + chunk_size], dtype=np.float32)
+        boxes = np.concatenate([(lower + upper) * 0.5, (upper - lower) * 0.5], axis=1)
+        # (平面数, 块大小)的布局让每个相机的结果在内存中连续
+        distances = weights @ boxes.T
+        distances += offsets
+        nearest = distances.reshape(camera_count, 6, len(boxes)).min(axis=1)
+        np.greater_equal(nearest, 0, out=visible[:, start:start + len(boxes)])
+    return visible
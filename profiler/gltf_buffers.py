@@ -0,0 +1,247 @@
+"""
+glTF Buffer Views
+----------------
+
+这个工具用于零拷贝地访问glTF/GLB的顶点和索引数据，主要功能：
+
+1. 缓冲区映射:
+   - GLB的BIN块、外部.bin文件都用mmap映射, 不读入内存
+   - data URI缓冲区解码后使用(通常很小)
+
+2. Accessor视图:
+   - 按bufferView/accessor的偏移、步长和分量类型构建np.ndarray视图
+   - 交错顶点(byteStride)也是视图, 不复制
+   - 只在需要类型转换或三角形展开时才产生新数组
+
+3. 使用方法:
+   with GltfBuffers(path) as buffers:
+       positions = buffers.accessor(primitive['attributes']['POSITION'])
+       triangles = buffers.triangles(primitive)
+
+   vertices, faces = load_triangle_mesh(path)
+   streams, sizes = load_vertex_streams(path)
+"""
+
+import base64
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from mesh_probe import (GLB_MAGIC, MODE_TRIANGLES, MODE_TRIANGLE_FAN, MODE_TRIANGLE_STRIP,
+                        mesh_instances, read_glb_json)
+
+GLB_CHUNK_BIN = 0x004E4942
+
+COMPONENT_TYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32
+}
+
+ELEMENT_SIZES = {
+    'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4,
+    'MAT2': 4, 'MAT3': 9, 'MAT4': 16
+}
+
+class GltfBuffers:
+    """glTF/GLB缓冲区的只读映射, 退出上下文时关闭映射"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.gltf = None
+        self._files = []
+        self._maps = []
+        self._buffers = {}  # 缓冲区序号 -> (uint8数组, 起始偏移)
+        self._bin_offset = None
+
+    def __enter__(self) -> 'GltfBuffers':
+        if self.path.lower().endswith('.glb'):
+            self.gltf = read_glb_json(self.path)
+            self._bin_offset = self._find_bin_chunk()
+        else:
+            with open(self.path, 'rb') as f:
+                self.gltf = json.load(f)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._buffers.clear()  # 释放对映射的引用, 只剩调用方持有的视图
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # 仍有数组视图引用映射, 视图释放后由垃圾回收关闭
+        for f in self._files:
+            f.close()
+        self._maps.clear()
+        self._files.clear()
+
+    def _find_bin_chunk(self) -> Optional[int]:
+        """GLB中BIN块数据的起始偏移"""
+        with open(self.path, 'rb') as f:
+            magic, _, total_length = struct.unpack('<4sII', f.read(12))
+            if magic != GLB_MAGIC:
+                raise ValueError(f"Not a GLB file: {self.path}")
+            offset = 12
+            while offset + 8 <= total_length:
+                f.seek(offset)
+                chunk_length, chunk_type = struct.unpack('<II', f.read(8))
+                if chunk_type == GLB_CHUNK_BIN:
+                    return offset + 8
+                offset += 8 + chunk_length
+        return None
+
+    def _map_file(self, path: str) -> np.ndarray:
+        """映射整个文件; np.frombuffer持有导出的缓冲区, 视图存活时映射不会被关闭"""
+        f = open(path, 'rb')
+        self._files.append(f)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return np.frombuffer(mapped, dtype=np.uint8)
+
+    def _buffer(self, index: int):
+        """返回(缓冲区对象, 数据起始偏移)"""
+        if index not in self._buffers:
+            uri = self.gltf['buffers'][index].get('uri')
+            if uri is None:
+                # GLB内嵌的BIN块
+                if self._bin_offset is None:
+                    raise ValueError(f"Buffer {index} has no data: {self.path}")
+                self._buffers[index] = (self._map_file(self.path), self._bin_offset)
+            elif uri.startswith('data:'):
+                data = base64.b64decode(uri.split(',', 1)[1])
+                self._buffers[index] = (np.frombuffer(data, dtype=np.uint8), 0)
+            else:
+                buffer_path = os.path.join(os.path.dirname(self.path), uri)
+                self._buffers[index] = (self._map_file(buffer_path), 0)
+        return self._buffers[index]
+
+    def accessor(self, index: int) -> np.ndarray:
+        """
+        accessor的数组视图
+
+        返回:
+            np.ndarray: count×分量数(标量为一维)的只读视图
+        """
+        accessor = self.gltf['accessors'][index]
+        if 'sparse' in accessor:
+            raise ValueError(f"Sparse accessors are not supported: {self.path}")
+        dtype = np.dtype(COMPONENT_TYPES[accessor['componentType']])
+        components = ELEMENT_SIZES[accessor['type']]
+        count = accessor['count']
+        if 'bufferView' not in accessor:
+            # 没有bufferView的accessor全为0
+            return np.zeros((count, components) if components > 1 else count, dtype=dtype)
+
+        view = self.gltf['bufferViews'][accessor['bufferView']]
+        data, base = self._buffer(view['buffer'])
+        offset = base + view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+        element_size = dtype.itemsize * components
+        stride = view.get('byteStride') or element_size
+        if count == 0:
+            return np.empty((0, components) if components > 1 else 0, dtype=dtype)
+
+        shape = (count, components) if components > 1 else (count,)
+        strides = (stride, dtype.itemsize) if components > 1 else (stride,)
+        array = np.ndarray(shape, dtype=dtype, buffer=data, offset=offset, strides=strides)
+        array.flags.writeable = False
+        return array
+
+    def triangles(self, primitive: Dict) -> np.ndarray:
+        """图元的三角形索引(M×3); 非三角形图元返回空数组"""
+        mode = primitive.get('mode', MODE_TRIANGLES)
+        if 'indices' in primitive:
+            indices = self.accessor(primitive['indices'])
+        else:
+            count = self.gltf['accessors'][primitive['attributes']['POSITION']]['count']
+            indices = np.arange(count, dtype=np.uint32)
+
+        if mode == MODE_TRIANGLES:
+            return indices[:len(indices) // 3 * 3].reshape(-1, 3)
+        if mode == MODE_TRIANGLE_STRIP and len(indices) >= 3:
+            triangles = np.stack([indices[:-2], indices[1:-1], indices[2:]], axis=1)
+            # 奇数三角形交换顶点顺序保持绕序一致
+            triangles[1::2, :2] = triangles[1::2, 1::-1]
+            return triangles
+        if mode == MODE_TRIANGLE_FAN and len(indices) >= 3:
+            return np.stack([
+                np.full(len(indices) - 2, indices[0]), indices[1:-1], indices[2:]
+            ], axis=1)
+        return np.empty((0, 3), dtype=np.uint32)
+
+def load_triangle_mesh(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把场景中所有网格实例合并为一个三角形网格
+
+    只有一个实例、单位变换且为float32时直接返回映射上的视图(零拷贝);
+    否则只复制顶点位置并变换到世界空间, 其他顶点属性不读取。
+
+    返回:
+        (顶点 N×3, 三角形索引 M×3)
+    """
+    with GltfBuffers(path) as buffers:
+        meshes = buffers.gltf.get('meshes', [])
+        parts = []
+        for mesh_index, world in mesh_instances(buffers.gltf):
+            for primitive in meshes[mesh_index].get('primitives', []):
+                if 'POSITION' in primitive.get('attributes', {}):
+                    parts.append((buffers.accessor(primitive['attributes']['POSITION']),
+                                  buffers.triangles(primitive), world))
+
+        if len(parts) == 1:
+            positions, triangles, world = parts[0]
+            if np.array_equal(world, np.eye(4)):
+                return positions.astype(np.float32, copy=False), triangles
+
+        vertices = np.empty((sum(len(part[0]) for part in parts), 3), dtype=np.float32)
+        faces = np.empty((sum(len(part[1]) for part in parts), 3), dtype=np.uint32)
+        vertex_offset = face_offset = 0
+        for positions, triangles, world in parts:
+            vertices[vertex_offset:vertex_offset + len(positions)] = (
+                positions @ world[:3, :3].T.astype(np.float32) + world[:3, 3].astype(np.float32)
+            )
+            faces[face_offset:face_offset + len(triangles)] = triangles
+            faces[face_offset:face_offset + len(triangles)] += vertex_offset
+            vertex_offset += len(positions)
+            face_offset += len(triangles)
+        return vertices, faces
+
+def load_vertex_streams(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, int]]:
+    """
+    读取所有网格(不展开实例)的顶点属性, 保持模型空间
+
+    归一化整数属性解码为浮点, 同一accessor被多个图元引用时只读取一次。
+
+    返回:
+        (属性名 -> 拼接后的float32数组, 属性名 -> 源数据每顶点字节数)
+    """
+    with GltfBuffers(path) as buffers:
+        accessors = buffers.gltf.get('accessors', [])
+        used = {}
+        for mesh in buffers.gltf.get('meshes', []):
+            for primitive in mesh.get('primitives', []):
+                for name, index in primitive.get('attributes', {}).items():
+                    used.setdefault(name, [])
+                    if index not in used[name]:
+                        used[name].append(index)
+
+        streams = {}
+        sizes = {}
+        for name, indices in used.items():
+            parts = []
+            for index in indices:
+                values = buffers.accessor(index)
+                # 顶点属性按4字节对齐
+                element = values.itemsize * ELEMENT_SIZES[accessors[index]['type']]
+                sizes[name] = max(sizes.get(name, 0), -(-element // 4) * 4)
+                if accessors[index].get('normalized') and values.dtype.kind in 'iu':
+                    values = values / float(np.iinfo(values.dtype).max)
+                parts.append(np.asarray(values, dtype=np.float32).reshape(len(values), -1))
+            streams[name] = np.concatenate(parts)
+    return streams, sizes
@@ -5,9 +5,12 @@ GPU Instancing Analyzer Tool
 这个工具用于分析和优化场景中重复物件的渲染，主要功能：
 
 1. 分析功能:
-   - 自动检测场景中重复的Mesh
+   - 自动检测场景中重复的Mesh(流式读取场景, 不加载整个JSON)
+   - 物件分组为共享场景列式数据的行号视图
+   - 支持多个场景, 实例化分组不跨场景
    - 识别可进行Instancing的物件组
    - 计算Draw Call优化潜力
+   - 合并几何相同但文件不同的Mesh(来自MeshAnalyzer的重复检测)
    - 生成实例化建议
 
 2. 优化目标:
@@ -31,28 +34,35 @@ import json
 import numpy as np
 from collections import defaultdict
 import matplotlib.pyplot as plt
-import hashlib
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from mesh_identity import MeshIdentity
+from scene_store import SceneStore, SceneView
 
 class InstanceAnalyzer:
     def __init__(self):
-        self.mesh_groups = defaultdict(list)
-        self.instance_candidates = defaultdict(list)
+        self.scenes = []  # SceneStore列表, 可与其他分析器共享
+        self.mesh_groups = {}  # (场景序号, Mesh分组键) -> SceneView
+        self.instance_candidates = {}
         self.optimization_stats = {}
+        self.mesh_identity = MeshIdentity()
         
-    def calculate_mesh_hash(self, mesh_data: dict) -> str:
+    def calculate_mesh_hash(self, mesh_data: dict, reference: Optional[str] = None,
+                            remember: bool = True) -> str:
         """
         计算Mesh的哈希值用于识别相同Mesh
         
+        有Mesh引用时同一引用只哈希一次; 否则按打包后的顶点/索引字节哈希,
+        同一mesh_data对象只哈希一次。
+        
         参数:
             mesh_data: Mesh的顶点和索引数据
+            reference: Mesh引用(ID或名称)
+            remember: 是否按对象身份记住mesh_data
             
         返回:
             str: Mesh的唯一哈希值
         """
-        # 这里简化处理，实际应该比较顶点数据
-        mesh_str = f"{mesh_data.get('vertices', '')}{mesh_data.get('indices', '')}"
-        return hashlib.md5(mesh_str.encode()).hexdigest()
+        return self.mesh_identity.key(mesh_data, reference, remember)
     
     def scan_scene(self, scene_path: str):
         """
@@ -63,27 +73,57 @@ class InstanceAnalyzer:
         """
         print(f"Scanning scene for instance candidates: {scene_path}")
         
-        # 模拟场景扫描
         try:
-            with open(scene_path, 'r') as f:
-                scene_data = json.load(f)
-                
-            # 处理场景中的每个物件
-            for obj in scene_data.get('objects', []):
-                mesh_data = obj.get('mesh', {})
-                mesh_hash = self.calculate_mesh_hash(mesh_data)
-                
-                self.mesh_groups[mesh_hash].append({
-                    'object_id': obj.get('id'),
-                    'position': obj.get('position'),
-                    'rotation': obj.get('rotation'),
-                    'scale': obj.get('scale'),
-                    'mesh_name': obj.get('mesh_name')
-                })
-                
+            self.use_scene(SceneStore.load(scene_path, self.mesh_identity))
         except Exception as e:
             print(f"Error scanning scene: {e}")
     
+    def use_scene(self, store: SceneStore):
+        """
+        按Mesh分组已加载的场景物件
+        
+        参数:
+            store: 场景物件的列式数据
+        """
+        self.use_scenes([store])
+    
+    def use_scenes(self, stores: List[SceneStore]):
+        """
+        按Mesh分组多个已加载场景的物件, 每个场景单独分组
+        
+        参数:
+            stores: 各场景物件的列式数据
+        """
+        self.scenes = list(stores)
+        if self.scenes:
+            self.mesh_identity = self.scenes[0].mesh_identity
+        self.mesh_groups = {
+            (index, store.mesh_key_values[code]): view
+            for index, store in enumerate(self.scenes)
+            for code, view in store.group_by(store.mesh_keys).items()
+        }
+    
+    def merge_equivalent_meshes(self, aliases: Dict[str, str]):
+        """
+        把引用几何相同的不同Mesh的物件合并到同一分组
+        
+        参数:
+            aliases: Mesh名称/路径 -> 保留的Mesh路径(MeshAnalyzer.get_mesh_aliases)
+        """
+        # 末尾的None对应没有Mesh名称的物件(mesh_ids为-1)
+        mesh_aliases = [[aliases.get(name) for name in store.mesh_names] + [None]
+                        for store in self.scenes]
+        merged = defaultdict(list)
+        for (index, mesh_hash), view in self.mesh_groups.items():
+            store = self.scenes[index]
+            for mesh_code, rows in store.group_by(store.mesh_ids, view.rows).items():
+                alias = mesh_aliases[index][mesh_code]
+                merged[index, f"mesh:{alias}" if alias else mesh_hash].append(rows.rows)
+        self.mesh_groups = {
+            key: SceneView(self.scenes[key[0]], np.sort(np.concatenate(parts)))
+            for key, parts in merged.items()
+        }
+    
     def analyze_instance_potential(self, min_instance_count: int = 10):
         """
         分析可实例化的物件组
@@ -93,6 +133,7 @@ class InstanceAnalyzer:
         """
         total_draw_calls_before = 0
         total_draw_calls_after = 0
+        self.instance_candidates = {}
         
         for mesh_hash, objects in self.mesh_groups.items():
             if len(objects) >= min_instance_count:
@@ -109,7 +150,7 @@ class InstanceAnalyzer:
                                    / total_draw_calls_before * 100 if total_draw_calls_before > 0 else 0)
         }
     
-    def generate_instance_groups(self) -> Dict[str, List[dict]]:
+    def generate_instance_groups(self) -> Dict[str, dict]:
         """
         生成实例化分组数据
         
@@ -118,19 +159,16 @@ class InstanceAnalyzer:
         """
         instance_groups = {}
         
-        for mesh_hash, objects in self.instance_candidates.items():
+        for (index, mesh_hash), objects in self.instance_candidates.items():
+            store = objects.store
+            name = store.mesh_name(objects.rows[0])
+            if len(self.scenes) > 1:
+                # 多个场景时用场景文件名区分同名Mesh
+                name = f"{os.path.basename(store.path or str(index))}/{name}"
             # 提取实例化所需的变换数据
-            transforms = []
-            for obj in objects:
-                transforms.append({
-                    'position': obj['position'],
-                    'rotation': obj['rotation'],
-                    'scale': obj['scale']
-                })
-                
-            instance_groups[objects[0]['mesh_name']] = {
+            instance_groups[name] = {
                 'instance_count': len(objects),
-                'transforms': transforms,
+                'transforms': store.transforms(objects.rows),
                 'original_draw_calls': len(objects)
             }
             
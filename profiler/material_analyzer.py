@@ -8,6 +8,7 @@ Material Analyzer Tool
    - 发现不必要的材质重复
    - 识别合批优化机会
    - 可视化材质使用情况
+   - 统计场景物件对各材质的引用次数
    - 提供具体的优化建议
 
 2. 主要优化目标:
@@ -36,6 +37,7 @@ import numpy as np
 from collections import defaultdict
 import matplotlib.pyplot as plt
 import seaborn as sns
+from atlas_packer import simulate_atlases
 
 class MaterialAnalyzer:
     """
@@ -52,6 +54,10 @@ class MaterialAnalyzer:
         batch_groups: 可合批的材质组信息
     """
 
+    FILE_EXTENSIONS = ('.mat', '.material')
+    CACHE_KIND = 'material/v1'  # 记录格式变化时递增版本号
+    TEXTURE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tga', '.dds', '.psd', '.ktx', '.ktx2')
+
     def __init__(self):
         """
         初始化材质分析器
@@ -60,6 +66,9 @@ class MaterialAnalyzer:
         self.materials = defaultdict(list)
         self.material_stats = {}
         self.batch_groups = defaultdict(list)
+        self.atlas_results = []
+        self.scene_usage = {}  # 材质名称 -> 引用该材质的场景物件数
+        self.cache = None  # 可选的ResultCache, 用于增量分析
         
     def scan_scene(self, scene_path):
         """
@@ -74,11 +83,44 @@ class MaterialAnalyzer:
             - 收集材质使用统计
         """
         print(f"Scanning scene: {scene_path}")
+        self.analyze_files(self.collect_files(scene_path))
+    
+    def collect_files(self, scene_path):
+        """
+        收集场景文件夹下的所有材质文件
         
+        参数:
+            scene_path: 场景文件夹路径
+            
+        返回:
+            list: 材质文件路径列表
+        """
+        material_files = []
         for root, _, files in os.walk(scene_path):
             for file in files:
-                if file.endswith(('.mat', '.material')):
-                    self._analyze_material(os.path.join(root, file))
+                if file.endswith(self.FILE_EXTENSIONS):
+                    material_files.append(os.path.join(root, file))
+        return material_files
+    
+    def analyze_files(self, material_paths):
+        """
+        逐个分析给定的材质文件
+        
+        参数:
+            material_paths: 材质文件路径列表
+        """
+        for material_path in material_paths:
+            self._analyze_material(material_path)
+    
+    def merge(self, other):
+        """
+        合并另一个分析器(通常来自工作进程)的扫描结果
+        
+        参数:
+            other: 已分析部分文件的MaterialAnalyzer
+        """
+        for shader_name, materials in other.materials.items():
+            self.materials[shader_name].extend(materials)
     
     def _analyze_material(self, material_path):
         """
@@ -93,36 +135,55 @@ class MaterialAnalyzer:
             - 统计使用情况
         """
         try:
-            with open(material_path, 'r') as f:
-                material_data = json.load(f)
-                
-            material_name = material_data.get('name', 'unknown')
-            shader_name = material_data.get('shader', 'unknown')
+            record = self.cache.get(self.CACHE_KIND, material_path) if self.cache else None
+            if record is None:
+                record = self._load_material_record(material_path)
+                if self.cache:
+                    self.cache.put(self.CACHE_KIND, material_path, record)
             
-            self.materials[shader_name].append({
-                'path': material_path,
-                'name': material_name,
-                'properties': material_data.get('properties', {}),
-                'usage_count': 0
-            })
+            self.materials[record['shader']].append(dict(record['material']))
             
         except Exception as e:
             print(f"Error analyzing material {material_path}: {e}")
     
+    def _load_material_record(self, material_path):
+        """
+        解析材质文件, 生成可缓存的材质记录
+        
+        参数:
+            material_path: 材质文件路径
+            
+        返回:
+            dict: {'shader': Shader名称, 'material': 材质信息}
+        """
+        with open(material_path, 'r') as f:
+            material_data = json.load(f)
+            
+        return {
+            'shader': material_data.get('shader', 'unknown'),
+            'material': {
+                'path': material_path,
+                'name': material_data.get('name', 'unknown'),
+                'properties': material_data.get('properties', {}),
+                'usage_count': 0
+            }
+        }
+    
     def analyze_batching_potential(self):
         """
         分析材质合批潜力
         
         功能:
-            - 根据材质属性分组
-            - 识别可合批的材质组
+            - 根据材质属性分组(贴图属性除外)
+            - 识别可合批的材质组: 只有贴图不同的材质可通过图集合批
             - 计算潜在的性能提升
         """
+        self.batch_groups = defaultdict(list)
         for shader_name, materials in self.materials.items():
             property_groups = defaultdict(list)
             
             for material in materials:
-                prop_key = self._get_property_hash(material['properties'])
+                prop_key = self._get_property_hash(self._non_texture_properties(material))
                 property_groups[prop_key].append(material)
             
             for group_id, group in enumerate(property_groups.values()):
@@ -133,6 +194,132 @@ class MaterialAnalyzer:
                         'count': len(group)
                     })
     
+    def _is_texture_property(self, value):
+        """属性值是否为贴图引用"""
+        return isinstance(value, str) and value.lower().endswith(self.TEXTURE_EXTENSIONS)
+    
+    def _non_texture_properties(self, material):
+        """材质中贴图以外的属性"""
+        return {
+            key: value for key, value in material['properties'].items()
+            if not self._is_texture_property(value)
+        }
+    
+    def _texture_references(self, material):
+        """材质引用的贴图: 属性名 -> 贴图路径"""
+        return {
+            key: value for key, value in material['properties'].items()
+            if self._is_texture_property(value)
+        }
+    
+    def analyze_atlas_potential(self, textures, atlas_size=2048, padding=2, bleed_mips=2):
+        """
+        模拟把合批组中各材质的贴图打包进图集
+        
+        参数:
+            textures: TextureAnalyzer.textures, 贴图路径 -> 贴图信息(含dimensions)
+            atlas_size: 图集边长
+            padding: 贴图间隙(像素)
+            bleed_mips: 需要避免渗色的mip级数
+            
+        功能:
+            - 每个材质占一个矩形, 取其各贴图槽位的最大尺寸,
+              所有槽位的图集共用同一布局
+            - 统计图集数量、占用率和节省的Draw Call
+            
+        返回:
+            list: 每个合批组的图集模拟结果
+        """
+        by_name = defaultdict(list)
+        for path in textures:
+            by_name[os.path.basename(path).lower()].append(path)
+        
+        self.atlas_results = []
+        for shader_name, groups in self.batch_groups.items():
+            for group in groups:
+                rects = []
+                missing = []
+                for material in group['materials']:
+                    sizes = [
+                        textures[path]['dimensions']
+                        for path in (
+                            self._resolve_texture(material['path'], ref, textures, by_name)
+                            for ref in self._texture_references(material).values()
+                        )
+                        if path is not None
+                    ]
+                    if sizes:
+                        rects.append((material['path'],
+                                      max(w for w, _ in sizes), max(h for _, h in sizes)))
+                    else:
+                        missing.append(material['name'])
+                
+                if len(rects) < 2:
+                    continue
+                
+                result = simulate_atlases(rects, atlas_size, padding, bleed_mips)
+                # 同一张图集上的材质合为一个批次, 未打包的材质仍各自一个批次
+                draw_calls_after = result['atlases'] + len(result['unpacked'])
+                self.atlas_results.append({
+                    'shader': shader_name,
+                    'group_id': group['group_id'],
+                    'materials': len(rects),
+                    'atlas_size': atlas_size,
+                    'atlases': result['atlases'],
+                    'occupancy': round(result['occupancy'], 4),
+                    'unpacked': result['unpacked'],
+                    'missing_textures': missing,
+                    'draw_calls_before': len(rects),
+                    'draw_calls_after': draw_calls_after,
+                    'draw_calls_saved': len(rects) - draw_calls_after
+                })
+        return self.atlas_results
+    
+    def analyze_scene_usage(self, store):
+        """
+        统计场景物件对材质的引用
+        
+        参数:
+            store: 场景物件的列式数据(SceneStore)
+            
+        功能:
+            - 对材质编码列用np.unique计数, 多个场景的结果累加
+            - 按材质名称或文件名回填材质记录的usage_count
+        """
+        referenced = store.material_ids[store.material_ids >= 0]
+        codes, counts = np.unique(referenced, return_counts=True)
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            name = store.material_names[code]
+            self.scene_usage[name] = self.scene_usage.get(name, 0) + count
+        
+        for materials in self.materials.values():
+            for material in materials:
+                material['usage_count'] = self.scene_usage.get(
+                    self._scene_name(material), 0)
+        return self.scene_usage
+    
+    def _scene_name(self, material):
+        """场景中引用材质时使用的名称: 优先材质名, 其次不带扩展名的文件名"""
+        if material['name'] in self.scene_usage:
+            return material['name']
+        return os.path.splitext(os.path.basename(material['path']))[0]
+    
+    def _resolve_texture(self, material_path, reference, textures, by_name):
+        """
+        把材质中的贴图引用解析为已分析贴图的路径
+        
+        依次尝试: 相对材质文件的路径、原样路径、唯一的同名文件
+        """
+        candidates = [
+            os.path.normpath(os.path.join(os.path.dirname(material_path), reference)),
+            os.path.normpath(reference)
+        ]
+        for candidate in candidates:
+            if candidate in textures:
+                return candidate
+        same_name = by_name.get(os.path.basename(reference).lower(), [])
+        return same_name[0] if len(same_name) == 1 else None
+    
     def _get_property_hash(self, properties):
         """
         生成材质属性的哈希值
@@ -165,12 +352,25 @@ class MaterialAnalyzer:
             'summary': {
                 'total_materials': sum(len(mats) for mats in self.materials.values()),
                 'shader_count': len(self.materials),
-                'batch_groups': sum(len(groups) for groups in self.batch_groups.values())
+                'batch_groups': sum(len(groups) for groups in self.batch_groups.values()),
+                'atlas_draw_calls_saved': sum(r['draw_calls_saved'] for r in self.atlas_results)
             },
             'shader_stats': {},
-            'batch_recommendations': []
+            'batch_recommendations': [],
+            'atlas_simulation': self.atlas_results
         }
         
+        if self.scene_usage:
+            known = {self._scene_name(m) for mats in self.materials.values() for m in mats}
+            report['scene_usage'] = {
+                'objects_per_material': self.scene_usage,
+                'unused_materials': sorted(
+                    m['path'] for mats in self.materials.values() for m in mats
+                    if m['usage_count'] == 0
+                ),
+                'missing_materials': sorted(set(self.scene_usage) - known)
+            }
+        
         # 生成详细统计
         for shader_name, materials in self.materials.items():
             report['shader_stats'][shader_name] = {
@@ -9,6 +9,12 @@ Mesh Data Analyzer Tool
    - 网格复杂度评估
    - 内存布局分析
    - LOD需求分析
+   - OBJ/glTF/GLB只读文件头统计, 需要时再加载完整网格
+   - glTF/GLB的几何分析直接使用mmap上的数组视图
+   - 顶点缓存模拟(FIFO/LRU的ACMR/ATVR)和Tipsify索引重排
+   - 二次误差边坍缩生成LOD, 多进程并行处理多个模型
+   - 顶点格式压缩评估(16位位置、half UV、八面体法线)
+   - 跨文件的重复几何检测(与顶点顺序和变换无关的规范化哈希)
 
 2. 优化目标:
    - 自动生成LOD
@@ -32,15 +38,70 @@ import numpy as np
 import trimesh
 import matplotlib.pyplot as plt
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple
 import struct
+import hashlib
+from mesh_probe import probe_mesh
+from gltf_buffers import load_triangle_mesh, load_vertex_streams
+from vertex_cache import analyze_vertex_cache
+from mesh_simplify import simplify_levels, write_obj
+from vertex_format import analyze_vertex_format, vertex_stride
+from mesh_dedup import geometry_hashes, cluster_meshes
+
+def _output_path(output_dir: str, mesh_path: str, suffix: str) -> str:
+    """输出文件路径, 文件名带源路径哈希避免不同目录下的同名模型冲突"""
+    stem = os.path.splitext(os.path.basename(mesh_path))[0]
+    digest = hashlib.md5(mesh_path.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(output_dir, f"{stem}-{digest}{suffix}")
+
+def _generate_mesh_lods(mesh_path: str, ratios: Dict[str, float], output_dir: str,
+                        attributes: List[str]) -> Dict:
+    """在工作进程中为单个模型生成各级LOD并写出OBJ, 内存按源模型的顶点属性计算"""
+    analyzer = MeshAnalyzer()
+    vertices, faces = analyzer._load_geometry(mesh_path)
+    targets = {level: int(len(faces) * ratio) for level, ratio in ratios.items()}
+    levels = {}
+    for level, lod in simplify_levels(vertices, faces, targets).items():
+        output_path = _output_path(output_dir, mesh_path, f".{level}.obj")
+        write_obj(output_path, lod['vertices'], lod['faces'])
+        levels[level] = {
+            'path': output_path,
+            'vertices': len(lod['vertices']),
+            'faces': len(lod['faces']),
+            'target_faces': lod['target_faces'],
+            'max_error': lod['max_error'],
+            'relative_error': lod['relative_error'],
+            'memory_size': analyzer._calculate_memory_size(
+                len(lod['vertices']), len(lod['faces']), attributes
+            )
+        }
+    return levels
 
 class MeshAnalyzer:
+    FILE_EXTENSIONS = ('.obj', '.fbx', '.gltf', '.glb')
+    CACHE_KIND = 'mesh/v3'  # 记录格式变化时递增版本号
+    GEOMETRY_CACHE_KIND = 'mesh-geometry/v1'
+    GEOMETRY_BLOCK_FACES = 1 << 20  # 体积计算每次处理的三角形数
+    VERTEX_CACHE_KIND = 'mesh-vcache/v1'
+    VERTEX_FORMAT_CACHE_KIND = 'mesh-vformat/v1'
+    HASH_CACHE_KIND = 'mesh-hash/v2'
+    DEFAULT_ATTRIBUTES = ('POSITION', 'NORMAL', 'TEXCOORD_0')
+    ACMR_IMPROVEMENT_THRESHOLD = 0.1  # 重排后ACMR至少降低10%才给出建议
+
     def __init__(self):
         self.meshes = {}
         self.stats = defaultdict(int)
         self.memory_layout = {}
         self.lod_suggestions = []
+        self.cache = None  # 可选的ResultCache, 用于增量分析
+        self.vertex_cache_stats = {}
+        self.vertex_cache_suggestions = []
+        self.generated_lods = {}
+        self.vertex_format_stats = {}
+        self.vertex_format_suggestions = []
+        self.geometry_hashes = {}
+        self.duplicate_clusters = []
         
         # LOD级别设置
         self.LOD_LEVELS = {
@@ -53,33 +114,36 @@ class MeshAnalyzer:
     def scan_models(self, model_path: str):
         """扫描模型文件"""
         print(f"Scanning models in: {model_path}")
+        self.analyze_files(self.collect_files(model_path))
         
+    def collect_files(self, model_path: str) -> List[str]:
+        """收集目录下的所有模型文件"""
+        model_files = []
         for root, _, files in os.walk(model_path):
             for file in files:
-                if file.endswith(('.obj', '.fbx', '.gltf', '.glb')):
-                    self._analyze_mesh(os.path.join(root, file))
+                if file.endswith(self.FILE_EXTENSIONS):
+                    model_files.append(os.path.join(root, file))
+        return model_files
+        
+    def analyze_files(self, model_paths: List[str]):
+        """逐个分析给定的模型文件"""
+        for model_path in model_paths:
+            self._analyze_mesh(model_path)
+            
+    def merge(self, other: 'MeshAnalyzer'):
+        """合并另一个分析器(通常来自工作进程)的扫描结果"""
+        self.meshes.update(other.meshes)
+        for key, value in other.stats.items():
+            self.stats[key] += value
                     
     def _analyze_mesh(self, mesh_path: str):
         """分析单个模型文件"""
         try:
-            mesh = trimesh.load(mesh_path)
-            
-            # 基础网格信息
-            mesh_info = {
-                'path': mesh_path,
-                'vertices': len(mesh.vertices),
-                'faces': len(mesh.faces),
-                'memory_size': self._calculate_memory_size(mesh),
-                'complexity': self._calculate_complexity(mesh),
-                'bounds': mesh.bounds.tolist(),
-                'volume': mesh.volume if mesh.is_watertight else 0
-            }
-            
-            # 分析内存布局
-            self._analyze_memory_layout(mesh, mesh_info)
-            
-            # 评估LOD需求
-            self._evaluate_lod_requirements(mesh_info)
+            mesh_info = self.cache.get(self.CACHE_KIND, mesh_path) if self.cache else None
+            if mesh_info is None:
+                mesh_info = self._load_mesh_info(mesh_path)
+                if self.cache:
+                    self.cache.put(self.CACHE_KIND, mesh_path, mesh_info)
             
             self.meshes[mesh_path] = mesh_info
             self._update_stats(mesh_info)
@@ -87,44 +151,384 @@ class MeshAnalyzer:
         except Exception as e:
             print(f"Error analyzing mesh {mesh_path}: {e}")
             
-    def _calculate_memory_size(self, mesh) -> int:
-        """计算网格数据内存占用"""
-        vertex_size = len(mesh.vertices) * 3 * 4  # xyz * float32
-        face_size = len(mesh.faces) * 3 * 4       # 三角形索引 * int32
-        normal_size = len(mesh.vertices) * 3 * 4  # 法线数据
-        uv_size = len(mesh.vertices) * 2 * 4 if hasattr(mesh, 'visual') else 0  # UV数据
+    def _load_mesh_info(self, mesh_path: str) -> dict:
+        """生成单个模型的分析记录, 能读文件头的格式不构建几何数据"""
+        header = probe_mesh(mesh_path)
+        if header is None:
+            return self._load_full_mesh_info(mesh_path)
+        
+        # 基础网格信息, 体积和水密性留给analyze_geometry
+        mesh_info = {
+            'path': mesh_path,
+            'vertices': header['vertices'],
+            'faces': header['faces'],
+            'memory_size': self._calculate_memory_size(
+                header['vertices'], header['faces'], header['attributes']
+            ),
+            'complexity': self._calculate_complexity(header['vertices'], header['faces']),
+            'bounds': header['bounds'],
+            'volume': 0,
+            'watertight': None,
+            'attributes': header['attributes']
+        }
+        
+        # 分析内存布局
+        self._analyze_memory_layout(mesh_info)
+        
+        # 评估LOD需求
+        self._evaluate_lod_requirements(mesh_info)
+        
+        return mesh_info
+        
+    def _load_full_mesh_info(self, mesh_path: str) -> dict:
+        """用trimesh加载完整网格, 生成单个模型的分析记录"""
+        mesh = trimesh.load(mesh_path, force='mesh')
+        geometry = self._geometry_stats(mesh.vertices, mesh.faces)
+        attributes = ['POSITION', 'NORMAL']
+        if getattr(mesh.visual, 'uv', None) is not None:
+            attributes.append('TEXCOORD_0')
+        
+        mesh_info = {
+            'path': mesh_path,
+            'vertices': len(mesh.vertices),
+            'faces': len(mesh.faces),
+            'memory_size': self._calculate_memory_size(
+                len(mesh.vertices), len(mesh.faces), attributes
+            ),
+            'complexity': self._calculate_complexity(
+                len(mesh.vertices), len(mesh.faces), geometry['volume']
+            ),
+            'bounds': mesh.bounds.tolist(),
+            'volume': geometry['volume'],
+            'watertight': geometry['watertight'],
+            'attributes': attributes
+        }
+        
+        self._analyze_memory_layout(mesh_info)
+        self._evaluate_lod_requirements(mesh_info)
+        
+        return mesh_info
+        
+    def _load_geometry(self, mesh_path: str) -> Tuple[np.ndarray, np.ndarray]:
+        """加载(顶点, 三角形)数组, glTF/GLB不经过trimesh"""
+        if mesh_path.lower().endswith(('.gltf', '.glb')):
+            return load_triangle_mesh(mesh_path)
+        mesh = trimesh.load(mesh_path, force='mesh')
+        return mesh.vertices, mesh.faces
+        
+    def _geometry_stats(self, vertices: np.ndarray, faces: np.ndarray) -> dict:
+        """需要完整几何数据的统计: 水密性和体积"""
+        if len(faces) == 0:
+            return {'watertight': False, 'volume': 0}
+            
+        # 按位置合并顶点(UV接缝处的重复顶点), 每条边恰好被两个面共享即为水密
+        positions = np.ascontiguousarray(vertices, dtype=np.float32)
+        _, vertex_ids = np.unique(
+            positions.view(np.dtype((np.void, positions.dtype.itemsize * 3))).ravel(),
+            return_inverse=True
+        )
+        corners = vertex_ids.ravel()[faces].astype(np.uint64)
+        edges = np.concatenate([corners[:, [0, 1]], corners[:, [1, 2]], corners[:, [2, 0]]])
+        edges.sort(axis=1)
+        _, counts = np.unique((edges[:, 0] << np.uint64(32)) | edges[:, 1], return_counts=True)
+        watertight = bool(np.all(counts == 2))
+        
+        volume = 0.0
+        if watertight:
+            # 有向体积: 各三角形与原点构成四面体的体积之和, 分块计算限制临时内存
+            for start in range(0, len(faces), self.GEOMETRY_BLOCK_FACES):
+                block = faces[start:start + self.GEOMETRY_BLOCK_FACES]
+                v0, v1, v2 = (vertices[block[:, i]].astype(np.float64) for i in range(3))
+                volume += float(np.einsum('ij,ij->', v0, np.cross(v1, v2))) / 6.0
+        return {
+            'watertight': watertight,
+            'volume': volume
+        }
         
-        return vertex_size + face_size + normal_size + uv_size
+    def analyze_geometry(self):
+        """
+        可选的完整几何分析
         
-    def _calculate_complexity(self, mesh) -> float:
+        扫描阶段只读文件头; 需要水密性和体积时再逐个加载完整网格,
+        并更新记录中的volume、watertight和complexity。
+        """
+        for path, info in self.meshes.items():
+            if info['watertight'] is not None:
+                continue
+            try:
+                geometry = self.cache.get(self.GEOMETRY_CACHE_KIND, path) if self.cache else None
+                if geometry is None:
+                    geometry = self._geometry_stats(*self._load_geometry(path))
+                    if self.cache:
+                        self.cache.put(self.GEOMETRY_CACHE_KIND, path, geometry)
+                info.update(geometry)
+                info['complexity'] = self._calculate_complexity(
+                    info['vertices'], info['faces'], geometry['volume']
+                )
+            except Exception as e:
+                print(f"Error analyzing mesh geometry {path}: {e}")
+            
+    def analyze_vertex_cache(self, cache_size: int = 16, output_dir: str = None):
+        """
+        可选的顶点缓存分析
+        
+        模拟FIFO/LRU后变换缓存, 统计Tipsify重排前后的ACMR和ATVR。
+        
+        参数:
+            cache_size: 模拟的缓存顶点数
+            output_dir: 不为空时把重排后的索引缓冲区保存为.npy
+        """
+        kind = f"{self.VERTEX_CACHE_KIND}/{cache_size}"
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.vertex_cache_stats = {}
+        self.vertex_cache_suggestions = []
+        for path, info in self.meshes.items():
+            try:
+                stats = self.cache.get(kind, path) if self.cache and not output_dir else None
+                if stats is None:
+                    vertices, faces = self._load_geometry(path)
+                    stats = analyze_vertex_cache(faces, len(vertices), cache_size)
+                    optimized = stats.pop('optimized_faces')
+                    if output_dir:
+                        stats['output'] = self._save_index_buffer(output_dir, path, optimized)
+                    if self.cache:
+                        self.cache.put(kind, path, stats)
+                self.vertex_cache_stats[path] = stats
+                info['vertex_cache'] = stats
+                self._vertex_cache_suggestion(path, stats)
+            except Exception as e:
+                print(f"Error analyzing vertex cache {path}: {e}")
+                
+    def _save_index_buffer(self, output_dir: str, mesh_path: str, faces: np.ndarray) -> str:
+        """保存重排后的索引缓冲区"""
+        output_path = _output_path(output_dir, mesh_path, '.indices.npy')
+        np.save(output_path, np.ascontiguousarray(faces, dtype=np.uint32))
+        return output_path
+        
+    def _vertex_cache_suggestion(self, path: str, stats: dict):
+        """重排收益明显时给出索引重排建议"""
+        before = stats['before']['fifo']['acmr']
+        after = stats['after']['fifo']['acmr']
+        if before > 0 and (before - after) / before >= self.ACMR_IMPROVEMENT_THRESHOLD:
+            self.vertex_cache_suggestions.append({
+                'mesh': path,
+                'current_acmr': round(before, 4),
+                'optimized_acmr': round(after, 4),
+                'suggested_action': 'reorder_indices'
+            })
+            
+    def _summarize_vertex_cache(self) -> Dict:
+        """顶点缓存分析统计(按三角形数加权)"""
+        summary = {'analyzed_models': len(self.vertex_cache_stats),
+                   'suggestions': self.vertex_cache_suggestions}
+        triangles = sum(s['triangles'] for s in self.vertex_cache_stats.values())
+        for stage in ('before', 'after'):
+            for policy in ('fifo', 'lru'):
+                misses = sum(s[stage][policy]['misses'] for s in self.vertex_cache_stats.values())
+                summary[f'{stage}_{policy}_acmr'] = round(misses / triangles, 4) if triangles else 0.0
+        return summary
+            
+    def generate_lods(self, output_dir: str, max_workers: int = None):
+        """
+        用二次误差边坍缩为需要LOD的模型生成各级简化网格
+        
+        每个模型在独立进程中处理, 各级LOD写为OBJ, 记录实际面数、
+        二次误差和内存占用。
+        
+        参数:
+            output_dir: LOD文件输出目录
+            max_workers: 工作进程数, 默认为CPU核数
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        ratios = {level: ratio for level, ratio in self.LOD_LEVELS.items() if ratio < 1.0}
+        paths = [path for path, info in self.meshes.items() if info['lod_required']]
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                path: pool.submit(_generate_mesh_lods, path, ratios, output_dir,
+                                  self.meshes[path]['attributes'])
+                for path in paths
+            }
+            for path, future in futures.items():
+                try:
+                    self.generated_lods[path] = future.result()
+                    self.meshes[path]['generated_lods'] = self.generated_lods[path]
+                except Exception as e:
+                    print(f"Error generating LODs for {path}: {e}")
+                    
+    def _summarize_generated_lods(self) -> Dict:
+        """LOD生成统计: 各级总面数、内存和最大相对误差"""
+        summary = {'generated_models': len(self.generated_lods), 'levels': {}}
+        for level in self.LOD_LEVELS:
+            lods = [levels[level] for levels in self.generated_lods.values() if level in levels]
+            if not lods:
+                continue
+            summary['levels'][level] = {
+                'total_faces': sum(lod['faces'] for lod in lods),
+                'total_memory': self._format_size(sum(lod['memory_size'] for lod in lods)),
+                'max_relative_error': max(lod['relative_error'] for lod in lods)
+            }
+        return summary
+        
+    def analyze_vertex_format(self):
+        """
+        可选的顶点格式分析
+        
+        读取每个模型的顶点属性, 实测位置范围、UV范围和法线分布,
+        评估16位位置、half UV和八面体法线的精度损失及压缩后的顶点步长。
+        """
+        self.vertex_format_stats = {}
+        self.vertex_format_suggestions = []
+        for path, info in self.meshes.items():
+            try:
+                stats = (self.cache.get(self.VERTEX_FORMAT_CACHE_KIND, path)
+                         if self.cache else None)
+                if stats is None:
+                    stats = analyze_vertex_format(*self._load_vertex_streams(path, info))
+                    if self.cache:
+                        self.cache.put(self.VERTEX_FORMAT_CACHE_KIND, path, stats)
+                self.vertex_format_stats[path] = stats
+                info['vertex_format'] = stats
+                if stats['memory_save'] > 0:
+                    self.vertex_format_suggestions.append({
+                        'mesh': path,
+                        'current_stride': stats['stride'],
+                        'compact_stride': stats['compact_stride'],
+                        'formats': {
+                            name: attribute['format']
+                            for name, attribute in stats['attributes'].items()
+                        },
+                        'memory_save': stats['memory_save']
+                    })
+            except Exception as e:
+                print(f"Error analyzing vertex format {path}: {e}")
+                
+    def _load_vertex_streams(self, mesh_path: str, info: dict) -> Tuple[Dict, Dict]:
+        """加载顶点属性数组和源数据每顶点字节数, glTF/GLB不经过trimesh"""
+        if mesh_path.lower().endswith(('.gltf', '.glb')):
+            return load_vertex_streams(mesh_path)
+        mesh = trimesh.load(mesh_path, force='mesh')
+        streams = {'POSITION': mesh.vertices}
+        if 'NORMAL' in info['attributes']:
+            streams['NORMAL'] = mesh.vertex_normals
+        uv = getattr(mesh.visual, 'uv', None)
+        if uv is not None:
+            streams['TEXCOORD_0'] = uv
+        return streams, {}
+        
+    def _summarize_vertex_format(self) -> Dict:
+        """顶点格式分析统计"""
+        stats = self.vertex_format_stats.values()
+        vertices = sum(s['vertices'] for s in stats)
+        return {
+            'analyzed_models': len(self.vertex_format_stats),
+            'average_stride': (sum(s['stride'] * s['vertices'] for s in stats) / vertices
+                               if vertices else 0),
+            'average_compact_stride': (sum(s['compact_stride'] * s['vertices'] for s in stats) /
+                                       vertices if vertices else 0),
+            'potential_memory_save': self._format_size(sum(s['memory_save'] for s in stats)),
+            'suggestions': self.vertex_format_suggestions
+        }
+        
+    def find_duplicates(self) -> List[Dict]:
+        """
+        按规范化几何哈希查找重复的模型
+        
+        逐个加载模型计算哈希(只保留哈希), 把完全相同以及只差平移、
+        旋转、统一缩放的模型分为一簇; 形状描述一致的候选对会重新加载,
+        对齐后验证逐顶点残差。
+        
+        返回:
+            List: 重复簇, 保留内存最大的一个, 其余可以替换为它的实例
+        """
+        for path in self.meshes:
+            if path in self.geometry_hashes:
+                continue
+            try:
+                hashes = self.cache.get(self.HASH_CACHE_KIND, path) if self.cache else None
+                if hashes is None:
+                    hashes = geometry_hashes(*self._load_geometry(path))
+                    if self.cache:
+                        self.cache.put(self.HASH_CACHE_KIND, path, hashes)
+                self.geometry_hashes[path] = hashes
+            except Exception as e:
+                print(f"Error hashing mesh {path}: {e}")
+                
+        self.duplicate_clusters = []
+        for members in cluster_meshes(self.geometry_hashes, self._load_geometry):
+            keep = min(members, key=lambda path: (-self.meshes[path]['memory_size'], path))
+            keep_hash = self.geometry_hashes[keep]
+            duplicates = [{
+                'mesh': path,
+                'match': ('identical' if self.geometry_hashes[path]['exact_hash'] ==
+                          keep_hash['exact_hash'] else 'transformed'),
+                'relative_scale': (self.geometry_hashes[path]['scale'] / keep_hash['scale']
+                                   if keep_hash['scale'] else 1.0)
+            } for path in members if path != keep]
+            reclaimable = sum(self.meshes[d['mesh']]['memory_size'] for d in duplicates)
+            self.duplicate_clusters.append({
+                'keep': keep,
+                'duplicates': duplicates,
+                'reclaimable_memory': reclaimable
+            })
+        self.duplicate_clusters.sort(key=lambda c: -c['reclaimable_memory'])
+        return self.duplicate_clusters
+        
+    def get_mesh_aliases(self) -> Dict[str, str]:
+        """
+        重复模型到保留模型的映射, 供实例化分析合并分组
+        
+        同时按完整路径、文件名和不带扩展名的文件名建立映射,
+        以匹配场景中不同形式的网格引用。
+        """
+        aliases = {}
+        for cluster in self.duplicate_clusters:
+            for path in [cluster['keep']] + [d['mesh'] for d in cluster['duplicates']]:
+                name = os.path.basename(path)
+                for key in (path, name, os.path.splitext(name)[0]):
+                    aliases[key] = cluster['keep']
+        return aliases
+        
+    def _calculate_memory_size(self, vertex_count: int, face_count: int,
+                               attributes=DEFAULT_ATTRIBUTES) -> int:
+        """计算网格数据内存占用(顶点属性按float32)"""
+        vertex_size = vertex_count * vertex_stride(attributes)
+        face_size = face_count * 3 * 4      # 三角形索引 * int32
+        
+        return vertex_size + face_size
+        
+    def _calculate_complexity(self, vertex_count: int, face_count: int, volume: float = 0) -> float:
         """计算网格复杂度分数"""
         # 基于面数、顶点数和体积的复杂度评分
-        vertex_score = len(mesh.vertices) / 1000  # 每1000个顶点1分
-        face_score = len(mesh.faces) / 1000      # 每1000个面1分
-        volume_score = mesh.volume / 1000 if mesh.is_watertight else 0
+        vertex_score = vertex_count / 1000  # 每1000个顶点1分
+        face_score = face_count / 1000      # 每1000个面1分
+        volume_score = volume / 1000
         
         return vertex_score + face_score + volume_score
         
-    def _analyze_memory_layout(self, mesh, mesh_info: dict):
+    def _analyze_memory_layout(self, mesh_info: dict):
         """分析内存布局"""
-        # 分析数据对齐和内存碎片
-        vertex_data = mesh.vertices.flatten()
-        face_data = mesh.faces.flatten()
+        # 分析数据对齐和内存碎片(只依赖数组长度, 不需要几何数据)
+        vertex_length = mesh_info['vertices'] * 3
+        face_length = mesh_info['faces'] * 3
         
         # 检查数据对齐
-        vertex_alignment = len(vertex_data) % 16  # 检查16字节对齐
-        face_alignment = len(face_data) % 16
+        vertex_alignment = vertex_length % 16  # 检查16字节对齐
+        face_alignment = face_length % 16
         
         mesh_info['memory_layout'] = {
             'vertex_alignment': vertex_alignment,
             'face_alignment': face_alignment,
-            'fragmentation': self._calculate_fragmentation(vertex_data, face_data)
+            'fragmentation': self._calculate_fragmentation(vertex_length, face_length)
         }
         
-    def _calculate_fragmentation(self, vertex_data: np.ndarray, face_data: np.ndarray) -> float:
+    def _calculate_fragmentation(self, vertex_length: int, face_length: int) -> float:
         """计算内存碎片率"""
-        total_size = len(vertex_data) + len(face_data)
+        total_size = vertex_length + face_length
         aligned_size = ((total_size + 15) // 16) * 16
+        if aligned_size == 0:
+            return 0.0
         return (aligned_size - total_size) / aligned_size
         
     def _evaluate_lod_requirements(self, mesh_info: dict):
@@ -162,6 +566,7 @@ class MeshAnalyzer:
             
     def analyze_optimization_potential(self):
         """分析优化潜力"""
+        self.lod_suggestions = []
         for path, info in self.meshes.items():
             # 检查高面数模型
             if info['faces'] > 10000:
@@ -210,7 +615,21 @@ class MeshAnalyzer:
                 ),
                 'suggestions': self.lod_suggestions
             },
-            'memory_layout_analysis': self._analyze_overall_memory_layout()
+            'memory_layout_analysis': self._analyze_overall_memory_layout(),
+            'vertex_cache_analysis': self._summarize_vertex_cache(),
+            'lod_generation': self._summarize_generated_lods(),
+            'vertex_format_analysis': self._summarize_vertex_format(),
+            'duplicates': {
+                'clusters': len(self.duplicate_clusters),
+                'duplicate_models': sum(len(c['duplicates']) for c in self.duplicate_clusters),
+                'reclaimable_memory': self._format_size(
+                    sum(c['reclaimable_memory'] for c in self.duplicate_clusters)
+                ),
+                'groups': [
+                    dict(c, reclaimable_memory=self._format_size(c['reclaimable_memory']))
+                    for c in self.duplicate_clusters
+                ]
+            }
         }
         
         with open(output_path, 'w') as f:
@@ -0,0 +1,281 @@
+"""
+Mesh Geometry Deduplication
+--------------------------
+
+这个工具用于查找不同文件中重复的网格几何，主要功能：
+
+1. 规范化哈希(与顶点顺序无关):
+   - 位置按固定步长量化后按位置合并, 顶点按字典序排序
+   - 三角形把最小索引轮换到首位(保持绕序), 再按字典序排序
+   - 对排序后的顶点和三角形字节计算哈希, 顶点/三角形顺序不同的
+     相同网格得到相同的exact_hash
+
+2. 形状匹配(与刚体变换和统一缩放无关):
+   - shape_hash只由顶点/三角形数量和顶点度数序列计算, 都是整数,
+     不受变换后坐标的浮点误差影响, 作为候选分桶
+   - 形状描述: 顶点到质心的距离按RMS半径归一化后排序, 取固定数量的分位点;
+     以及归一化协方差矩阵的特征值(PCA主轴长度), 只用于预筛选
+   - 预筛选通过后加载两个网格做对齐: 按质心和RMS半径归一化, 用半径和最长邻边
+     都一致的锚点顶点对建立坐标系(对称网格会有多个候选, 逐个尝试)
+   - 对齐后每个顶点到另一网格最近顶点的距离都在容差内才算匹配,
+     拓扑相同但形状不同的网格(如同一网格分辨率的地形块)不会被合并
+
+3. 流式处理:
+   - 每次只加载一个网格, 只保留哈希和固定长度的形状描述;
+     对齐验证时同时加载两个网格, 内存与最大的两个网格成正比
+
+4. 使用方法:
+   hashes = {path: geometry_hashes(vertices, faces) for path, (vertices, faces) in ...}
+   clusters = cluster_meshes(hashes, load_geometry)
+"""
+
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+POSITION_QUANTUM = 1e-5  # exact_hash的位置量化步长(场景单位)
+SHAPE_TOLERANCE = 1e-3  # 形状描述的比较容差(相对RMS半径)
+SHAPE_SAMPLES = 64  # 形状描述中归一化半径的分位点数
+MAX_ANCHORS = 32  # 对齐时每个锚点最多尝试的候选顶点数
+CHECK_SAMPLES = 64  # 完整验证前先检查的顶点数
+
+# 空间哈希的27个相邻格子和哈希乘数(冲突只会多比较几个顶点)
+NEIGHBOR_CELLS = np.array(sorted(((x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1)
+                                  for z in (-1, 0, 1)), key=lambda cell: sum(map(abs, cell))),
+                          dtype=np.int64)
+CELL_HASH = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+def _digest(*arrays: np.ndarray) -> str:
+    """对一组数组的字节计算哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def canonical_faces(faces: np.ndarray) -> np.ndarray:
+    """把每个三角形的最小索引轮换到首位(保持绕序), 再按字典序排序"""
+    first = np.argmin(faces, axis=1)
+    rotation = (first[:, np.newaxis] + np.arange(3)) % 3
+    rotated = np.take_along_axis(faces, rotation, axis=1)
+    return rotated[np.lexsort(rotated.T[::-1])]
+
+def _weld(vertices: np.ndarray, faces: np.ndarray,
+          quantum: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按量化位置合并顶点, 返回(按字典序排列的量化顶点, 去掉退化三角形的索引)"""
+    quantized = np.round(np.asarray(vertices, dtype=np.float64) / quantum).astype(np.int64)
+    # np.unique按字典序返回顶点, 与输入顺序无关
+    unique, inverse = np.unique(quantized, axis=0, return_inverse=True)
+    welded = inverse.ravel()[np.asarray(faces, dtype=np.int64)]
+    welded = welded[(welded[:, 0] != welded[:, 1]) & (welded[:, 1] != welded[:, 2]) &
+                    (welded[:, 2] != welded[:, 0])]
+    return unique, welded
+
+def geometry_hashes(vertices: np.ndarray, faces: np.ndarray,
+                    quantum: float = POSITION_QUANTUM) -> Dict:
+    """
+    计算网格的规范化哈希
+
+    返回:
+        Dict: exact_hash、shape_hash(候选分桶)、形状描述(shape_profile, shape_axes)、
+              合并后的顶点/三角形数和RMS半径
+    """
+    unique, ordered = _weld(vertices, faces, quantum)
+    ordered = canonical_faces(ordered)
+    counts = np.array([len(unique), len(ordered)], dtype=np.int64)
+
+    points = unique * quantum
+    centered = points - points.mean(axis=0) if len(points) else points.astype(np.float64)
+    radii = np.linalg.norm(centered, axis=1)
+    scale = float(np.sqrt(np.mean(radii ** 2))) if len(radii) else 0.0
+    normalized = np.sort(radii) / (scale or 1.0)
+    samples = np.linspace(0, len(normalized) - 1, SHAPE_SAMPLES).round().astype(np.int64)
+    profile = normalized[samples] if len(normalized) else np.zeros(SHAPE_SAMPLES)
+    axes = (np.linalg.eigvalsh(centered.T @ centered / len(centered)) / (scale or 1.0) ** 2
+            if len(centered) else np.zeros(3))
+
+    edges = np.sort(np.concatenate([ordered[:, [0, 1]], ordered[:, [1, 2]], ordered[:, [2, 0]]]),
+                    axis=1)
+    edges = np.unique((edges[:, 0] << 32) | edges[:, 1])
+    degree = np.sort(np.bincount(np.concatenate([edges >> 32, edges & 0xFFFFFFFF]),
+                                 minlength=len(unique)))
+    return {
+        'exact_hash': _digest(counts, unique, ordered),
+        'shape_hash': _digest(counts, degree),
+        'shape_profile': profile.astype(np.float32),
+        'shape_axes': np.sort(axes).astype(np.float32),
+        'vertices': int(counts[0]),
+        'faces': int(counts[1]),
+        'scale': scale
+    }
+
+def shapes_match(a: Dict, b: Dict, tolerance: float = SHAPE_TOLERANCE) -> bool:
+    """两个网格的形状描述是否在容差内一致(shape_hash应已相同), 只作为预筛选"""
+    return bool(np.abs(a['shape_profile'] - b['shape_profile']).max(initial=0) <= tolerance and
+                np.abs(a['shape_axes'] - b['shape_axes']).max(initial=0) <= tolerance)
+
+def canonical_geometry(vertices: np.ndarray, faces: np.ndarray,
+                       quantum: float = POSITION_QUANTUM) -> Dict:
+    """
+    对齐验证用的归一化几何
+
+    返回:
+        Dict: 平移到质心并按RMS半径缩放的合并后顶点(points)、顶点半径(radii)
+              和每个顶点最长邻边的长度(edges)
+    """
+    unique, welded = _weld(vertices, faces, quantum)
+    points = unique * quantum
+    if len(points):
+        points = points - points.mean(axis=0)
+    radii = np.linalg.norm(points, axis=1)
+    scale = float(np.sqrt(np.mean(radii ** 2))) if len(radii) else 0.0
+    points, radii = points / (scale or 1.0), radii / (scale or 1.0)
+
+    ends = np.roll(welded, -1, axis=1)
+    lengths = np.linalg.norm(points[welded] - points[ends], axis=2).ravel()
+    edges = np.zeros(len(points))
+    np.maximum.at(edges, welded.ravel(), lengths)
+    np.maximum.at(edges, ends.ravel(), lengths)
+    return {'points': points, 'radii': radii, 'edges': edges}
+
+def _cells(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """顶点所在的边长为tolerance的格子坐标"""
+    return np.floor(points / tolerance).astype(np.int64)
+
+def _spatial_grid(points: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按格子哈希排序的顶点, 用于最近顶点查询"""
+    keys = _cells(points, tolerance) @ CELL_HASH
+    order = np.argsort(keys, kind='stable')
+    return keys[order], points[order]
+
+def _all_within(query: np.ndarray, grid: Tuple[np.ndarray, np.ndarray],
+                tolerance: float) -> bool:
+    """query的每个点在tolerance内是否都有grid中的顶点(只需查相邻的27个格子)"""
+    keys, points = grid
+    cells = _cells(query, tolerance)
+    # 按格子排序查询点, searchsorted的访问更连续; 先查自身所在的格子
+    order = np.argsort(cells @ CELL_HASH, kind='stable')
+    cells, query = cells[order], query[order]
+    pending = np.arange(len(query))
+    for offset in NEIGHBOR_CELLS:
+        cell_keys = (cells[pending] + offset) @ CELL_HASH
+        start = np.searchsorted(keys, cell_keys, side='left')
+        end = np.searchsorted(keys, cell_keys, side='right')
+        found = np.zeros(len(pending), dtype=bool)
+        active = np.flatnonzero(start < end)
+        start, end = start[active], end[active]
+        # 逐个比较格子内的顶点, 循环次数为单个格子的最大顶点数
+        while len(active):
+            hit = np.sum((points[start] - query[pending[active]]) ** 2, axis=1) <= tolerance ** 2
+            found[active[hit]] = True
+            more = ~hit & (start + 1 < end)
+            active, start, end = active[more], start[more] + 1, end[more]
+        pending = pending[~found]
+        if not len(pending):
+            return True
+    return False
+
+def _frame(first: np.ndarray, second: np.ndarray, tolerance: float) -> np.ndarray:
+    """由两个锚点方向建立的右手正交坐标系(列向量)"""
+    e1 = first / np.linalg.norm(first)
+    e2 = second - np.dot(second, e1) * e1
+    if np.linalg.norm(e2) <= tolerance:
+        # 所有顶点共线, 绕e1的旋转不影响结果
+        e2 = np.eye(3)[np.argmin(np.abs(e1))]
+        e2 = e2 - np.dot(e2, e1) * e1
+    e2 = e2 / np.linalg.norm(e2)
+    return np.stack([e1, e2, np.cross(e1, e2)], axis=1)
+
+def _anchor_candidates(geometry: Dict, radius: float, edge: float, tolerance: float,
+                       error: Optional[np.ndarray] = None) -> np.ndarray:
+    """半径、最长邻边(和额外误差)都与锚点一致的顶点, 按差异从小到大取前MAX_ANCHORS个"""
+    invariant_error = np.maximum(np.abs(geometry['radii'] - radius),
+                                 np.abs(geometry['edges'] - edge))
+    error = invariant_error if error is None else np.maximum(invariant_error, error)
+    candidates = np.flatnonzero(error <= tolerance)
+    return candidates[np.argsort(error[candidates], kind='stable')[:MAX_ANCHORS]]
+
+def shapes_align(a: Dict, b: Dict, tolerance: float = SHAPE_TOLERANCE) -> bool:
+    """
+    两个canonical_geometry之间是否存在刚体变换, 使每个顶点到另一网格最近顶点的
+    距离都不超过tolerance(相对RMS半径)
+
+    a中选半径和最长邻边组合最少见的远端顶点作为第一个锚点、离它所在轴最远的顶点
+    作为第二个锚点, 在b中找不变量一致的候选顶点对建立坐标系; 对称网格的候选
+    等价, 任意一个都能对齐。
+    """
+    p, q = a['points'], b['points']
+    if len(p) != len(q):
+        return False
+    if len(p) == 0:
+        return True
+
+    # 第一个锚点: 不变量重复最少的顶点, 半径至少为RMS半径的一半以保证坐标系稳定
+    features = np.round(np.stack([a['radii'], a['edges']], axis=1) / tolerance)
+    _, inverse, counts = np.unique(features, axis=0, return_inverse=True, return_counts=True)
+    ties = np.where(a['radii'] >= 0.5, counts[inverse.ravel()], np.iinfo(np.int64).max)
+    i = int(np.lexsort((-a['radii'], ties))[0])
+    j = int(np.argmax(np.linalg.norm(np.cross(p, p[i]), axis=1)))
+    frame_a = _frame(p[i], p[j], tolerance)
+    anchor_distance = np.linalg.norm(p[j] - p[i])
+
+    grid = _spatial_grid(q, tolerance)
+    samples = p[np.linspace(0, len(p) - 1, min(CHECK_SAMPLES, len(p))).astype(np.int64)]
+    for i_b in _anchor_candidates(b, a['radii'][i], a['edges'][i], tolerance):
+        distance_error = np.abs(np.linalg.norm(q - q[i_b], axis=1) - anchor_distance)
+        for j_b in _anchor_candidates(b, a['radii'][j], a['edges'][j], tolerance,
+                                      distance_error):
+            rotation = _frame(q[i_b], q[j_b], tolerance) @ frame_a.T
+            # 先检查少量顶点, 通过后再双向检查全部顶点
+            if not _all_within(samples @ rotation.T, grid, tolerance):
+                continue
+            aligned = p @ rotation.T
+            if (_all_within(aligned, grid, tolerance) and
+                    _all_within(q, _spatial_grid(aligned, tolerance), tolerance)):
+                return True
+    return False
+
+def cluster_meshes(hashes: Dict[str, Dict], load: Callable[[str], Tuple[np.ndarray, np.ndarray]],
+                   tolerance: float = SHAPE_TOLERANCE) -> List[List[str]]:
+    """
+    把相同或只差一个变换的网格分组
+
+    先按shape_hash分桶, 桶内与各簇的第一个成员比较形状描述; 描述一致且
+    exact_hash不同时再加载两个网格, 对齐后验证逐顶点残差。
+
+    参数:
+        hashes: 路径到geometry_hashes结果的映射
+        load: 按路径加载(顶点, 三角形)数组的函数
+
+    返回:
+        List: 每个簇的路径列表(至少两个成员), 同一exact_hash的成员相邻
+    """
+    buckets = {}
+    for path in sorted(hashes):
+        buckets.setdefault(hashes[path]['shape_hash'], []).append(path)
+
+    clusters = []
+    for paths in buckets.values():
+        groups = []
+        for path in paths:
+            geometry = None
+            for members in groups:
+                first = hashes[members[0]]
+                if first['exact_hash'] != hashes[path]['exact_hash']:
+                    if not shapes_match(first, hashes[path], tolerance):
+                        continue
+                    if geometry is None:
+                        geometry = canonical_geometry(*load(path))
+                    if not shapes_align(canonical_geometry(*load(members[0])), geometry,
+                                        tolerance):
+                        continue
+                members.append(path)
+                break
+            else:
+                groups.append([path])
+        clusters.extend(members for members in groups if len(members) > 1)
+    return sorted(
+        (sorted(members, key=lambda path: (hashes[path]['exact_hash'], path))
+         for members in clusters),
+        key=lambda members: members[0]
+    )
@@ -0,0 +1,120 @@
+"""
+Scene Mesh Identity
+------------------
+
+这个工具用于快速判断场景物件引用的是否为同一个Mesh，主要功能：
+
+1. 分层识别:
+   - 有Mesh引用(ID或名称)时按引用识别, 同一引用只哈希一次几何数据
+   - 同一个mesh_data对象(按对象身份)只哈希一次
+   - 其余情况才打包顶点/索引并哈希
+
+2. 快速哈希:
+   - 顶点打包为float32、索引打包为uint32的连续数组
+   - 按64位字向量化混合(splitmix64), 不做字符串格式化
+   - 非加密哈希, 只用于分组
+
+3. 使用方法:
+   identity = MeshIdentity()
+   key = identity.key(obj.get('mesh', {}), obj.get('mesh_id'))
+"""
+
+import zlib
+from typing import Dict, Optional
+
+import numpy as np
+
+MIX_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+POSITION_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix(words: np.ndarray) -> np.ndarray:
+    """splitmix64终结函数, 逐元素混合"""
+    words = words ^ (words >> np.uint64(30))
+    words = words * MIX_MULTIPLIERS[0]
+    words = words ^ (words >> np.uint64(27))
+    words = words * MIX_MULTIPLIERS[1]
+    return words ^ (words >> np.uint64(31))
+
+def hash_array(array: np.ndarray) -> int:
+    """
+    连续数组字节的64位非加密哈希
+
+    每个64位字与其位置一起混合后求和(模2^64), 结果与数组的dtype和形状相关。
+    """
+    data = np.ascontiguousarray(array)
+    raw = data.reshape(-1).view(np.uint8)
+    padding = -len(raw) % 8
+    if padding:
+        raw = np.concatenate([raw, np.zeros(padding, dtype=np.uint8)])
+    words = raw.view('<u8')
+    positions = np.arange(1, len(words) + 1, dtype=np.uint64) * POSITION_MULTIPLIER
+    total = int(np.add.reduce(_mix(words ^ positions), dtype=np.uint64)) if len(words) else 0
+    header = zlib.crc32(f"{data.dtype.str}{data.shape}".encode())
+    return int(_mix(np.array([total ^ header], dtype=np.uint64))[0])
+
+def pack_mesh(mesh_data: Dict) -> tuple:
+    """把场景中的顶点/索引列表打包为(float32, uint32)数组"""
+    vertices = np.asarray(mesh_data.get('vertices', ()), dtype=np.float32)
+    indices = np.asarray(mesh_data.get('indices', ()), dtype=np.uint32)
+    return vertices, indices
+
+def mesh_reference(obj: Dict) -> Optional[str]:
+    """物件的Mesh引用: mesh_id、mesh_name或mesh数据中的id/name"""
+    for key in ('mesh_id', 'mesh_name'):
+        if obj.get(key) is not None:
+            return f"{key}:{obj[key]}"
+    mesh_data = obj.get('mesh')
+    if isinstance(mesh_data, dict):
+        for key in ('id', 'name'):
+            if mesh_data.get(key) is not None:
+                return f"mesh.{key}:{mesh_data[key]}"
+    return None
+
+def _has_geometry(mesh_data: Optional[Dict]) -> bool:
+    return bool(mesh_data) and any(
+        len(mesh_data.get(key, ())) > 0 for key in ('vertices', 'indices')
+    )
+
+class MeshIdentity:
+    """带记忆的Mesh识别, 一个场景扫描过程中共用一个实例"""
+
+    def __init__(self):
+        self._by_reference = {}  # Mesh引用 -> 键
+        self._by_object = {}  # id(mesh_data) -> (mesh_data, 键), 持有对象防止id被复用
+        self.hashed = 0
+
+    def geometry_key(self, mesh_data: Dict, remember: bool = True) -> str:
+        """按打包后的顶点和索引字节计算键, 同一对象只计算一次"""
+        memo = self._by_object.get(id(mesh_data))
+        if memo is not None and memo[0] is mesh_data:
+            return memo[1]
+        vertices, indices = pack_mesh(mesh_data)
+        key = f"{hash_array(vertices):016x}{hash_array(indices):016x}"
+        self.hashed += 1
+        if remember:
+            self._by_object[id(mesh_data)] = (mesh_data, key)
+        return key
+
+    def key(self, mesh_data: Dict, reference: Optional[str] = None,
+            remember: bool = True) -> str:
+        """
+        物件所用Mesh的分组键
+
+        参数:
+            mesh_data: Mesh的顶点和索引数据
+            reference: Mesh引用(ID或名称), 为空时只按几何识别
+            remember: 是否按对象身份记住mesh_data; 流式读取时每个物件的
+                      mesh_data都是新对象, 记住只会让它们无法释放
+
+        返回:
+            str: 同一Mesh得到相同的键
+        """
+        if reference is not None:
+            key = self._by_reference.get(reference)
+            if key is None:
+                # 引用首次出现时才看几何数据, 不同引用指向相同几何时仍合并
+                key = (self.geometry_key(mesh_data, remember) if _has_geometry(mesh_data)
+                       else f"ref:{reference}")
+                self._by_reference[reference] = key
+            return key
+        return self.geometry_key(mesh_data or {}, remember)
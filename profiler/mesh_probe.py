@@ -0,0 +1,242 @@
+"""
+Mesh Header Probe
+----------------
+
+这个工具用于在不构建几何数据的情况下获取模型统计，主要功能：
+
+1. glTF / GLB:
+   - 只读取JSON块, 不读取二进制缓冲区
+   - 顶点数/面数来自accessor的count
+   - 包围盒来自POSITION accessor的min/max, 按节点变换到世界空间
+
+2. OBJ:
+   - 按块流式读取, 整块用一次正则去掉注释
+   - 用NumPy在字节数组上定位行首和字段, 按字段数统计顶点和面(多边形按扇形拆分)
+   - 'v'行的前3个坐标拼接后一次解析, 得到包围盒
+
+3. 使用方法:
+   info = probe_mesh(path)
+   info['vertices'], info['faces'], info['bounds']
+"""
+
+import json
+import os
+import re
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+GLB_MAGIC = b'glTF'
+GLB_CHUNK_JSON = 0x4E4F534A
+OBJ_CHUNK_SIZE = 16 * 1024 * 1024
+
+# glTF图元模式
+MODE_TRIANGLES = 4
+MODE_TRIANGLE_STRIP = 5
+MODE_TRIANGLE_FAN = 6
+
+OBJ_COMMENT_PATTERN = re.compile(rb'#[^\n]*')
+
+def probe_mesh(path: str) -> Optional[Dict]:
+    """
+    只读取文件头/流式统计模型信息
+
+    返回:
+        Dict: vertices、faces、bounds([[min], [max]]), 以及glTF的顶点属性;
+              不支持的格式返回None
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.glb':
+        return gltf_stats(read_glb_json(path))
+    if extension == '.gltf':
+        with open(path, 'rb') as f:
+            return gltf_stats(json.load(f))
+    if extension == '.obj':
+        return obj_stats(path)
+    return None
+
+def read_glb_json(path: str) -> Dict:
+    """读取GLB文件的JSON块"""
+    with open(path, 'rb') as f:
+        magic, _, _ = struct.unpack('<4sII', f.read(12))
+        if magic != GLB_MAGIC:
+            raise ValueError(f"Not a GLB file: {path}")
+        chunk_length, chunk_type = struct.unpack('<II', f.read(8))
+        if chunk_type != GLB_CHUNK_JSON:
+            raise ValueError(f"GLB file without JSON chunk: {path}")
+        return json.loads(f.read(chunk_length))
+
+def _node_matrix(node: Dict) -> np.ndarray:
+    """节点的局部变换矩阵"""
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+    matrix = np.eye(4)
+    x, y, z, w = node.get('rotation', [0.0, 0.0, 0.0, 1.0])
+    matrix[:3, :3] = [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    ]
+    matrix[:3, :3] *= np.array(node.get('scale', [1.0, 1.0, 1.0]))
+    matrix[:3, 3] = node.get('translation', [0.0, 0.0, 0.0])
+    return matrix
+
+def mesh_instances(gltf: Dict) -> List[tuple]:
+    """场景中每个网格实例的(网格序号, 世界矩阵)"""
+    nodes = gltf.get('nodes', [])
+    scenes = gltf.get('scenes', [])
+    if not scenes:
+        # 没有场景时每个网格按单位矩阵计一次
+        return [(index, np.eye(4)) for index in range(len(gltf.get('meshes', [])))]
+
+    instances = []
+    roots = scenes[gltf.get('scene', 0)].get('nodes', [])
+    stack = [(index, np.eye(4)) for index in roots]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ _node_matrix(node)
+        if 'mesh' in node:
+            instances.append((node['mesh'], world))
+        stack.extend((child, world) for child in node.get('children', []))
+    return instances
+
+def _primitive_faces(primitive: Dict, accessors: List[Dict]) -> int:
+    """图元的三角形数量"""
+    mode = primitive.get('mode', MODE_TRIANGLES)
+    if 'indices' in primitive:
+        count = accessors[primitive['indices']]['count']
+    else:
+        count = accessors[primitive['attributes']['POSITION']]['count']
+    if mode == MODE_TRIANGLES:
+        return count // 3
+    if mode in (MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN):
+        return max(0, count - 2)
+    return 0  # 点和线
+
+def gltf_stats(gltf: Dict) -> Dict:
+    """根据glTF JSON统计顶点数、面数、世界空间包围盒和顶点属性"""
+    accessors = gltf.get('accessors', [])
+    meshes = gltf.get('meshes', [])
+
+    vertices = faces = 0
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    attributes = set()
+    for mesh_index, world in mesh_instances(gltf):
+        for primitive in meshes[mesh_index].get('primitives', []):
+            if 'POSITION' not in primitive.get('attributes', {}):
+                continue
+            position = accessors[primitive['attributes']['POSITION']]
+            vertices += position['count']
+            faces += _primitive_faces(primitive, accessors)
+            attributes.update(primitive['attributes'])
+            if 'min' in position and 'max' in position:
+                # 变换包围盒的8个角点
+                corners = np.array(np.meshgrid(
+                    *zip(position['min'][:3], position['max'][:3]), indexing='ij'
+                )).reshape(3, -1)
+                world_corners = world[:3, :3] @ corners + world[:3, 3:4]
+                lower = np.minimum(lower, world_corners.min(axis=1))
+                upper = np.maximum(upper, world_corners.max(axis=1))
+
+    bounds = [lower.tolist(), upper.tolist()] if vertices and np.isfinite(lower).all() \
+        else [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+    return {
+        'vertices': vertices,
+        'faces': faces,
+        'bounds': bounds,
+        'attributes': sorted(attributes)
+    }
+
+def _obj_chunk_stats(chunk: bytes) -> Tuple[np.ndarray, int]:
+    """
+    向量化统计一个OBJ块(以换行开头和结尾, 注释已去掉)
+
+    按字节定位每行的首字符和字段起点, 'v'行只取前3个坐标(忽略w分量和顶点色),
+    拼接后一次解析为浮点数; 'f'行按字段数计算扇形拆分后的三角形数。
+
+    返回:
+        (N×3坐标数组, 三角形数)
+    """
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    newlines = np.flatnonzero(data == 10)
+    starts, ends = newlines[:-1] + 1, newlines[1:]
+    head = data[np.minimum(starts, len(data) - 1)]
+    # 空格、制表符和其他控制字符都视为空白
+    spaced = data[np.minimum(starts + 1, len(data) - 1)] <= 32
+    # 每行的字段数(包括'v'/'f'本身)
+    blank = data <= 32
+    field_starts = np.flatnonzero(~blank[1:] & blank[:-1]) + 1
+    first_field = np.searchsorted(field_starts, starts)
+    field_counts = np.searchsorted(field_starts, ends) - first_field
+
+    face_fields = field_counts[(head == ord('f')) & spaced]
+    triangles = int(np.maximum(face_fields - 3, 1).sum())
+
+    is_vertex = (head == ord('v')) & spaced
+    vertex_fields = field_counts[is_vertex]
+    if len(vertex_fields) and vertex_fields.min() < 4:
+        raise ValueError("Malformed OBJ vertex line")
+    # 每个'v'行取从'v'之后到第4个字段结束的字节区间
+    first, last = starts[is_vertex] + 1, ends[is_vertex]
+    extra = vertex_fields > 4
+    last[extra] = field_starts[first_field[is_vertex][extra] + 4]
+    bounds = np.empty(2 * len(first) + 2, dtype=np.int64)
+    bounds[0], bounds[1:-1:2], bounds[2:-1:2], bounds[-1] = 0, first, last, len(data)
+    inside = np.repeat(np.arange(len(bounds) - 1) % 2 == 1, np.diff(bounds))
+    text = data[inside].tobytes()
+    coordinates = np.fromstring(text, dtype=np.float64, sep=' ')
+    if len(coordinates) != 3 * len(vertex_fields):
+        raise ValueError("Malformed OBJ vertex line")
+    return coordinates.reshape(-1, 3), triangles
+
+def obj_stats(path: str, chunk_size: int = OBJ_CHUNK_SIZE) -> Dict:
+    """流式统计OBJ文件的顶点数、三角形数和包围盒"""
+    vertices = faces = 0
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    attributes = set()
+
+    def _read_chunks(f):
+        """按块读取, 每块以完整行结束且以换行开头"""
+        tail = b'\n'
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                # 文件末尾没有换行时的最后一行
+                if tail.strip():
+                    yield tail + b'\n'
+                return
+            data = tail + data
+            cut = data.rfind(b'\n')
+            if cut <= 0:
+                # 块内没有新的换行(超长行), 整块并入下一块
+                tail = data
+                continue
+            yield data[:cut + 1]
+            tail = data[cut:]
+
+    with open(path, 'rb') as f:
+        for chunk in _read_chunks(f):
+            if b'#' in chunk:
+                chunk = OBJ_COMMENT_PATTERN.sub(b'', chunk)
+            coordinates, triangles = _obj_chunk_stats(chunk)
+            if len(coordinates):
+                vertices += len(coordinates)
+                lower = np.minimum(lower, coordinates.min(axis=0))
+                upper = np.maximum(upper, coordinates.max(axis=0))
+            faces += triangles
+            if b'\nvn' in chunk:
+                attributes.add('NORMAL')
+            if b'\nvt' in chunk:
+                attributes.add('TEXCOORD_0')
+
+    bounds = [lower.tolist(), upper.tolist()] if vertices else [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+    return {
+        'vertices': vertices,
+        'faces': faces,
+        'bounds': bounds,
+        'attributes': ['POSITION'] + sorted(attributes)
+    }
@@ -0,0 +1,302 @@
+"""
+Quadric Error Mesh Simplification
+--------------------------------
+
+这个工具用于按二次误差度量(QEM)简化三角形网格并生成LOD，主要功能：
+
+1. 误差度量:
+   - 每个面的平面方程构成4×4二次型, 按顶点累加(只存10个独立系数)
+   - 边界边额外加入垂直于面的约束平面, 保持开放边界的轮廓
+   - 坍缩目标点解3×3线性方程求最优位置, 矩阵病态时在端点和中点中选择
+
+2. 边坍缩:
+   - 初始代价用NumPy批量计算, 再建立最小堆
+   - 每次弹出代价最小的边, 以顶点版本号丢弃过期的堆记录
+   - 拒绝会翻转法线或破坏流形(link条件)的坍缩
+   - 单次简化过程中依次截取各级LOD
+
+3. 使用方法:
+   levels = simplify_levels(vertices, faces, {'medium': 5000, 'low': 2500})
+   levels['medium']['vertices'], levels['medium']['faces'], levels['medium']['max_error']
+"""
+
+import heapq
+from typing import Dict, Tuple
+
+import numpy as np
+
+BOUNDARY_WEIGHT = 10.0  # 边界约束平面的权重
+FLIP_THRESHOLD = 0.2  # 坍缩后法线与原法线夹角余弦低于该值视为翻转
+SINGULAR_EPSILON = 1e-10  # 二次型矩阵行列式的相对阈值
+
+def weld_vertices(vertices: np.ndarray, faces: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """按位置合并重复顶点(UV接缝等), 并去掉退化三角形"""
+    positions = np.ascontiguousarray(vertices, dtype=np.float64)
+    unique, inverse = np.unique(positions, axis=0, return_inverse=True)
+    welded = inverse.ravel()[faces].astype(np.int64)
+    keep = ((welded[:, 0] != welded[:, 1]) & (welded[:, 1] != welded[:, 2]) &
+            (welded[:, 2] != welded[:, 0]))
+    return unique, welded[keep]
+
+def _plane_quadrics(normals: np.ndarray, offsets: np.ndarray,
+                    weights: np.ndarray = None) -> np.ndarray:
+    """平面(n·p + d = 0)的二次型系数: a², ab, ac, ad, b², bc, bd, c², cd, d²"""
+    a, b, c = normals[:, 0], normals[:, 1], normals[:, 2]
+    d = offsets
+    quadrics = np.stack([a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d],
+                        axis=1)
+    if weights is not None:
+        quadrics *= weights[:, np.newaxis]
+    return quadrics
+
+def _accumulate(quadrics: np.ndarray, vertex_ids: np.ndarray, vertex_count: int) -> np.ndarray:
+    """把每个平面的二次型累加到对应顶点"""
+    return np.stack([
+        np.bincount(vertex_ids, weights=quadrics[:, i], minlength=vertex_count)
+        for i in range(10)
+    ], axis=1)
+
+def vertex_quadrics(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """每个顶点的累积二次型(V×10), 包含边界约束平面"""
+    vertex_count = len(vertices)
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    normals[valid] /= lengths[valid, np.newaxis]
+    offsets = -np.einsum('ij,ij->i', normals, corners[:, 0])
+    face_quadrics = _plane_quadrics(normals, offsets)
+    quadrics = _accumulate(np.repeat(face_quadrics, 3, axis=0), faces.ravel(), vertex_count)
+
+    # 只被一个面使用的边是边界边
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    owners = np.tile(np.arange(len(faces)), 3)
+    keys = np.sort(edges, axis=1)
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    boundary = counts[inverse.ravel()] == 1
+    if np.any(boundary):
+        start = vertices[edges[boundary, 0]]
+        direction = vertices[edges[boundary, 1]] - start
+        side = np.cross(direction, normals[owners[boundary]])
+        lengths = np.linalg.norm(side, axis=1)
+        valid = lengths > 0
+        side[valid] /= lengths[valid, np.newaxis]
+        side_quadrics = _plane_quadrics(
+            side, -np.einsum('ij,ij->i', side, start),
+            np.full(len(side), BOUNDARY_WEIGHT)
+        )
+        quadrics += _accumulate(
+            np.concatenate([side_quadrics, side_quadrics]),
+            np.concatenate([edges[boundary, 0], edges[boundary, 1]]), vertex_count
+        )
+    return quadrics
+
+# 10个独立系数在对称4×4矩阵中的位置
+QUADRIC_MATRIX_INDEX = np.array([0, 1, 2, 3, 1, 4, 5, 6, 2, 5, 7, 8, 3, 6, 8, 9])
+
+def _cross(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """N×3叉积(小数组上比np.cross开销低)"""
+    return np.stack([u[:, 1] * v[:, 2] - u[:, 2] * v[:, 1],
+                     u[:, 2] * v[:, 0] - u[:, 0] * v[:, 2],
+                     u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]], axis=1)
+
+def collapse_costs(quadrics: np.ndarray, first: np.ndarray,
+                   second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    批量计算边坍缩的代价和目标位置
+
+    候选点为最优位置(矩阵可逆时)、中点和两个端点, 取二次误差最小者。
+
+    参数:
+        quadrics: 两个端点二次型之和(N×10)
+        first, second: 端点位置(N×3)
+
+    返回:
+        (代价 N, 目标位置 N×3)
+    """
+    matrix = quadrics[:, QUADRIC_MATRIX_INDEX].reshape(-1, 4, 4)
+    system = matrix[:, :3, :3]
+    det = np.linalg.det(system)
+    scale = np.trace(system, axis1=1, axis2=2) ** 3
+    solvable = np.abs(det) > SINGULAR_EPSILON * np.maximum(scale, np.finfo(np.float64).tiny)
+
+    midpoint = (first + second) * 0.5
+    optimal = midpoint.copy()
+    if np.any(solvable):
+        optimal[solvable] = np.linalg.solve(
+            system[solvable], -matrix[solvable, :3, 3:]
+        )[:, :, 0]
+
+    candidates = np.ones((len(first), 4, 4))
+    candidates[:, 0, :3] = optimal
+    candidates[:, 1, :3] = midpoint
+    candidates[:, 2, :3] = first
+    candidates[:, 3, :3] = second
+    errors = np.einsum('nki,nij,nkj->nk', candidates, matrix, candidates)
+    best = np.argmin(errors, axis=1)
+    rows = np.arange(len(first))
+    return np.maximum(errors[rows, best], 0.0), candidates[rows, best, :3]
+
+class QuadricSimplifier:
+    """基于二次误差度量和最小堆的边坍缩简化器"""
+
+    def __init__(self, vertices: np.ndarray, faces: np.ndarray):
+        self.positions = np.array(vertices, dtype=np.float64)
+        self.quadrics = vertex_quadrics(self.positions, faces)
+        self.faces = faces.tolist()
+        self.face_alive = bytearray(b'\x01') * len(self.faces)
+        self.face_count = len(self.faces)
+        self.vertex_alive = bytearray(b'\x01') * len(self.positions)
+        self.version = [0] * len(self.positions)
+        self.max_cost = 0.0
+
+        # 顶点 -> 相邻面集合
+        self.vertex_faces = [set() for _ in range(len(self.positions))]
+        for face_id, face in enumerate(self.faces):
+            for vertex in face:
+                self.vertex_faces[vertex].add(face_id)
+
+        edges = np.unique(np.sort(np.concatenate([
+            faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]
+        ]), axis=1), axis=0)
+        self.heap = self._edge_entries(edges[:, 0], edges[:, 1])
+        heapq.heapify(self.heap)
+
+    def _edge_entries(self, first: np.ndarray, second: np.ndarray) -> list:
+        """计算边的代价, 生成带端点版本号的堆记录"""
+        if len(first) == 0:
+            return []
+        costs, targets = collapse_costs(
+            self.quadrics[first] + self.quadrics[second],
+            self.positions[first], self.positions[second]
+        )
+        version = self.version
+        return [
+            (cost, a, b, version[a], version[b], tuple(target))
+            for cost, a, b, target in zip(costs.tolist(), first.tolist(), second.tolist(),
+                                          targets.tolist())
+        ]
+
+    def _neighbors(self, vertex: int) -> set:
+        """与顶点共面的其他顶点"""
+        neighbors = set()
+        faces = self.faces
+        for face_id in self.vertex_faces[vertex]:
+            neighbors.update(faces[face_id])
+        neighbors.discard(vertex)
+        return neighbors
+
+    def _flips(self, face_ids: list, moved: Tuple[int, int], target: tuple) -> bool:
+        """坍缩后是否有三角形翻转或退化"""
+        if not face_ids:
+            return False
+        corners = np.array([self.faces[face_id] for face_id in face_ids])
+        before = self.positions[corners]
+        after = before.copy()
+        after[(corners == moved[0]) | (corners == moved[1])] = target
+        normal_before = _cross(before[:, 1] - before[:, 0], before[:, 2] - before[:, 0])
+        normal_after = _cross(after[:, 1] - after[:, 0], after[:, 2] - after[:, 0])
+        dot = np.einsum('ij,ij->i', normal_before, normal_after)
+        limit = FLIP_THRESHOLD * (np.linalg.norm(normal_before, axis=1) *
+                                  np.linalg.norm(normal_after, axis=1))
+        return bool(np.any(dot <= limit))
+
+    def _collapse(self, a: int, b: int, target: tuple) -> bool:
+        """把顶点b坍缩到a并移动到target, 不满足约束时返回False"""
+        faces_a = self.vertex_faces[a]
+        faces_b = self.vertex_faces[b]
+        shared = faces_a & faces_b
+        # link条件: 两端点的公共邻居数等于共享面数, 否则坍缩会产生非流形
+        if len(self._neighbors(a) & self._neighbors(b)) != len(shared):
+            return False
+        if self._flips(list((faces_a | faces_b) - shared), (a, b), target):
+            return False
+
+        self.positions[a] = target
+        self.quadrics[a] += self.quadrics[b]
+        self.vertex_alive[b] = 0
+        self.version[a] += 1
+        self.version[b] += 1
+        for face_id in shared:
+            self.face_alive[face_id] = 0
+            self.face_count -= 1
+            for vertex in self.faces[face_id]:
+                if vertex != a and vertex != b:
+                    self.vertex_faces[vertex].discard(face_id)
+        faces_a -= shared
+        for face_id in faces_b - shared:
+            face = self.faces[face_id]
+            face[face.index(b)] = a
+            faces_a.add(face_id)
+        self.vertex_faces[b] = set()
+        return True
+
+    def simplify(self, target_faces: int) -> int:
+        """
+        坍缩代价最小的边直到面数不超过target_faces或无边可坍缩
+
+        返回:
+            int: 剩余面数
+        """
+        heap = self.heap
+        version = self.version
+        alive = self.vertex_alive
+        while self.face_count > target_faces and heap:
+            cost, a, b, version_a, version_b, target = heapq.heappop(heap)
+            if not (alive[a] and alive[b]) or version[a] != version_a or version[b] != version_b:
+                continue
+            if not self._collapse(a, b, target):
+                continue
+            self.max_cost = max(self.max_cost, cost)
+            neighbors = np.fromiter(self._neighbors(a), dtype=np.int64)
+            for entry in self._edge_entries(np.full(len(neighbors), a, dtype=np.int64),
+                                            neighbors):
+                heapq.heappush(heap, entry)
+        return self.face_count
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """压缩后的(顶点, 三角形)数组"""
+        alive_faces = np.frombuffer(bytes(self.face_alive), dtype=np.uint8).astype(bool)
+        faces = np.array(self.faces, dtype=np.int64).reshape(-1, 3)[alive_faces]
+        used, remapped = np.unique(faces, return_inverse=True)
+        return (self.positions[used].astype(np.float32),
+                remapped.reshape(-1, 3).astype(np.uint32))
+
+def simplify_levels(vertices: np.ndarray, faces: np.ndarray,
+                    targets: Dict[str, int]) -> Dict[str, Dict]:
+    """
+    一次简化过程中依次截取各级LOD
+
+    参数:
+        vertices: 顶点位置(N×3)
+        faces: 三角形索引(M×3)
+        targets: LOD名称 -> 目标面数
+
+    返回:
+        Dict: LOD名称 -> 顶点、三角形、实际面数和误差
+    """
+    vertices, faces = weld_vertices(vertices, faces)
+    extent = vertices.max(axis=0) - vertices.min(axis=0) if len(vertices) else np.zeros(3)
+    diagonal = float(np.linalg.norm(extent))
+    simplifier = QuadricSimplifier(vertices, faces)
+
+    levels = {}
+    for name, target in sorted(targets.items(), key=lambda item: -item[1]):
+        simplifier.simplify(target)
+        level_vertices, level_faces = simplifier.snapshot()
+        # 二次误差是到各支撑平面距离的平方和, 开方后作为几何误差的上界估计
+        max_error = float(np.sqrt(simplifier.max_cost))
+        levels[name] = {
+            'vertices': level_vertices,
+            'faces': level_faces,
+            'target_faces': target,
+            'max_error': max_error,
+            'relative_error': max_error / diagonal if diagonal else 0.0
+        }
+    return levels
+
+def write_obj(path: str, vertices: np.ndarray, faces: np.ndarray):
+    """把网格写为只含位置的OBJ文件"""
+    with open(path, 'w') as f:
+        np.savetxt(f, vertices, fmt='v %.6f %.6f %.6f')
+        np.savetxt(f, faces.astype(np.int64) + 1, fmt='f %d %d %d')
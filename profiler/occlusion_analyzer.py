@@ -6,9 +6,11 @@ Occlusion Culling Analyzer Tool
 
 1. 分析功能:
    - 场景物件分层分析
-   - 遮挡关系计算
-   - 视锥体剔除测试
-   - 性能开销评估
+   - 遮挡关系计算(大物件画进低分辨率深度缓冲, 用Hi-Z金字塔测试包围盒)
+   - 视锥体剔除测试(所有相机、所有物件一次批量计算)
+   - 性能开销评估(每个视角的光栅化、金字塔和测试耗时)
+   - 流式读取场景, 物件数据按列存储, 分类为行号视图
+   - 支持多个场景, 每个场景单独生成相机和统计
 
 2. 优化目标:
    - 优化遮挡剔除策略
@@ -19,7 +21,7 @@ Occlusion Culling Analyzer Tool
 3. 剔除方案:
    - 大物件: 软光栅化遮挡
    - 小物件: 视锥体+包围盒
-   - 动态物件: 分块视锥+四叉树
+   - 动态物件: 与静态物件同一次批量视锥体测试
 
 4. 使用方法:
    python occlusion_analyzer.py [scene_path]
@@ -32,138 +34,196 @@ from collections import defaultdict
 import math
 from typing import List, Dict, Tuple
 import os
+import time
+from frustum_culling import Camera, frustum_planes, frustum_visibility, make_camera, orbit_cameras
+from occlusion_raster import DepthPyramid, rasterize_boxes
+from scene_store import SceneStore, SceneView
 
 class OcclusionAnalyzer:
+    LARGE_OCCLUDER_VOLUME = 1000  # 大物件阈值
+    DEFAULT_CAMERA_COUNT = 8  # 未指定相机时在场景周围生成的相机数
+    DEPTH_BUFFER_SIZE = (256, 128)  # 遮挡深度缓冲的宽和高
+    
     def __init__(self):
+        self.scenes = []  # SceneStore列表, 可与其他分析器共享
+        self.scene = None  # 当前分析的场景
         self.objects = []
         self.large_occluders = []
         self.small_objects = []
         self.dynamic_objects = []
-        self.quadtree = None
         self.stats = {}
         
     def load_scene(self, scene_path: str):
         """加载场景数据并进行初始分类"""
         print(f"Loading scene: {scene_path}")
         try:
-            with open(scene_path, 'r') as f:
-                scene_data = json.load(f)
-                
-            # 根据物件大小和属性进行分类
-            for obj in scene_data.get('objects', []):
-                bounds = self._calculate_bounds(obj)
-                volume = self._calculate_volume(bounds)
-                
-                obj_data = {
-                    'id': obj.get('id'),
-                    'bounds': bounds,
-                    'volume': volume,
-                    'position': obj.get('position'),
-                    'is_static': obj.get('is_static', True),
-                    'mesh_name': obj.get('mesh_name')
-                }
-                
-                # 分类物件
-                if volume > 1000:  # 大物件阈值
-                    self.large_occluders.append(obj_data)
-                elif not obj_data['is_static']:
-                    self.dynamic_objects.append(obj_data)
-                else:
-                    self.small_objects.append(obj_data)
-                    
-                self.objects.append(obj_data)
-                
+            self.use_scene(SceneStore.load(scene_path))
         except Exception as e:
             print(f"Error loading scene: {e}")
             
-    def _calculate_bounds(self, obj: dict) -> dict:
-        """计算物件的包围盒"""
-        # 简化的包围盒计算
-        pos = obj.get('position', [0, 0, 0])
-        size = obj.get('size', [1, 1, 1])
-        return {
-            'min': [p - s/2 for p, s in zip(pos, size)],
-            'max': [p + s/2 for p, s in zip(pos, size)]
-        }
+    def use_scene(self, store: SceneStore):
+        """使用单个已加载的场景"""
+        self.use_scenes([store])
         
-    def _calculate_volume(self, bounds: dict) -> float:
-        """计算包围盒体积"""
-        size = [b_max - b_min for b_max, b_min in zip(bounds['max'], bounds['min'])]
-        return size[0] * size[1] * size[2]
+    def use_scenes(self, stores: List[SceneStore]):
+        """使用多个已加载的场景, 遮挡按场景分别分析"""
+        self.scenes = list(stores)
+        if self.scenes:
+            self._classify(self.scenes[0])
+            
+    def _classify(self, store: SceneStore):
+        """按场景的列数据对物件分类, 各分类为行号视图"""
+        self.scene = store
+        self.objects = store.view()
+        
+        # 根据物件大小和属性进行分类
+        large = store.volumes > self.LARGE_OCCLUDER_VOLUME
+        dynamic = ~large & ~store.is_static
+        self.large_occluders = self.objects.select(large)
+        self.dynamic_objects = self.objects.select(dynamic)
+        self.small_objects = self.objects.select(~large & ~dynamic)
+            
+    def analyze_occlusion(self, cameras: List = None):
+        """
+        分析场景遮挡情况
         
-    def analyze_occlusion(self, camera_positions: List[List[float]]):
-        """分析场景遮挡情况"""
+        参数:
+            cameras: 相机列表, 每项为Camera、make_camera参数的dict
+                     (position, forward/target, fov, aspect, near, far),
+                     或只有位置的[x, y, z](看向场景中心); 为空时在每个场景周围生成一圈相机
+        """
         self.stats = {
-            'total_objects': len(self.objects),
-            'large_occluders': len(self.large_occluders),
-            'small_objects': len(self.small_objects),
-            'dynamic_objects': len(self.dynamic_objects),
+            'total_objects': 0,
+            'large_occluders': 0,
+            'small_objects': 0,
+            'dynamic_objects': 0,
+            'camera_count': 0,
+            'frustum_time_ms': 0.0,
             'culling_stats': []
         }
+        for store in self.scenes:
+            self._classify(store)
+            self._analyze_scene(cameras)
+            
+    def _analyze_scene(self, cameras: List = None):
+        """分析当前场景, 结果累加到stats"""
+        cameras = self._make_cameras(cameras)
+        self.stats['total_objects'] += len(self.objects)
+        self.stats['large_occluders'] += len(self.large_occluders)
+        self.stats['small_objects'] += len(self.small_objects)
+        self.stats['dynamic_objects'] += len(self.dynamic_objects)
+        self.stats['camera_count'] += len(cameras)
+        if not cameras:
+            return
+        
+        # 所有相机一次完成视锥体测试
+        start = time.perf_counter()
+        visible = frustum_visibility(frustum_planes(cameras),
+                                     self.scene.bounds_min, self.scene.bounds_max)
+        frustum_time = time.perf_counter() - start
+        self.stats['frustum_time_ms'] += frustum_time * 1000
         
-        for cam_pos in camera_positions:
-            view_stats = self._analyze_view_position(cam_pos)
+        for camera, view_visible in zip(cameras, visible):
+            view_stats = self._analyze_view(camera, view_visible, frustum_time / len(cameras))
+            if self.scene.path:
+                view_stats['scene'] = self.scene.path
             self.stats['culling_stats'].append(view_stats)
             
-    def _analyze_view_position(self, camera_pos: List[float]) -> dict:
-        """分析特定视角的遮挡情况"""
-        # 模拟视锥体剔除
-        frustum_culled = self._simulate_frustum_culling(camera_pos)
-        
-        # 模拟软光栅化遮挡
-        raster_culled = self._simulate_raster_occlusion(camera_pos, self.large_occluders)
+    def _scene_center(self) -> np.ndarray:
+        if self.scene is None or self.scene.count == 0:
+            return np.zeros(3)
+        return (self.scene.bounds_min.min(axis=0) + self.scene.bounds_max.max(axis=0)) / 2
         
-        # 模拟四叉树加速
-        quadtree_culled = self._simulate_quadtree_culling(camera_pos)
+    def _make_cameras(self, cameras: List = None) -> List[Camera]:
+        """把各种相机描述统一为Camera"""
+        if cameras is None:
+            if self.scene is None or self.scene.count == 0:
+                return []
+            # 场景内一圈看向中心的相机, 身后和视野外的物件会被剔除
+            extent = self.scene.bounds_max.max(axis=0) - self.scene.bounds_min.min(axis=0)
+            radius = max(float(np.linalg.norm(extent)) / 2, 1.0)
+            return orbit_cameras(self._scene_center(), radius * 0.5, self.DEFAULT_CAMERA_COUNT,
+                                 far=radius * 2)
         
-        return {
-            'camera_position': camera_pos,
-            'frustum_culled': len(frustum_culled),
-            'raster_culled': len(raster_culled),
-            'quadtree_culled': len(quadtree_culled),
-            'total_culled': len(frustum_culled) + len(raster_culled) + len(quadtree_culled)
-        }
+        center = self._scene_center()
+        result = []
+        for camera in cameras:
+            if isinstance(camera, Camera):
+                result.append(camera)
+                continue
+            params = dict(camera) if isinstance(camera, dict) else {'position': camera}
+            if ('forward' not in params and 'target' not in params
+                    and not np.allclose(params['position'], center)):
+                params['target'] = center
+            result.append(make_camera(**params))
+        return result
         
-    def _simulate_frustum_culling(self, camera_pos: List[float]) -> List[dict]:
-        """模拟视锥体剔除"""
-        culled_objects = []
-        for obj in self.small_objects:
-            if self._is_in_frustum(camera_pos, obj['bounds']):
-                culled_objects.append(obj)
-        return culled_objects
+    def _analyze_view(self, camera: Camera, visible: np.ndarray, frustum_time: float) -> dict:
+        """
+        统计一个视角的剔除情况
         
-    def _simulate_raster_occlusion(self, camera_pos: List[float], 
-                                 occluders: List[dict]) -> List[dict]:
-        """模拟软光栅化遮挡"""
-        culled_objects = []
-        for obj in occluders:
-            if self._is_occluded(camera_pos, obj['bounds']):
-                culled_objects.append(obj)
-        return culled_objects
+        参数:
+            camera: 相机
+            visible: 该相机下每个物件是否与视锥体相交
+            frustum_time: 分摊到该相机的视锥体测试耗时(秒)
+        """
+        # 视锥体剔除: 静态物件(含大物件)和动态物件用同一次批量测试
+        frustum_culled = (len(self.small_objects) + len(self.large_occluders)
+                          - int(visible[self.small_objects.rows].sum())
+                          - int(visible[self.large_occluders.rows].sum()))
+        dynamic_frustum_culled = (len(self.dynamic_objects)
+                                  - int(visible[self.dynamic_objects.rows].sum()))
         
-    def _simulate_quadtree_culling(self, camera_pos: List[float]) -> List[dict]:
-        """模拟四叉树加速的动态物件剔除"""
-        culled_objects = []
-        for obj in self.dynamic_objects:
-            if self._is_in_quadtree_visible_area(camera_pos, obj['bounds']):
-                culled_objects.append(obj)
-        return culled_objects
+        # 软光栅化遮挡: 视锥内的大物件画进深度缓冲, 再测试所有视锥内物件
+        raster = self._simulate_raster_occlusion(camera, self.large_occluders.select(visible),
+                                                 self.objects.select(visible))
         
-    def _is_in_frustum(self, camera_pos: List[float], bounds: dict) -> bool:
-        """简化的视锥体检测"""
-        # 这里使用简化的视锥体检测逻辑
-        return True
+        return {
+            'camera_position': camera.position.tolist(),
+            'camera_forward': camera.forward.tolist(),
+            'fov': camera.fov,
+            'frustum_culled': frustum_culled,
+            'raster_culled': len(raster['culled']),
+            'dynamic_frustum_culled': dynamic_frustum_culled,
+            'total_culled': frustum_culled + len(raster['culled']) + dynamic_frustum_culled,
+            'occluders_drawn': raster['occluders_drawn'],
+            'occluder_pixels': raster['pixels'],
+            'frustum_time_ms': frustum_time * 1000,
+            'raster_time_ms': raster['raster_time_ms'],
+            'pyramid_time_ms': raster['pyramid_time_ms'],
+            'occlusion_test_time_ms': raster['test_time_ms']
+        }
         
-    def _is_occluded(self, camera_pos: List[float], bounds: dict) -> bool:
-        """简化的遮挡检测"""
-        # 这里使用简化的遮挡检测逻辑
-        return True
+    def _simulate_raster_occlusion(self, camera: Camera, occluders: SceneView,
+                                 candidates: SceneView) -> dict:
+        """
+        软光栅化遮挡剔除
         
-    def _is_in_quadtree_visible_area(self, camera_pos: List[float], 
-                                    bounds: dict) -> bool:
-        """简化的四叉树可见性检测"""
-        # 这里使用简化的四叉树检测逻辑
-        return True
+        参数:
+            camera: 相机
+            occluders: 画进深度缓冲的遮挡体
+            candidates: 需要测试的物件(可包含遮挡体本身)
+            
+        返回:
+            dict: 被遮挡的物件视图、绘制统计和各阶段耗时(毫秒)
+        """
+        width, height = self.DEPTH_BUFFER_SIZE
+        start = time.perf_counter()
+        depth, stats = rasterize_boxes(camera, occluders.bounds_min, occluders.bounds_max,
+                                       width, height)
+        rasterized = time.perf_counter()
+        pyramid = DepthPyramid(depth)
+        built = time.perf_counter()
+        result = pyramid.test_boxes(camera, candidates.bounds_min, candidates.bounds_max)
+        tested = time.perf_counter()
+        return {
+            'culled': candidates.select(result['occluded']),
+            'occluders_drawn': stats['occluders_drawn'],
+            'pixels': stats['pixels'],
+            'raster_time_ms': (rasterized - start) * 1000,
+            'pyramid_time_ms': (built - rasterized) * 1000,
+            'test_time_ms': (tested - built) * 1000
+        }
         
     def generate_report(self, output_path: str):
         """生成分析报告"""
@@ -175,6 +235,7 @@ class OcclusionAnalyzer:
                 'dynamic_objects': self.stats['dynamic_objects']
             },
             'culling_performance': self.stats['culling_stats'],
+            'frustum_time_ms': self.stats['frustum_time_ms'],
             'recommendations': self._generate_recommendations()
         }
         
@@ -188,7 +249,9 @@ class OcclusionAnalyzer:
         recommendations = []
         
         # 分析大物件密度
-        large_density = len(self.large_occluders) / self.stats['total_objects']
+        if self.stats['total_objects'] == 0:
+            return recommendations
+        large_density = self.stats['large_occluders'] / self.stats['total_objects']
         if large_density < 0.1:
             recommendations.append({
                 'type': 'large_occluders',
@@ -196,7 +259,7 @@ class OcclusionAnalyzer:
             })
             
         # 分析动态物件比例
-        dynamic_ratio = len(self.dynamic_objects) / self.stats['total_objects']
+        dynamic_ratio = self.stats['dynamic_objects'] / self.stats['total_objects']
         if dynamic_ratio > 0.3:
             recommendations.append({
                 'type': 'dynamic_objects',
@@ -219,9 +282,9 @@ class OcclusionAnalyzer:
         """生成物件分布饼图"""
         plt.figure(figsize=(10, 8))
         labels = ['Large Occluders', 'Small Objects', 'Dynamic Objects']
-        sizes = [len(self.large_occluders), 
-                len(self.small_objects), 
-                len(self.dynamic_objects)]
+        sizes = [self.stats['large_occluders'], 
+                self.stats['small_objects'], 
+                self.stats['dynamic_objects']]
                 
         plt.pie(sizes, labels=labels, autopct='%1.1f%%')
         plt.title('Scene Object Distribution')
@@ -236,11 +299,12 @@ class OcclusionAnalyzer:
             avg_stats = {
                 'frustum': np.mean([s['frustum_culled'] for s in self.stats['culling_stats']]),
                 'raster': np.mean([s['raster_culled'] for s in self.stats['culling_stats']]),
-                'quadtree': np.mean([s['quadtree_culled'] for s in self.stats['culling_stats']])
+                'dynamic_frustum': np.mean([s['dynamic_frustum_culled']
+                                            for s in self.stats['culling_stats']])
             }
             
-            methods = ['Frustum', 'Raster', 'Quadtree']
-            values = [avg_stats['frustum'], avg_stats['raster'], avg_stats['quadtree']]
+            methods = ['Frustum', 'Raster', 'Dynamic Frustum']
+            values = [avg_stats['frustum'], avg_stats['raster'], avg_stats['dynamic_frustum']]
             
             plt.bar(methods, values)
             plt.title('Average Culling Performance')
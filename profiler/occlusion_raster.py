@@ -0,0 +1,276 @@
+"""
+Software Occlusion Rasterizer
+----------------------------
+
+这个工具用于在CPU上用低分辨率深度缓冲做遮挡剔除，主要功能：
+
+1. 遮挡体光栅化:
+   - 遮挡体为AABB, 只画朝向相机的面(每个盒子最多3个凸四边形)
+   - 跨越近平面的遮挡体直接跳过(少画遮挡体只会少剔除, 不会误剔除)
+   - 按四边形包围矩形展开像素, 分块向量化计算边函数和深度
+   - 保守光栅化: 只写完全被覆盖的像素, 深度取像素范围内的最大值
+     (1/z在屏幕空间是仿射的, 最大深度可由像素中心的值直接算出)
+
+2. 层级深度(Hi-Z):
+   - 每级按2×2取最小/最大深度, 得到min/max两套金字塔
+   - max金字塔用于判定遮挡, min金字塔用于快速确认可见
+
+3. 被遮挡体测试:
+   - AABB八个角点投影得到屏幕矩形和最近深度
+   - 选择矩形不超过2×2个texel的层级, 取这些texel的最大深度比较
+   - 跨越近平面或在屏幕外的物件视为可见
+
+4. 使用方法:
+   depth, raster_stats = rasterize_boxes(camera, occluder_min, occluder_max)
+   pyramid = DepthPyramid(depth)
+   occluded = pyramid.test_boxes(camera, bounds_min, bounds_max)
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from frustum_culling import Camera
+
+DEPTH_WIDTH = 256
+DEPTH_HEIGHT = 128
+CHUNK_PIXELS = 1 << 19  # 每块展开的像素数上限
+
+# AABB的六个面: (轴, 是否为max面, 按绕序排列的四个角点编号)
+# 角点编号的第0/1/2位分别表示x/y/z取max
+_BOX_FACES = (
+    (0, False, (0, 4, 6, 2)),
+    (0, True, (1, 3, 7, 5)),
+    (1, False, (0, 1, 5, 4)),
+    (1, True, (2, 6, 7, 3)),
+    (2, False, (0, 2, 3, 1)),
+    (2, True, (4, 5, 7, 6))
+)
+_CORNER_BITS = (np.arange(8)[:, np.newaxis] >> np.arange(3)) & 1
+
+def _box_corners(lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """(N, 8, 3)的角点, 编号见_BOX_FACES"""
+    return np.where(_CORNER_BITS.astype(bool), upper[:, np.newaxis, :], lower[:, np.newaxis, :])
+
+class _Projection:
+    """相机空间和深度缓冲像素坐标之间的变换"""
+
+    def __init__(self, camera: Camera, width: int, height: int):
+        self.camera = camera
+        self.width = width
+        self.height = height
+        self.rotation = np.stack([np.cross(camera.forward, camera.up), camera.up, camera.forward])
+        self.tan_v = math.tan(math.radians(camera.fov) / 2)
+        self.tan_h = self.tan_v * camera.aspect
+
+    def to_view(self, points: np.ndarray) -> np.ndarray:
+        """世界坐标 -> 相机空间(x右, y上, z为视线方向深度)"""
+        return (points - self.camera.position) @ self.rotation.T
+
+    def to_screen(self, view: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """相机空间(z > 0) -> 像素坐标, y向下"""
+        return self.project(view[..., 0], view[..., 1], view[..., 2])
+
+    def project(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """分量形式的to_screen"""
+        return ((x / (z * self.tan_h) + 1) * (self.width / 2),
+                (1 - y / (z * self.tan_v)) * (self.height / 2))
+
+    def ray_coefficients(self, normals: np.ndarray) -> np.ndarray:
+        """
+        dot(n, 像素(x, y)对应的视线方向)关于x, y的仿射系数
+
+        视线方向为((2x/W - 1)·tan_h, (1 - 2y/H)·tan_v, 1), 返回(N, 3)的(α, β, γ)
+        """
+        sx = 2 * self.tan_h / self.width
+        sy = -2 * self.tan_v / self.height
+        return np.stack([
+            normals[:, 0] * sx,
+            normals[:, 1] * sy,
+            normals[:, 2] - normals[:, 0] * self.tan_h + normals[:, 1] * self.tan_v
+        ], axis=1)
+
+def _front_faces(projection: _Projection, lower: np.ndarray, upper: np.ndarray) -> Dict:
+    """朝向相机的面: 屏幕上的四边形、面在相机空间的平面"""
+    corners_view = projection.to_view(_box_corners(lower, upper).reshape(-1, 3)).reshape(-1, 8, 3)
+    position = projection.camera.position
+    quads, planes = [], []
+    for axis, is_max, indices in _BOX_FACES:
+        # 相机在面的外侧时该面朝向相机
+        facing = position[axis] > upper[:, axis] if is_max else position[axis] < lower[:, axis]
+        if not facing.any():
+            continue
+        quad = corners_view[facing][:, indices]
+        # 平面法线取从面指向相机一侧的反方向, 使dot(n, p) = k > 0
+        normal = np.zeros(3)
+        normal[axis] = -1.0 if is_max else 1.0
+        normal_view = np.broadcast_to(projection.rotation @ normal, (len(quad), 3))
+        quads.append(quad)
+        planes.append(np.concatenate([normal_view,
+                                      np.einsum('ij,ij->i', normal_view, quad[:, 0])[:, np.newaxis]],
+                                     axis=1))
+    if not quads:
+        return {'quads': np.zeros((0, 4, 3)), 'planes': np.zeros((0, 4))}
+    return {'quads': np.concatenate(quads), 'planes': np.concatenate(planes)}
+
+def rasterize_boxes(camera: Camera, lower: np.ndarray, upper: np.ndarray,
+                    width: int = DEPTH_WIDTH, height: int = DEPTH_HEIGHT) -> Tuple[np.ndarray, Dict]:
+    """
+    把遮挡体AABB画进深度缓冲
+
+    参数:
+        camera: 相机
+        lower, upper: (遮挡体数, 3)的包围盒
+        width, height: 深度缓冲尺寸
+
+    返回:
+        (深度缓冲(height, width), 未覆盖处为inf; 统计: 绘制的遮挡体/四边形/像素数)
+    """
+    projection = _Projection(camera, width, height)
+    depth = np.full(height * width, np.inf, dtype=np.float32)
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+
+    # 跨越近平面的遮挡体无法简单投影, 跳过
+    corners_z = projection.to_view(_box_corners(lower, upper).reshape(-1, 3))[:, 2].reshape(-1, 8)
+    drawable = corners_z.min(axis=1) >= camera.near
+    faces = _front_faces(projection, lower[drawable], upper[drawable])
+    stats = {'occluders_drawn': int(drawable.sum()), 'quads': len(faces['quads']), 'pixels': 0}
+    if not len(faces['quads']):
+        return depth.reshape(height, width), stats
+
+    x, y = projection.to_screen(faces['quads'])
+    # 边函数 E(p) = a·px + b·py + c, 按四边形的绕向统一为内侧非负
+    x_next, y_next = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+    edge_a = y_next - y
+    edge_b = x - x_next
+    edge_c = -(edge_a * x + edge_b * y)
+    area = np.sum(x * y_next - x_next * y, axis=1)
+    sign = np.where(area >= 0, -1.0, 1.0)[:, np.newaxis]
+    edge_a, edge_b, edge_c = edge_a * sign, edge_b * sign, edge_c * sign
+    # 保守光栅化: 像素四个角都在内侧, 即中心处的值减去半个像素的最大变化量
+    edge_c -= 0.5 * (np.abs(edge_a) + np.abs(edge_b))
+
+    coefficients = projection.ray_coefficients(faces['planes'][:, :3])
+    plane_k = faces['planes'][:, 3]
+    # 像素范围内dot(n, d)的最小值对应最大深度
+    coefficients[:, 2] -= 0.5 * (np.abs(coefficients[:, 0]) + np.abs(coefficients[:, 1]))
+
+    x0 = np.clip(np.floor(x.min(axis=1)), 0, width).astype(np.int64)
+    x1 = np.clip(np.ceil(x.max(axis=1)), 0, width).astype(np.int64)
+    y0 = np.clip(np.floor(y.min(axis=1)), 0, height).astype(np.int64)
+    y1 = np.clip(np.ceil(y.max(axis=1)), 0, height).astype(np.int64)
+    spans = x1 - x0
+    counts = spans * (y1 - y0) * (np.abs(area) > 1e-9)
+    ends = np.cumsum(counts)
+
+    # 按像素数分块, 每块内四边形展开为像素列表
+    start_quad = 0
+    while start_quad < len(counts):
+        base = ends[start_quad - 1] if start_quad else 0
+        end_quad = max(start_quad + 1, int(np.searchsorted(ends, base + CHUNK_PIXELS, side='right')))
+        quads = np.arange(start_quad, end_quad)
+        chunk_counts = counts[quads]
+        start_quad = end_quad
+        total = int(chunk_counts.sum())
+        if total == 0:
+            continue
+        owner = np.repeat(quads, chunk_counts)
+        local = np.arange(total) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        px = x0[owner] + local % spans[owner]
+        py = y0[owner] + local // spans[owner]
+        cx = px + 0.5
+        cy = py + 0.5
+
+        inside = np.all(edge_a[owner] * cx[:, np.newaxis] + edge_b[owner] * cy[:, np.newaxis]
+                        + edge_c[owner] >= 0, axis=1)
+        coefficient = coefficients[owner]
+        w = coefficient[:, 0] * cx + coefficient[:, 1] * cy + coefficient[:, 2]
+        inside &= w > 0
+        values = (plane_k[owner][inside] / w[inside]).astype(np.float32)
+        np.minimum.at(depth, (py * width + px)[inside], values)
+        stats['pixels'] += int(inside.sum())
+    return depth.reshape(height, width), stats
+
+def _reduce(level: np.ndarray, function) -> np.ndarray:
+    """按2×2取min或max, 奇数尺寸用inf补齐"""
+    height, width = level.shape
+    padded = np.pad(level, ((0, height % 2), (0, width % 2)), constant_values=np.inf)
+    return function(padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2), axis=(1, 3))
+
+class DepthPyramid:
+    """深度缓冲的min/max层级, 第0级为原始分辨率"""
+
+    def __init__(self, depth: np.ndarray):
+        self.width = depth.shape[1]
+        self.height = depth.shape[0]
+        self.min_levels: List[np.ndarray] = [depth]
+        self.max_levels: List[np.ndarray] = [depth]
+        while self.max_levels[-1].shape[0] > 1 or self.max_levels[-1].shape[1] > 1:
+            self.min_levels.append(_reduce(self.min_levels[-1], np.min))
+            self.max_levels.append(_reduce(self.max_levels[-1], np.max))
+
+    def _region(self, levels: List[np.ndarray], level: np.ndarray, x0: np.ndarray, x1: np.ndarray,
+                y0: np.ndarray, y1: np.ndarray, function) -> np.ndarray:
+        """在各自层级上取矩形覆盖的(至多2×2个)texel的min或max"""
+        result = np.empty(len(level), dtype=np.float32)
+        for index in np.unique(level).tolist():
+            rows = np.flatnonzero(level == index)
+            texels = levels[index]
+            ax, bx = x0[rows] >> index, x1[rows] >> index
+            ay, by = y0[rows] >> index, y1[rows] >> index
+            result[rows] = function(np.stack([texels[ay, ax], texels[ay, bx],
+                                              texels[by, ax], texels[by, bx]]), axis=0)
+        return result
+
+    def test_boxes(self, camera: Camera, lower: np.ndarray, upper: np.ndarray) -> Dict:
+        """
+        测试AABB是否被遮挡
+
+        参数:
+            camera: 画深度缓冲时的相机
+            lower, upper: (物件数, 3)的包围盒
+
+        返回:
+            Dict: occluded(被遮挡的布尔数组)和min金字塔快速确认可见的数量
+        """
+        count = len(lower)
+        occluded = np.zeros(count, dtype=bool)
+        if count == 0:
+            return {'occluded': occluded, 'early_visible': 0}
+        projection = _Projection(camera, self.width, self.height)
+        lower = np.asarray(lower, dtype=np.float32)
+        upper = np.asarray(upper, dtype=np.float32)
+        half = (upper - lower) * 0.5
+        center = projection.to_view(lower + half).astype(np.float32)
+        # 最近深度: 中心深度减去半尺寸在视线方向上的投影, 无需展开角点
+        nearest = center[:, 2] - half @ np.abs(projection.rotation[2]).astype(np.float32)
+        testable = nearest >= camera.near
+        # 角点 = 中心 ± 各轴半尺寸旋转到相机空间; 按(8, N)布局, 对角点的归约逐元素进行
+        signs = (_CORNER_BITS * 2 - 1).astype(np.float32)
+        rotation = projection.rotation.astype(np.float32)
+        center, half = center[testable].T, half[testable]
+        x, y = projection.project(*(center[axis] + signs @ (half * rotation[axis]).T
+                                    for axis in range(3)))
+        x_min, x_max = x.min(axis=0), x.max(axis=0)
+        y_min, y_max = y.min(axis=0), y.max(axis=0)
+        on_screen = (x_max > 0) & (x_min < self.width) & (y_max > 0) & (y_min < self.height)
+        rows = np.flatnonzero(testable)[on_screen]
+        x_min, x_max, y_min, y_max = x_min[on_screen], x_max[on_screen], y_min[on_screen], y_max[on_screen]
+
+        x0 = np.clip(np.floor(x_min), 0, self.width - 1).astype(np.int64)
+        x1 = np.clip(np.ceil(x_max) - 1, x0, self.width - 1).astype(np.int64)
+        y0 = np.clip(np.floor(y_min), 0, self.height - 1).astype(np.int64)
+        y1 = np.clip(np.ceil(y_max) - 1, y0, self.height - 1).astype(np.int64)
+        # 选择矩形在两个方向上都只跨越至多2个texel的最低层级
+        level = np.full(len(rows), len(self.max_levels) - 1, dtype=np.int64)
+        for index in range(len(self.max_levels) - 1, -1, -1):
+            fits = ((x1 >> index) - (x0 >> index) <= 1) & ((y1 >> index) - (y0 >> index) <= 1)
+            level[fits] = index
+
+        nearest = nearest[rows]
+        early_visible = nearest < self._region(self.min_levels, level, x0, x1, y0, y1, np.min)
+        farthest = self._region(self.max_levels, level, x0, x1, y0, y1, np.max)
+        occluded[rows] = ~early_visible & (nearest > farthest)
+        return {'occluded': occluded, 'early_visible': int(early_visible.sum())}
@@ -14,8 +14,13 @@ Performance Profiler Manager
    - 性能分析
 
 2. 分析流程:
-   - 自动扫描项目
+   - 自动扫描项目(单次遍历, 共享资源索引)
    - 批量分析处理
+   - 多进程分片分析(可选)
+   - 增量分析, 复用未变化文件的缓存结果(可选)
+   - 场景只读取一次, 列式数据由实例化、遮挡和材质分析共享
+   - 场景解析结果写入 .scenecache 二进制缓存, 场景未变化时直接映射
+   - 可选的重复模型检测(需要加载完整网格, 默认关闭)
    - 生成综合报告
    - 可视化展示
 
@@ -26,15 +31,17 @@ Performance Profiler Manager
    - 优化验证
 
 4. 使用方法:
-   python profiler_manager.py [project_path]
+   python profiler_manager.py [project_path] [thread|process] [cache_db_path] [--find-duplicates]
 """
 
 import os
+import sys
 import json
 import time
+import threading
 from typing import Dict, List
 import matplotlib.pyplot as plt
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # 导入所有分析器
 from material_analyzer import MaterialAnalyzer
@@ -44,36 +51,129 @@ from instance_analyzer import InstanceAnalyzer
 from occlusion_analyzer import OcclusionAnalyzer
 from mesh_analyzer import MeshAnalyzer
 from performance_analyzer import PerformanceAnalyzer
+from asset_index import AssetIndex
+from result_cache import ResultCache
+from scene_store import SceneStore
+
+ANALYZER_CLASSES = {
+    'material': MaterialAnalyzer,
+    'texture': TextureAnalyzer,
+    'shader': ShaderAnalyzer,
+    'instance': InstanceAnalyzer,
+    'occlusion': OcclusionAnalyzer,
+    'mesh': MeshAnalyzer,
+    'performance': PerformanceAnalyzer
+}
+
+# 按文件逐个分析、可以分片到多个进程的分析器
+FILE_ANALYZERS = ('material', 'texture', 'shader', 'mesh')
+
+# 实例化/遮挡分析读取的场景文件
+SCENE_EXTENSIONS = ('.json',)
+
+# 每个工作进程分到的分片数, 多分几片便于负载均衡
+SHARDS_PER_WORKER = 4
+
+def _analyze_shard(name: str, entries: list, cache_path: str = None):
+    """在工作进程中分析一个文件分片, 返回带部分结果的分析器"""
+    analyzer = ANALYZER_CLASSES[name]()
+    if cache_path:
+        analyzer.cache = ResultCache(cache_path)
+        analyzer.cache.prime(entries)
+    analyzer.analyze_files([entry.path for entry in entries])
+    if analyzer.cache:
+        analyzer.cache.close()
+    return analyzer
 
 class ProfilerManager:
-    def __init__(self):
+    def __init__(self, executor_mode: str = 'thread', max_workers: int = None,
+                 cache_path: str = None, find_duplicate_meshes: bool = False,
+                 find_duplicate_textures: bool = False):
+        """
+        参数:
+            executor_mode: 'thread' 各分析器在线程池中并行;
+                           'process' 文件型分析器按文件分片到进程池, 绕开GIL
+            max_workers: 工作进程/线程数, 默认为CPU核数
+            cache_path: 结果缓存数据库路径, 为空时不启用增量分析
+            find_duplicate_meshes: 是否查找重复几何的模型(需要加载每个模型的完整网格)
+            find_duplicate_textures: 是否按感知哈希查找近似重复的贴图(需要解码每张贴图)
+        """
+        if executor_mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor mode: {executor_mode}")
+        self.executor_mode = executor_mode
+        self.max_workers = max_workers
+        self.cache_path = cache_path
+        self.find_duplicate_meshes = find_duplicate_meshes
+        self.find_duplicate_textures = find_duplicate_textures
         self.analyzers = {}
         self.reports = {}
         self.optimization_suggestions = []
         self.project_path = ""
+        self.asset_index = None
+        self.scene_stores = {}  # 场景路径 -> SceneStore, 加载失败时为None
+        self._scene_lock = threading.Lock()
         
     def initialize_analyzers(self):
         """初始化所有分析器"""
         self.analyzers = {
-            'material': MaterialAnalyzer(),
-            'texture': TextureAnalyzer(),
-            'shader': ShaderAnalyzer(),
-            'instance': InstanceAnalyzer(),
-            'occlusion': OcclusionAnalyzer(),
-            'mesh': MeshAnalyzer(),
-            'performance': PerformanceAnalyzer()
+            name: analyzer_class()
+            for name, analyzer_class in ANALYZER_CLASSES.items()
         }
         
     def analyze_project(self, project_path: str):
         """分析整个项目"""
         self.project_path = project_path
-        print(f"Starting project analysis: {project_path}")
+        print(f"Starting project analysis: {project_path} ({self.executor_mode} mode)")
         
         # 初始化分析器
         self.initialize_analyzers()
+        self.scene_stores = {}
+        
+        # 单次遍历项目, 所有文件型分析器共享索引
+        start_time = time.time()
+        self.asset_index = AssetIndex(project_path).build()
+        print(f"Indexed {self.asset_index.file_count} files in "
+              f"{self.asset_index.dir_count} directories ({time.time() - start_time:.2f}s)")
         
-        # 并行执行分析
-        with ThreadPoolExecutor() as executor:
+        # 每个文件型分析器使用独立的缓存连接
+        if self.cache_path:
+            for name in FILE_ANALYZERS:
+                self.analyzers[name].cache = ResultCache(self.cache_path)
+                
+        if self.executor_mode == 'process':
+            self._analyze_with_processes()
+        else:
+            self._analyze_with_threads()
+            
+        # 依赖多个分析器结果的分析
+        self._analyze_atlas_potential()
+        if self.find_duplicate_meshes:
+            self._analyze_mesh_duplicates()
+        if self.find_duplicate_textures:
+            self._analyze_texture_duplicates()
+        self._analyze_scene_materials()
+            
+        if self.cache_path:
+            for name in FILE_ANALYZERS:
+                self.analyzers[name].cache.close()
+            summary = self.get_cache_summary()
+            print(f"Result cache: {summary['hits']} hits, {summary['misses']} misses "
+                  f"({summary['hit_rate']:.1%})")
+                  
+    def get_cache_summary(self) -> Dict:
+        """汇总各分析器的缓存命中情况"""
+        hits = sum(self.analyzers[name].cache.hits for name in FILE_ANALYZERS)
+        misses = sum(self.analyzers[name].cache.misses for name in FILE_ANALYZERS)
+        return {
+            'path': self.cache_path,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+        }
+        
+    def _analyze_with_threads(self):
+        """线程模式: 各分析器在线程池中并行执行"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = {
                 name: executor.submit(self._run_analyzer, name, analyzer)
                 for name, analyzer in self.analyzers.items()
@@ -86,33 +186,189 @@ class ProfilerManager:
                 except Exception as e:
                     print(f"Error in {name} analyzer: {e}")
                     
+    def _analyze_with_processes(self):
+        """多进程模式: 文件型分析器按文件分片到进程池, 再合并回主进程的分析器"""
+        workers = self.max_workers or os.cpu_count() or 1
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 提交所有分片
+            shard_futures = {}
+            for name in FILE_ANALYZERS:
+                entries = self._get_asset_entries(name)
+                print(f"Running {name} analyzer on {len(entries)} files...")
+                shard_futures[name] = [
+                    pool.submit(_analyze_shard, name, shard, self.cache_path)
+                    for shard in self._split_shards(entries, workers * SHARDS_PER_WORKER)
+                ]
+                
+            # 其余分析器在主进程中与分片并行执行
+            with ThreadPoolExecutor() as executor:
+                futures = {
+                    name: executor.submit(self._run_analyzer, name, analyzer)
+                    for name, analyzer in self.analyzers.items()
+                    if name not in FILE_ANALYZERS
+                }
+                
+                # 按提交顺序合并分片结果, 保持与单进程扫描相同的顺序
+                for name, shards in shard_futures.items():
+                    analyzer = self.analyzers[name]
+                    try:
+                        for future in shards:
+                            partial = future.result()
+                            analyzer.merge(partial)
+                            if analyzer.cache and partial.cache:
+                                analyzer.cache.absorb_counters(partial.cache)
+                        self.reports[name] = self._finish_analyzer(name, analyzer)
+                    except Exception as e:
+                        print(f"Error in {name} analyzer: {e}")
+                        
+                for name, future in futures.items():
+                    try:
+                        self.reports[name] = future.result()
+                    except Exception as e:
+                        print(f"Error in {name} analyzer: {e}")
+                        
+    def _analyze_atlas_potential(self):
+        """用贴图分析得到的尺寸模拟材质合批组的图集打包"""
+        if 'material' not in self.reports or 'texture' not in self.reports:
+            return
+        material_analyzer = self.analyzers['material']
+        try:
+            material_analyzer.analyze_atlas_potential(self.analyzers['texture'].textures)
+            self.reports['material'] = material_analyzer.generate_report(
+                "material_analysis_report.json"
+            )
+        except Exception as e:
+            print(f"Error in atlas simulation: {e}")
+            
+    def _analyze_mesh_duplicates(self):
+        """查找重复几何的模型, 并把引用它们的物件合并到同一实例化分组"""
+        if 'mesh' not in self.reports:
+            return
+        mesh_analyzer = self.analyzers['mesh']
+        try:
+            mesh_analyzer.find_duplicates()
+            self.reports['mesh'] = mesh_analyzer.generate_report("mesh_analysis_report.json")
+            if 'instance' in self.reports:
+                instance_analyzer = self.analyzers['instance']
+                instance_analyzer.merge_equivalent_meshes(mesh_analyzer.get_mesh_aliases())
+                instance_analyzer.analyze_instance_potential()
+                self.reports['instance'] = instance_analyzer.generate_report(
+                    "instance_analysis_report.json"
+                )
+        except Exception as e:
+            print(f"Error in mesh deduplication: {e}")
+            
+    def _analyze_texture_duplicates(self):
+        """按感知哈希查找近似重复的贴图"""
+        if 'texture' not in self.reports:
+            return
+        texture_analyzer = self.analyzers['texture']
+        try:
+            texture_analyzer.find_duplicates()
+            self.reports['texture'] = texture_analyzer.generate_report(
+                "texture_analysis_report.json"
+            )
+        except Exception as e:
+            print(f"Error in texture deduplication: {e}")
+            
+    def _analyze_scene_materials(self):
+        """用共享的场景数据统计各材质被物件引用的次数"""
+        stores = [store for store in self.scene_stores.values()
+                  if store is not None and store.count > 0]
+        if 'material' not in self.reports or not stores:
+            return
+        material_analyzer = self.analyzers['material']
+        try:
+            for store in stores:
+                material_analyzer.analyze_scene_usage(store)
+            self.reports['material'] = material_analyzer.generate_report(
+                "material_analysis_report.json"
+            )
+        except Exception as e:
+            print(f"Error in scene material usage: {e}")
+            
+    def _get_scene_store(self, scene_path: str):
+        """加载场景的列式数据, 同一场景只读取一次, 供各分析器共享"""
+        with self._scene_lock:
+            if scene_path not in self.scene_stores:
+                try:
+                    self.scene_stores[scene_path] = SceneStore.load(scene_path)
+                except Exception as e:
+                    print(f"Error loading scene {scene_path}: {e}")
+                    self.scene_stores[scene_path] = None
+            return self.scene_stores[scene_path]
+            
+    def _get_scene_stores(self, root: str) -> List[SceneStore]:
+        """加载目录下所有场景文件, 跳过加载失败和没有物件的JSON文件"""
+        stores = []
+        for entry in self.asset_index.select(SCENE_EXTENSIONS, root=root):
+            store = self._get_scene_store(entry.path)
+            if store is not None and store.count > 0:
+                stores.append(store)
+        return stores
+            
+    def _split_shards(self, entries: list, shard_count: int) -> List[list]:
+        """把文件列表切成连续的分片"""
+        if not entries:
+            return []
+        shard_size = -(-len(entries) // max(1, shard_count))
+        return [entries[i:i + shard_size] for i in range(0, len(entries), shard_size)]
+        
+    def _get_analysis_path(self, name: str) -> str:
+        """获取分析器的扫描路径, 优先使用项目下同名子目录"""
+        analysis_path = os.path.join(self.project_path, name)
+        if not os.path.exists(analysis_path):
+            analysis_path = self.project_path
+        return analysis_path
+        
+    def _get_asset_entries(self, name: str) -> list:
+        """从共享资源索引中取出分析器负责的文件切片"""
+        analyzer_class = ANALYZER_CLASSES[name]
+        return self.asset_index.select(
+            analyzer_class.FILE_EXTENSIONS,
+            root=self._get_analysis_path(name)
+        )
+        
     def _run_analyzer(self, name: str, analyzer) -> dict:
         """运行单个分析器"""
         print(f"Running {name} analyzer...")
         
         # 设置分析路径
-        analysis_path = os.path.join(self.project_path, name)
-        if not os.path.exists(analysis_path):
-            analysis_path = self.project_path
+        analysis_path = self._get_analysis_path(name)
             
-        # 执行分析
-        if name == 'material':
+        # 执行扫描, 文件型分析器直接使用共享索引中的切片
+        if name in FILE_ANALYZERS and self.asset_index is not None:
+            entries = self._get_asset_entries(name)
+            if analyzer.cache:
+                analyzer.cache.prime(entries)
+            analyzer.analyze_files([entry.path for entry in entries])
+        elif name == 'material':
             analyzer.scan_scene(analysis_path)
-            analyzer.analyze_materials()
         elif name == 'texture':
             analyzer.scan_textures(analysis_path)
-            analyzer.analyze_optimization_potential()
         elif name == 'shader':
             analyzer.scan_shaders(analysis_path)
+        elif name in ('instance', 'occlusion'):
+            analyzer.use_scenes(self._get_scene_stores(analysis_path))
+        elif name == 'mesh':
+            analyzer.scan_models(analysis_path)
+            
+        return self._finish_analyzer(name, analyzer)
+        
+    def _finish_analyzer(self, name: str, analyzer) -> dict:
+        """扫描完成后执行分析并生成报告"""
+        if name == 'material':
+            analyzer.analyze_batching_potential()
+        elif name == 'texture':
+            analyzer.analyze_optimization_potential()
+        elif name == 'shader':
             analyzer.analyze_variants()
         elif name == 'instance':
-            analyzer.scan_scene(analysis_path)
             analyzer.analyze_instance_potential()
         elif name == 'occlusion':
-            analyzer.scan_scene(analysis_path)
-            analyzer.analyze_occlusion([])  # 需要提供相机位置
+            analyzer.analyze_occlusion()  # 在场景周围生成默认相机
         elif name == 'mesh':
-            analyzer.scan_models(analysis_path)
             analyzer.analyze_optimization_potential()
         elif name == 'performance':
             analyzer.simulate_workload()
@@ -277,10 +533,17 @@ class ProfilerManager:
 
 def main():
     """主函数"""
-    profiler = ProfilerManager()
+    # --find-duplicates可出现在任意位置, 同时启用模型和贴图的重复检测
+    find_duplicates = '--find-duplicates' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--find-duplicates']
+    executor_mode = args[1] if len(args) > 1 else 'thread'
+    cache_path = args[2] if len(args) > 2 else None
+    profiler = ProfilerManager(executor_mode=executor_mode, cache_path=cache_path,
+                               find_duplicate_meshes=find_duplicates,
+                               find_duplicate_textures=find_duplicates)
     
     # 分析项目
-    project_path = "path/to/your/project"
+    project_path = args[0] if args else "path/to/your/project"
     profiler.analyze_project(project_path)
     
     # 生成综合报告
@@ -0,0 +1,156 @@
+"""
+Persistent Analysis Result Cache
+-------------------------------
+
+这个工具用于持久化各分析器的单文件分析结果，主要功能：
+
+1. 缓存功能:
+   - SQLite存储单文件分析记录
+   - 以(类型, 路径)为键, 大小+修改时间校验
+   - 文件变化后自动失效
+
+2. 优化目标:
+   - 增量分析, 只重新解析变化的文件
+   - 支持多进程共享同一个缓存库
+
+3. 使用方法:
+   cache = ResultCache("profiler_cache.db")
+   analyzer.cache = cache
+   ...
+   cache.flush()
+"""
+
+import os
+import pickle
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+class ResultCache:
+    SCHEMA_VERSION = 1
+    COMMIT_INTERVAL = 500  # 每写入多少条记录提交一次
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pending = 0
+        self._stats = {}  # 预先得到的文件状态: path -> (size, mtime)
+
+    def __getstate__(self):
+        """跨进程传递时不携带数据库连接和预取的文件状态"""
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pending'] = 0
+        state['_stats'] = {}
+        return state
+
+    def _connect(self) -> sqlite3.Connection:
+        """延迟打开数据库连接"""
+        if self._conn is None:
+            # 同一时刻只由一个线程使用, 但打开和关闭可能在不同线程
+            self._conn = sqlite3.connect(self.db_path, timeout=60, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)'
+            )
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+            if row is None or int(row[0]) != self.SCHEMA_VERSION:
+                self._conn.execute('DROP TABLE IF EXISTS records')
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)",
+                    (str(self.SCHEMA_VERSION),)
+                )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS records ('
+                'kind TEXT NOT NULL, path TEXT NOT NULL, '
+                'size INTEGER NOT NULL, mtime INTEGER NOT NULL, data BLOB NOT NULL, '
+                'PRIMARY KEY (kind, path))'
+            )
+            self._conn.commit()
+        return self._conn
+
+    def prime(self, entries):
+        """
+        预先提供文件状态, 避免重复stat
+
+        参数:
+            entries: AssetEntry列表(path, size, mtime)
+        """
+        for entry in entries:
+            self._stats[entry.path] = (entry.size, entry.mtime)
+
+    def _file_stat(self, path: str) -> Tuple[int, int]:
+        """获取文件大小和纳秒修改时间"""
+        stat = self._stats.get(path)
+        if stat is None:
+            st = os.stat(path)
+            stat = (st.st_size, st.st_mtime_ns)
+            self._stats[path] = stat
+        return stat
+
+    def get(self, kind: str, path: str) -> Optional[object]:
+        """
+        读取缓存记录
+
+        参数:
+            kind: 记录类型(含版本号), 如'texture/v1'
+            path: 源文件路径
+
+        返回:
+            缓存的记录, 文件已变化或不存在时返回None
+        """
+        size, mtime = self._file_stat(path)
+        row = self._connect().execute(
+            'SELECT size, mtime, data FROM records WHERE kind = ? AND path = ?',
+            (kind, path)
+        ).fetchone()
+
+        if row is not None and row[0] == size and row[1] == mtime:
+            self.hits += 1
+            return pickle.loads(row[2])
+
+        self.misses += 1
+        return None
+
+    def put(self, kind: str, path: str, record: object):
+        """写入缓存记录"""
+        size, mtime = self._file_stat(path)
+        self._connect().execute(
+            'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)',
+            (kind, path, size, mtime, pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+        )
+        self._pending += 1
+        if self._pending >= self.COMMIT_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """提交未写入的记录"""
+        if self._conn is not None and self._pending:
+            self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        """提交并关闭数据库连接"""
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def absorb_counters(self, other: 'ResultCache'):
+        """累加另一个缓存实例(通常来自工作进程)的命中统计"""
+        self.hits += other.hits
+        self.misses += other.misses
+
+    def summary(self) -> Dict:
+        """缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            'path': self.db_path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
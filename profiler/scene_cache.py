@@ -0,0 +1,127 @@
+"""
+Binary Scene Cache
+-----------------
+
+这个工具用于缓存场景JSON解析后的列式数据，主要功能：
+
+1. 文件格式(与场景文件同目录的 .scenecache 附属文件):
+   - 固定前缀: 魔数、格式版本、头部长度
+   - JSON头部: 源文件大小和修改时间、各列的dtype/形状/偏移、
+     Mesh/材质等类别字典
+   - 列数据块: 按64字节对齐依次存放
+
+2. 加载:
+   - 校验魔数、版本和源文件的大小+修改时间, 不一致时视为失效
+   - 各列用np.memmap只读映射, 不复制数据, 打开耗时与物件数无关
+
+3. 写入:
+   - 先写临时文件再原子替换, 并发运行时不会读到写了一半的缓存
+
+4. 使用方法:
+   arrays, meta = read_scene_cache(scene_path)  # 失效时返回None
+   write_scene_cache(scene_path, arrays, meta, source_stat)
+"""
+
+import json
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'SCNC'
+FORMAT_VERSION = 1  # 文件布局或列含义变化时递增
+CACHE_SUFFIX = '.scenecache'
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<4sIQ')  # 魔数, 格式版本, JSON头部长度
+
+def cache_path(scene_path: str) -> str:
+    """场景文件对应的缓存文件路径"""
+    return scene_path + CACHE_SUFFIX
+
+def source_stat(scene_path: str) -> Tuple[int, int]:
+    """源文件的(大小, 修改时间纳秒), 用于判断缓存是否失效"""
+    st = os.stat(scene_path)
+    return st.st_size, st.st_mtime_ns
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_scene_cache(scene_path: str, arrays: Dict[str, np.ndarray], meta: Dict,
+                      stat: Tuple[int, int]) -> str:
+    """
+    写入场景缓存
+
+    参数:
+        scene_path: 场景JSON文件路径
+        arrays: 列名 -> 列数组(第一维为物件数)
+        meta: 可JSON序列化的附加信息(类别字典等)
+        stat: 解析前取得的源文件状态, 解析期间文件被修改时缓存在下次自然失效
+
+    返回:
+        str: 缓存文件路径
+    """
+    columns = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        columns[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({
+        'source_size': stat[0],
+        'source_mtime': stat[1],
+        'columns': columns,
+        'meta': meta
+    }).encode('utf-8')
+    data_start = _aligned(_PREFIX.size + len(header))
+
+    path = cache_path(scene_path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + columns[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + _aligned(offset))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+def read_scene_cache(scene_path: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+    """
+    读取场景缓存
+
+    返回:
+        (列名 -> 只读memmap数组, 附加信息); 缓存不存在、格式不符或源文件已变化时返回None
+    """
+    path = cache_path(scene_path)
+    try:
+        with open(path, 'rb') as f:
+            magic, version, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return None
+            header = json.loads(f.read(header_size).decode('utf-8'))
+        if (header['source_size'], header['source_mtime']) != source_stat(scene_path):
+            return None
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    data_start = _aligned(_PREFIX.size + header_size)
+    arrays = {}
+    try:
+        for name, column in header['columns'].items():
+            shape = tuple(column['shape'])
+            if shape[0] == 0:
+                # 长度为0的数组无法映射
+                arrays[name] = np.zeros(shape, dtype=column['dtype'])
+            else:
+                arrays[name] = np.memmap(path, dtype=column['dtype'], mode='r',
+                                         offset=data_start + column['offset'], shape=shape)
+    except (OSError, ValueError, TypeError):
+        # 文件被截断等情况
+        return None
+    return arrays, header['meta']
@@ -0,0 +1,246 @@
+"""
+Columnar Scene Store
+-------------------
+
+这个工具用于在多个分析器之间共享场景物件数据，主要功能：
+
+1. 列式存储:
+   - 位置、旋转、缩放和包围盒为float32数组, 每个物件约90字节
+   - Mesh引用、Mesh分组键和材质为int32编码列, 附带类别字典
+   - 一次流式读取后由实例化、遮挡和材质分析共用
+   - 首次解析后写入二进制缓存, 之后用np.memmap直接映射(见scene_cache)
+
+2. 索引视图:
+   - 分析器持有行号数组(SceneView), 不复制物件数据
+   - 按编码列分组用np.unique完成
+
+3. 使用方法:
+   store = SceneStore.load(scene_path)
+   groups = store.group_by(store.mesh_keys)
+   large = store.view().select(store.volumes > 1000)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mesh_identity import MeshIdentity, mesh_reference
+from scene_cache import read_scene_cache, source_stat, write_scene_cache
+from scene_stream import Categories, SceneColumns, read_scene_columns
+
+def material_reference(obj: Dict) -> Optional[str]:
+    """物件引用的材质名称, material可以是名称或带name/id的dict"""
+    material = obj.get('material', obj.get('material_name'))
+    if isinstance(material, dict):
+        material = material.get('name', material.get('id'))
+    return None if material is None else str(material)
+
+def _drop_missing(categories: Categories, codes: np.ndarray) -> tuple:
+    """去掉类别字典中的None, 对应的编码改为-1"""
+    present = np.array([value is not None for value in categories.values], dtype=bool)
+    if present.all():
+        return categories.values, codes
+    remap = np.where(present, np.cumsum(present) - 1, -1).astype(np.int32)
+    values = [value for value in categories.values if value is not None]
+    return values, remap[codes]
+
+def group_rows(codes: np.ndarray, rows: np.ndarray) -> Dict[int, np.ndarray]:
+    """按编码把行号分组, 组内保持原有顺序"""
+    values, inverse = np.unique(codes[rows], return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    splits = np.cumsum(np.bincount(inverse, minlength=len(values)))[:-1]
+    return dict(zip(values.tolist(), np.split(rows[order], splits)))
+
+class SceneStore:
+    """场景物件的结构化数组, 第i行对应场景中的第i个物件"""
+
+    COLUMNS = ('ids', 'positions', 'rotations', 'scales', 'bounds_min', 'bounds_max',
+               'is_static', 'mesh_ids', 'mesh_keys', 'material_ids')
+
+    def __init__(self, arrays: Dict[str, np.ndarray], mesh_names: List, mesh_key_values: List,
+                 material_names: List, id_labels: Optional[Dict] = None, rotation_size: int = 0,
+                 mesh_identity: Optional[MeshIdentity] = None):
+        """
+        参数:
+            arrays: COLUMNS中各列的数组, 可以是只读的memmap
+            mesh_names: mesh_ids的类别字典
+            mesh_key_values: mesh_keys的类别字典
+            material_names: material_ids的类别字典
+            id_labels: 行号 -> 非整数的物件ID
+            rotation_size: 旋转的实际分量数
+        """
+        for name in self.COLUMNS:
+            setattr(self, name, arrays[name])
+        self.count = len(self.ids)
+        self.mesh_names = mesh_names
+        self.mesh_key_values = mesh_key_values
+        self.material_names = material_names
+        self.id_labels = id_labels or {}
+        self.rotation_size = rotation_size
+        self.mesh_identity = mesh_identity or MeshIdentity()
+        self.path = None  # 由load读取时为场景文件路径
+        self.from_cache = False
+
+    @classmethod
+    def from_columns(cls, columns: SceneColumns,
+                     mesh_identity: Optional[MeshIdentity] = None) -> 'SceneStore':
+        """由流式读取得到的列构建"""
+        half = columns.sizes / 2
+        material_names, material_ids = _drop_missing(
+            columns.categories['material'], columns.category_ids['material'])
+        arrays = {
+            'ids': columns.ids,
+            'positions': columns.positions,
+            'rotations': columns.rotations,
+            'scales': columns.scales,
+            'bounds_min': columns.positions - half,
+            'bounds_max': columns.positions + half,
+            'is_static': columns.is_static,
+            'mesh_ids': columns.mesh_ids,
+            'mesh_keys': columns.category_ids['mesh_key'],
+            'material_ids': material_ids
+        }
+        return cls(arrays, columns.mesh_names, columns.categories['mesh_key'].values,
+                   material_names, columns.id_labels, columns.rotation_size, mesh_identity)
+
+    @classmethod
+    def load(cls, scene_path: str, mesh_identity: Optional[MeshIdentity] = None,
+             use_cache: bool = True) -> 'SceneStore':
+        """
+        读取场景文件, 优先使用未失效的二进制缓存
+
+        参数:
+            scene_path: 场景JSON文件路径
+            mesh_identity: 计算Mesh分组键的MeshIdentity, 为空时新建
+            use_cache: 是否读写场景旁的 .scenecache 缓存
+
+        返回:
+            SceneStore: 场景物件的列式数据
+        """
+        if use_cache:
+            cached = read_scene_cache(scene_path)
+            if cached is not None:
+                arrays, meta = cached
+                store = cls(arrays, meta['mesh_names'], meta['mesh_key_values'],
+                            meta['material_names'], dict(meta['id_labels']),
+                            meta['rotation_size'], mesh_identity)
+                store.path = scene_path
+                store.from_cache = True
+                return store
+
+        stat = source_stat(scene_path)
+        mesh_identity = mesh_identity or MeshIdentity()
+        columns = read_scene_columns(scene_path, {
+            # 物件的mesh数据在读取时哈希, 之后即丢弃
+            'mesh_key': lambda obj: mesh_identity.key(
+                obj.get('mesh', {}), mesh_reference(obj), remember=False),
+            'material': material_reference
+        })
+        store = cls.from_columns(columns, mesh_identity)
+        store.path = scene_path
+        if use_cache:
+            try:
+                store.save_cache(scene_path, stat)
+            except (OSError, TypeError, ValueError) as e:
+                # 场景目录只读或类别值无法序列化时只是不缓存
+                print(f"Warning: could not write scene cache for {scene_path}: {e}")
+        return store
+
+    def save_cache(self, scene_path: str, stat: Tuple[int, int]) -> str:
+        """把列数据写入场景旁的二进制缓存"""
+        return write_scene_cache(scene_path, {name: getattr(self, name) for name in self.COLUMNS}, {
+            'mesh_names': self.mesh_names,
+            'mesh_key_values': self.mesh_key_values,
+            'material_names': self.material_names,
+            'id_labels': sorted(self.id_labels.items()),
+            'rotation_size': self.rotation_size
+        }, stat)
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return np.prod(self.bounds_max - self.bounds_min, axis=1)
+
+    @property
+    def nbytes(self) -> int:
+        """列数组占用的字节数"""
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def view(self, rows: Optional[np.ndarray] = None) -> 'SceneView':
+        """行号视图, rows为空时包含所有物件"""
+        return SceneView(self, np.arange(self.count) if rows is None else rows)
+
+    def group_by(self, codes: np.ndarray, rows: Optional[np.ndarray] = None) -> Dict[int, 'SceneView']:
+        """
+        按编码列分组
+
+        参数:
+            codes: mesh_keys、mesh_ids或material_ids等编码列
+            rows: 参与分组的行号, 为空时为所有物件
+
+        返回:
+            Dict: 编码 -> 该组物件的视图
+        """
+        rows = np.arange(self.count) if rows is None else np.asarray(rows)
+        return {code: SceneView(self, group) for code, group in group_rows(codes, rows).items()}
+
+    def object_id(self, row: int):
+        label = self.id_labels.get(row)
+        return label if label is not None else int(self.ids[row])
+
+    def mesh_name(self, row: int) -> Optional[str]:
+        code = self.mesh_ids[row]
+        return self.mesh_names[code] if code >= 0 else None
+
+    def transforms(self, rows: np.ndarray) -> List[Dict]:
+        """一组物件的变换数据, 旋转保持场景中的分量数"""
+        rotations = (self.rotations[rows, :self.rotation_size].tolist()
+                     if self.rotation_size else [None] * len(rows))
+        return [
+            {'position': position, 'rotation': rotation, 'scale': scale}
+            for position, rotation, scale in zip(
+                self.positions[rows].tolist(), rotations, self.scales[rows].tolist())
+        ]
+
+    def bounds(self, row: int) -> Dict:
+        return {'min': self.bounds_min[row].tolist(), 'max': self.bounds_max[row].tolist()}
+
+class SceneView:
+    """场景中一组物件的行号视图, 列数据按需从SceneStore中取出"""
+
+    def __init__(self, store: SceneStore, rows: np.ndarray):
+        self.store = store
+        self.rows = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def select(self, mask: np.ndarray) -> 'SceneView':
+        """
+        取子集
+
+        参数:
+            mask: 与视图等长或与整个场景等长的布尔数组
+        """
+        if len(mask) != len(self.rows):
+            mask = mask[self.rows]
+        return SceneView(self.store, self.rows[mask])
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.store.positions[self.rows]
+
+    @property
+    def bounds_min(self) -> np.ndarray:
+        return self.store.bounds_min[self.rows]
+
+    @property
+    def bounds_max(self) -> np.ndarray:
+        return self.store.bounds_max[self.rows]
+
+    @property
+    def mesh_ids(self) -> np.ndarray:
+        return self.store.mesh_ids[self.rows]
+
+    @property
+    def material_ids(self) -> np.ndarray:
+        return self.store.material_ids[self.rows]
@@ -0,0 +1,273 @@
+"""
+Streaming Scene Reader
+---------------------
+
+这个工具用于增量读取大型场景JSON，主要功能：
+
+1. 流式解析:
+   - 按块读取文件, 只在顶层定位"objects"数组
+   - 用json.JSONDecoder.raw_decode逐个解码数组元素, 解码后立即丢弃
+   - 其他顶层字段逐个解码后跳过
+   - 内存与读缓冲区和单个物件成正比, 不构建整个JSON树
+
+2. 列式输出:
+   - 位置、旋转、缩放、尺寸按批写入预分配的float32列, 容量不足时倍增
+   - 物件ID写入int64列(非整数ID另存)
+   - Mesh引用及调用方给出的分组键编码为int32类别列
+
+3. 使用方法:
+   columns = read_scene_columns(scene_path)
+   columns.positions[i], columns.mesh_names[columns.mesh_ids[i]]
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterator, List
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 20  # 每次读取的字符数
+INITIAL_CAPACITY = 1024
+ESTIMATED_OBJECT_SIZE = 256  # 按文件大小预估物件数时每个物件的字节数
+BATCH_ROWS = 4096  # 每批写入列的行数
+MAX_INITIAL_CAPACITY = 1 << 22  # 预估容量的上限, 物件带内联网格时文件大小会高估物件数
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+class _Buffer:
+    """带读取位置的文本缓冲区, 已消费的部分定期丢弃"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int = 0) -> bool:
+        """追加至少一块(或size个字符)数据, 文件结束时返回False"""
+        if self.eof:
+            return False
+        data = self.f.read(max(size, self.chunk_size))
+        if not data:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += data
+        return True
+
+    def peek(self) -> str:
+        """跳过空白后的下一个字符, 文件结束时返回空串"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of scene buffer")
+        self.pos += 1
+
+    def decode(self):
+        """
+        解码下一个完整的JSON值; 值可能被块边界截断时继续读取
+
+        每次解码失败后追加的数据量不少于未解码部分的长度, 缓冲区按倍数增长,
+        大于一块的值总解码次数为对数级, 总耗时与值的大小成线性。
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # 数字等标量在缓冲区末尾时可能还没读完
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(len(self.text) - self.pos)
+
+def iter_scene_objects(scene_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """逐个产生场景顶层"objects"数组中的物件"""
+    with open(scene_path, 'r', encoding='utf-8') as f:
+        buffer = _Buffer(f, chunk_size)
+        buffer.expect('{')
+        if buffer.peek() == '}':
+            return
+        while True:
+            key = buffer.decode()
+            buffer.expect(':')
+            if key == 'objects':
+                buffer.expect('[')
+                if buffer.peek() == ']':
+                    buffer.pos += 1
+                else:
+                    while True:
+                        yield buffer.decode()
+                        if buffer.peek() == ']':
+                            buffer.pos += 1
+                            break
+                        buffer.expect(',')
+            else:
+                buffer.decode()
+            if buffer.peek() != ',':
+                break
+            buffer.pos += 1
+
+class Categories:
+    """字符串(或任意可哈希值)到int32编码的字典"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+class SceneColumns:
+    """场景物件的列式数据, 第i行对应objects数组中的第i个物件"""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, categories: List[str] = ()):
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.rotations = np.zeros((capacity, 4), dtype=np.float32)
+        self.scales = np.ones((capacity, 3), dtype=np.float32)
+        self.sizes = np.ones((capacity, 3), dtype=np.float32)
+        self.is_static = np.ones(capacity, dtype=bool)
+        self.mesh_ids = np.full(capacity, -1, dtype=np.int32)
+        self.rotation_size = 0  # 旋转的实际分量数(欧拉角3, 四元数4)
+        self.id_labels = {}  # 行号 -> 非整数的物件ID
+        self.meshes = Categories()
+        self.categories = {name: Categories() for name in categories}
+        self.category_ids = {name: np.full(capacity, -1, dtype=np.int32) for name in categories}
+        self._pending = []  # 尚未写入列的行, 按批写入减少逐元素赋值
+
+    @property
+    def mesh_names(self) -> List:
+        return self.meshes.values
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        columns = {name: getattr(self, name) for name in
+                   ('ids', 'positions', 'rotations', 'scales', 'sizes', 'is_static', 'mesh_ids')}
+        columns.update(('category:' + name, array) for name, array in self.category_ids.items())
+        return columns
+
+    def _set_column(self, name: str, array: np.ndarray):
+        if name.startswith('category:'):
+            self.category_ids[name[len('category:'):]] = array
+        else:
+            setattr(self, name, array)
+
+    def _resize(self, capacity: int):
+        """按新容量重新分配所有列"""
+        for name, column in self._columns().items():
+            resized = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            rows = min(capacity, self.count)
+            resized[:rows] = column[:rows]
+            self._set_column(name, resized)
+
+    def object_id(self, row: int):
+        """第row行的原始物件ID"""
+        label = self.id_labels.get(row)
+        return label if label is not None else int(self.ids[row])
+
+    def append(self, obj: Dict, categories: Dict[str, Callable] = None):
+        """把一个物件加入待写入的批次"""
+        row = self.count + len(self._pending)
+        object_id = obj.get('id')
+        if not isinstance(object_id, int) or isinstance(object_id, bool):
+            self.id_labels[row] = object_id
+            object_id = row
+        rotation = obj.get('rotation')
+        if rotation is None:
+            rotation = (0.0, 0.0, 0.0, 0.0)
+        else:
+            rotation = list(rotation)[:4]
+            self.rotation_size = max(self.rotation_size, len(rotation))
+            rotation += [0.0] * (4 - len(rotation))
+        mesh = obj.get('mesh_name', obj.get('mesh_id'))
+        self._pending.append((
+            object_id,
+            _vector(obj.get('position'), 0.0),
+            rotation,
+            _vector(obj.get('scale'), 1.0),
+            _vector(obj.get('size'), 1.0),
+            bool(obj.get('is_static', True)),
+            -1 if mesh is None else self.meshes.encode(mesh)
+        ) + tuple(
+            self.categories[name].encode(function(obj))
+            for name, function in (categories or {}).items()
+        ))
+        if len(self._pending) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        """把待写入的行批量写入列"""
+        if not self._pending:
+            return
+        start = self.count
+        end = start + len(self._pending)
+        if end > len(self.ids):
+            self._resize(max(end, len(self.ids) * 2))
+        fields = list(zip(*self._pending))
+        self.ids[start:end] = fields[0]
+        self.positions[start:end] = fields[1]
+        self.rotations[start:end] = fields[2]
+        self.scales[start:end] = fields[3]
+        self.sizes[start:end] = fields[4]
+        self.is_static[start:end] = fields[5]
+        self.mesh_ids[start:end] = fields[6]
+        for index, column in enumerate(self.category_ids.values()):
+            column[start:end] = fields[7 + index]
+        self.count = end
+        self._pending = []
+
+    def trim(self):
+        """写入剩余的行并释放多余容量"""
+        self.flush()
+        if self.count != len(self.ids):
+            self._resize(self.count)
+
+def _vector(value, default: float) -> tuple:
+    """三维向量, 缺失时为默认值, 标量按各轴相同处理"""
+    if value is None:
+        return (default, default, default)
+    if isinstance(value, (int, float)):
+        return (value, value, value)
+    value = list(value)[:3]
+    return tuple(value + [default] * (3 - len(value)))
+
+def read_scene_columns(scene_path: str, categories: Dict[str, Callable] = None,
+                       chunk_size: int = CHUNK_SIZE) -> SceneColumns:
+    """
+    流式读取场景物件并写入列
+
+    参数:
+        scene_path: 场景JSON文件路径
+        categories: 额外的类别列: 列名 -> 由物件dict计算分组键的函数
+
+    返回:
+        SceneColumns: 已去掉多余容量的列
+    """
+    categories = categories or {}
+    # 按文件大小预估物件数, 减少扩容次数
+    capacity = min(MAX_INITIAL_CAPACITY,
+                   max(INITIAL_CAPACITY, os.path.getsize(scene_path) // ESTIMATED_OBJECT_SIZE))
+    columns = SceneColumns(capacity, list(categories))
+    for obj in iter_scene_objects(scene_path, chunk_size):
+        columns.append(obj, categories)
+    columns.trim()
+    return columns
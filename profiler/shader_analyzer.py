@@ -12,14 +12,14 @@ Shader Performance Analyzer Tool
 
 2. 优化目标:
    - 减少Shader分支
-   - 优化变体管理
+   - 优化变体管理(按#if条件特化变体, 合并代码相同的变体)
    - 自动特性开关
    - 提升渲染性能
 
 3. 分析维度:
    - 分支复杂度
    - 编译时间
-   - 运行时开销
+   - 运行时开销(静态指令开销模型, 无需GPU)
    - 内存占用
 
 4. 使用方法:
@@ -33,108 +33,242 @@ import time
 from collections import defaultdict
 import matplotlib.pyplot as plt
 import numpy as np
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple
 import hashlib
+from shader_variants import VariantSpace, parse_keyword_groups
+from glsl_lexer import scan_glsl, parse_directive
+from shader_cost import estimate_shader_cost
+from shader_preprocessor import ShaderPreprocessor
 
 class ShaderAnalyzer:
+    FILE_EXTENSIONS = ('.shader', '.frag', '.vert')
+    CACHE_KIND = 'shader/v6'  # 记录格式变化时递增版本号
+    PREPROCESSOR_CACHE_KIND = 'shader-pp/v2'
+    MAX_SIMULATED_VARIANTS = 256  # 每个Shader最多模拟的变体数
+    MAX_SPECIALIZED_VARIANTS = 4096  # 每个Shader最多特化求值的相关变体数
+    MAX_CLASS_EXAMPLES = 8  # 每个等价类报告的关键字组合示例数
+    HIGH_COST_THRESHOLD = 300  # 静态开销分数阈值
+    SHADER_STAGES = {'.frag': 'fragment', '.vert': 'vertex'}
+
     def __init__(self):
         self.shaders = {}
-        self.variants = defaultdict(list)
+        self.variants = {}  # Shader路径 -> VariantSpace
+        self.variant_specializations = {}  # Shader路径 -> 特化结果
+        self.preprocessors = {}  # Shader路径 -> ShaderPreprocessor
+        self.variant_rules = []  # (类型, 关键字, 关键字)
         self.features = set()
         self.dependencies = defaultdict(set)
         self.performance_data = {}
+        self.cache = None  # 可选的ResultCache, 用于增量分析
         
     def scan_shaders(self, shader_path: str):
         """扫描Shader文件"""
         print(f"Scanning shaders in: {shader_path}")
+        self.analyze_files(self.collect_files(shader_path))
         
+    def collect_files(self, shader_path: str) -> List[str]:
+        """收集目录下的所有Shader文件"""
+        shader_files = []
         for root, _, files in os.walk(shader_path):
             for file in files:
-                if file.endswith(('.shader', '.frag', '.vert')):
-                    self._analyze_shader(os.path.join(root, file))
+                if file.endswith(self.FILE_EXTENSIONS):
+                    shader_files.append(os.path.join(root, file))
+        return shader_files
+        
+    def analyze_files(self, shader_paths: List[str]):
+        """逐个分析给定的Shader文件"""
+        for shader_path in shader_paths:
+            self._analyze_shader(shader_path)
+            
+    def merge(self, other: 'ShaderAnalyzer'):
+        """合并另一个分析器(通常来自工作进程)的扫描结果"""
+        self.shaders.update(other.shaders)
+        self.preprocessors.update(other.preprocessors)
+        self.features.update(other.features)
                     
     def _analyze_shader(self, shader_path: str):
         """分析单个Shader文件"""
         try:
-            with open(shader_path, 'r') as f:
-                content = f.read()
-                
-            shader_info = {
-                'path': shader_path,
-                'name': os.path.basename(shader_path),
-                'features': self._extract_features(content),
-                'branches': self._analyze_branches(content),
-                'complexity': self._calculate_complexity(content)
-            }
+            shader_info = preprocessor = None
+            if self.cache:
+                shader_info = self.cache.get(self.CACHE_KIND, shader_path)
+                preprocessor = self.cache.get(self.PREPROCESSOR_CACHE_KIND, shader_path)
+            if shader_info is None or preprocessor is None:
+                shader_info, preprocessor = self._load_shader_info(shader_path)
+                if self.cache:
+                    self.cache.put(self.CACHE_KIND, shader_path, shader_info)
+                    self.cache.put(self.PREPROCESSOR_CACHE_KIND, shader_path, preprocessor)
             
             self.shaders[shader_path] = shader_info
+            self.preprocessors[shader_path] = preprocessor
             self.features.update(shader_info['features'])
             
         except Exception as e:
             print(f"Error analyzing shader {shader_path}: {e}")
             
-    def _extract_features(self, content: str) -> Set[str]:
+    def _load_shader_info(self, shader_path: str) -> Tuple[dict, ShaderPreprocessor]:
+        """读取Shader源码, 生成单个Shader的分析记录和预处理条件树"""
+        with open(shader_path, 'r') as f:
+            content = f.read()
+            
+        # 单遍词法扫描, 后续统计都基于扫描结果
+        scan = scan_glsl(content, keep_tokens=True)
+        keyword_groups = parse_keyword_groups(scan['directives'])
+        features = self._extract_features(scan, keyword_groups)
+        # 代价模型和条件树共用同一份记号列表
+        tokens = scan.pop('token_list')
+        preprocessor = ShaderPreprocessor(tokens)
+            
+        return {
+            'path': shader_path,
+            'name': os.path.basename(shader_path),
+            'stage': self.SHADER_STAGES.get(os.path.splitext(shader_path)[1], 'unknown'),
+            'cost': estimate_shader_cost(tokens),
+            'keyword_groups': keyword_groups,
+            'features': features,
+            # 被条件测试、且不是文件内无条件#define的宏才由外部注入, 作为变体开关
+            'toggle_keywords': sorted(preprocessor.tested_macros
+                                      - preprocessor.unconditional_macros()),
+            'branches': scan['branches'],
+            'loops': scan['loops'],
+            'tokens': scan['tokens'],
+            'loc': scan['loc'],
+            'complexity': self._calculate_complexity(scan, features)
+        }, preprocessor
+        
+    def _extract_features(self, scan: dict, keyword_groups: List[List[str]]) -> Set[str]:
         """提取Shader特性标记"""
         features = set()
-        # 查找 #pragma multi_compile 和 #define 定义
-        for line in content.split('\n'):
-            if '#pragma multi_compile' in line:
-                features.update(re.findall(r'_(\w+)', line))
-            elif '#define' in line:
-                features.update(re.findall(r'#define\s+(\w+)', line))
+        # multi_compile/shader_feature 关键字和 #define 定义
+        for group in keyword_groups:
+            features.update(keyword for keyword in group if keyword is not None)
+        for directive in scan['directives']:
+            name, args = parse_directive(directive)
+            if name == 'define' and args:
+                features.add(re.match(r'\w*', args).group())
+        features.discard('')
         return features
         
-    def _analyze_branches(self, content: str) -> Dict[str, int]:
-        """分析条件分支"""
-        branches = {
-            'if': len(re.findall(r'\bif\b', content)),
-            'else': len(re.findall(r'\belse\b', content)),
-            'switch': len(re.findall(r'\bswitch\b', content)),
-            'for': len(re.findall(r'\bfor\b', content))
-        }
-        return branches
-        
-    def _calculate_complexity(self, content: str) -> float:
+    def _calculate_complexity(self, scan: dict, features: Set[str]) -> float:
         """计算Shader复杂度"""
-        # 基于分支数量、特性数量等计算复杂度分数
-        branch_count = sum(self._analyze_branches(content).values())
-        feature_count = len(self._extract_features(content))
-        loc = len(content.split('\n'))
+        # 基于分支/循环数量、特性数量等计算复杂度分数
+        branch_count = sum(scan['branches'].values()) + sum(scan['loops'].values())
+        feature_count = len(features)
+        
+        return (branch_count * 2 + feature_count * 1.5 + scan['loc'] * 0.1)
+        
+    def add_variant_rule(self, kind: str, keyword_a: str, keyword_b: str):
+        """
+        添加变体裁剪规则
         
-        return (branch_count * 2 + feature_count * 1.5 + loc * 0.1)
+        参数:
+            kind: 'requires' 启用keyword_a时必须启用keyword_b;
+                  'excludes' 两者不能同时启用
+        """
+        if kind not in ('requires', 'excludes'):
+            raise ValueError(f"Unknown variant rule: {kind}")
+        self.variant_rules.append((kind, keyword_a, keyword_b))
         
     def analyze_variants(self):
         """分析Shader变体"""
         for shader_path, info in self.shaders.items():
-            variants = self._generate_variant_combinations(info['features'])
-            self.variants[shader_path] = variants
+            space = self._build_variant_space(info)
+            self.variants[shader_path] = space
+            
+            # 按#if条件特化变体, 合并生成相同代码的变体
+            preprocessor = self.preprocessors.get(shader_path)
+            if preprocessor is not None:
+                self.variant_specializations[shader_path] = self._specialize_variants(
+                    space, preprocessor
+                )
             
             # 分析变体间的依赖关系
             self._analyze_feature_dependencies(info['features'])
             
-    def _generate_variant_combinations(self, features: Set[str]) -> List[Dict]:
-        """生成特性组合的变体列表"""
-        variants = []
-        feature_list = list(features)
-        
-        # 生成所有可能的特性组合
-        for i in range(2 ** len(feature_list)):
-            variant = {
-                'features': set(),
-                'hash': ''
-            }
+    def _build_variant_space(self, info: dict) -> VariantSpace:
+        """
+        构建Shader的变体空间: 关键字组互斥, 其余被条件编译测试的宏作为独立开关
+        
+        文件内无条件#define的常量(如STEPS)即使被#if测试也不产生变体;
+        只被#ifdef测试、由外部注入的关键字作为开关。
+        """
+        space = VariantSpace(info.get('keyword_groups', []))
+        for keyword in info.get('toggle_keywords', []):
+            space.add_toggle(keyword)
             
-            for j in range(len(feature_list)):
-                if i & (1 << j):
-                    variant['features'].add(feature_list[j])
-                    
-            variant['hash'] = self._calculate_variant_hash(variant['features'])
-            variants.append(variant)
+        for kind, keyword_a, keyword_b in self.variant_rules:
+            if keyword_a in space.keyword_bits and keyword_b in space.keyword_bits:
+                if kind == 'requires':
+                    space.require(keyword_a, keyword_b)
+                else:
+                    space.exclude(keyword_a, keyword_b)
+        return space
+        
+    def _specialize_variants(self, space: VariantSpace,
+                             preprocessor: ShaderPreprocessor) -> Dict:
+        """
+        逐变体求值#if条件块, 按特化后的代码内容划分等价类
+        
+        只枚举被条件测试的关键字所在的组, 其余组不影响生成的代码,
+        以倍数计入; 内容哈希相同的变体编译结果相同, 只估算一次开销,
+        等价类数量即实际需要编译的变体数。
+        """
+        relevant_space, multiplicity = space.project(preprocessor.tested_macros)
+        relevant_keywords = frozenset(relevant_space.keyword_bits)
+        
+        classes = {}  # 内容哈希 -> 变体等价类
+        lookup = {}   # 相关关键字集合 -> 变体类序号
+        evaluated = 0
+        for keywords in relevant_space.iter_variants(limit=self.MAX_SPECIALIZED_VARIANTS):
+            content_hash = preprocessor.content_hash(keywords)
+            variant_class = classes.get(content_hash)
+            if variant_class is None:
+                tokens = preprocessor.specialized_tokens(keywords)
+                variant_class = classes[content_hash] = {
+                    'index': len(classes),
+                    'hash': content_hash,
+                    'keywords': sorted(keywords),
+                    'keyword_sets': [],
+                    'variants': 0,
+                    'tokens': len(tokens),
+                    'cost': estimate_shader_cost(tokens)['cost']
+                }
+            if len(variant_class['keyword_sets']) < self.MAX_CLASS_EXAMPLES:
+                variant_class['keyword_sets'].append(sorted(keywords))
+            variant_class['variants'] += multiplicity
+            lookup[keywords] = variant_class['index']
+            evaluated += 1
             
-        return variants
+        return {
+            'total_variants': space.count(),
+            'relevant_keywords': sorted(relevant_keywords & preprocessor.tested_macros),
+            'evaluated_variants': evaluated * multiplicity,
+            'truncated': evaluated < relevant_space.count(),
+            'unique_compiles': len(classes),
+            'classes': sorted(classes.values(), key=lambda c: c['index']),
+            'lookup_keywords': relevant_keywords,
+            'lookup': lookup
+        }
         
-    def _calculate_variant_hash(self, features: Set[str]) -> str:
-        """计算变体哈希值"""
+    def _find_variant_class(self, shader_path: str, features) -> Dict:
+        """查找变体所属的特化类, 未求值时返回None"""
+        specialization = self.variant_specializations.get(shader_path)
+        if specialization is None:
+            return None
+        key = frozenset(features) & specialization['lookup_keywords']
+        index = specialization['lookup'].get(key)
+        return specialization['classes'][index] if index is not None else None
+        
+    def _calculate_variant_hash(self, shader_path: str, features: Set[str]) -> str:
+        """
+        计算变体哈希值
+        
+        哈希覆盖特化后的代码内容, 生成相同代码的关键字组合哈希相同;
+        变体未经特化求值时退回按关键字名计算。
+        """
+        variant_class = self._find_variant_class(shader_path, features)
+        if variant_class:
+            return variant_class['hash'][:8]
         feature_str = ','.join(sorted(features))
         return hashlib.md5(feature_str.encode()).hexdigest()[:8]
         
@@ -148,32 +282,38 @@ class ShaderAnalyzer:
                 
     def simulate_performance(self):
         """模拟Shader性能测试"""
-        for shader_path, variants in self.variants.items():
+        for shader_path, space in self.variants.items():
             shader_perf = []
             
-            for variant in variants:
-                # 模拟编译和运行时开销
-                compile_time = self._simulate_compile_time(len(variant['features']))
-                runtime_cost = self._simulate_runtime_cost(variant['features'])
+            # 只惰性枚举前MAX_SIMULATED_VARIANTS个变体
+            for features in space.iter_variants(limit=self.MAX_SIMULATED_VARIANTS):
+                # 估算编译和运行时开销
+                compile_time = self._estimate_compile_time(shader_path, features)
+                runtime_cost = self._estimate_runtime_cost(shader_path, features)
                 
                 shader_perf.append({
-                    'variant_hash': variant['hash'],
-                    'features': variant['features'],
+                    'variant_hash': self._calculate_variant_hash(shader_path, features),
+                    'features': set(features),
                     'compile_time': compile_time,
                     'runtime_cost': runtime_cost
                 })
                 
             self.performance_data[shader_path] = shader_perf
             
-    def _simulate_compile_time(self, feature_count: int) -> float:
-        """模拟编译时间"""
+    def _estimate_compile_time(self, shader_path: str, features: Set[str]) -> float:
+        """按变体特化后的源码规模估算编译时间"""
         base_time = 0.1  # 基础编译时间
-        return base_time * (1 + feature_count * 0.2) * (1 + np.random.random() * 0.1)
-        
-    def _simulate_runtime_cost(self, features: Set[str]) -> float:
-        """模拟运行时开销"""
-        base_cost = 0.05  # 基础运行时开销
-        return base_cost * (1 + len(features) * 0.15) * (1 + np.random.random() * 0.1)
+        variant_class = self._find_variant_class(shader_path, features)
+        tokens = (variant_class['tokens'] if variant_class
+                  else self.shaders[shader_path]['tokens'])
+        return base_time * (1 + tokens / 1000)
+        
+    def _estimate_runtime_cost(self, shader_path: str, features: Set[str]) -> float:
+        """静态指令开销模型给出的变体运行时开销分数"""
+        variant_class = self._find_variant_class(shader_path, features)
+        if variant_class:
+            return variant_class['cost']
+        return self.shaders[shader_path]['cost']['cost']
         
     def optimize_variants(self) -> Dict[str, List[str]]:
         """优化Shader变体"""
@@ -182,7 +322,7 @@ class ShaderAnalyzer:
         for shader_path, perf_data in self.performance_data.items():
             # 分析性能数据
             high_cost_variants = [v for v in perf_data 
-                                if v['runtime_cost'] > 0.1]  # 设置阈值
+                                if v['runtime_cost'] > self.HIGH_COST_THRESHOLD]
             
             if high_cost_variants:
                 optimizations[shader_path] = self._generate_optimization_plan(
@@ -219,10 +359,20 @@ class ShaderAnalyzer:
         report = {
             'shader_stats': {
                 'total_shaders': len(self.shaders),
-                'total_variants': sum(len(v) for v in self.variants.values()),
+                'total_variants': sum(space.count() for space in self.variants.values()),
+                # 特化被截断的Shader只求值了部分变体, 不计入总数, 单独列出
+                'unique_compiles': sum(
+                    s['unique_compiles'] for s in self.variant_specializations.values()
+                    if not s['truncated']
+                ),
+                'truncated_shaders': sorted(
+                    path for path, s in self.variant_specializations.items() if s['truncated']
+                ),
                 'total_features': len(self.features)
             },
+            'variant_specialization': self._summarize_specializations(),
             'complexity_analysis': self._analyze_complexity_stats(),
+            'cost_ranking': self._rank_shaders_by_cost(),
             'performance_analysis': self._analyze_performance_stats(),
             'optimization_suggestions': self.optimize_variants()
         }
@@ -244,20 +394,75 @@ class ShaderAnalyzer:
             ]
         }
         
+    def _summarize_specializations(self) -> List[Dict]:
+        """各Shader变体特化统计"""
+        return [
+            {
+                'shader': path,
+                'total_variants': s['total_variants'],
+                'relevant_keywords': s['relevant_keywords'],
+                'unique_compiles': s['unique_compiles'],
+                'duplicate_variants': s['evaluated_variants'] - s['unique_compiles'],
+                'truncated': s['truncated'],
+                'cost_range': [
+                    min(c['cost'] for c in s['classes']),
+                    max(c['cost'] for c in s['classes'])
+                ] if s['classes'] else [],
+                'equivalence_classes': [
+                    {
+                        'hash': c['hash'][:8],
+                        'variants': c['variants'],
+                        'keyword_sets': c['keyword_sets'],
+                        'tokens': c['tokens'],
+                        'cost': c['cost']
+                    }
+                    for c in sorted(s['classes'], key=lambda c: -c['variants'])
+                ]
+            }
+            for path, s in self.variant_specializations.items()
+        ]
+        
+    def _rank_shaders_by_cost(self, stage: str = 'fragment') -> List[Dict]:
+        """按静态估算的开销对Shader排序"""
+        ranking = [
+            {
+                'shader': path,
+                'cost': info['cost']['cost'],
+                'alu': info['cost']['alu'],
+                'transcendental': info['cost']['transcendental'],
+                'texture_samples': info['cost']['texture_samples'],
+                'branches': info['cost']['branches'],
+                'constant_loops': [
+                    loop['trip_count'] for loop in info['cost']['loops'] if loop['constant']
+                ]
+            }
+            for path, info in self.shaders.items()
+            if info['stage'] == stage
+        ]
+        ranking.sort(key=lambda x: (-x['cost'], x['shader']))
+        return ranking
+        
     def _analyze_performance_stats(self) -> Dict:
         """分析性能统计"""
         compile_times = []
         runtime_costs = []
+        unique_compile_time = 0.0
         
         for shader_perf in self.performance_data.values():
+            compiled = set()
             for variant in shader_perf:
                 compile_times.append(variant['compile_time'])
                 runtime_costs.append(variant['runtime_cost'])
+                # 内容哈希相同的变体只需编译一次
+                if variant['variant_hash'] not in compiled:
+                    compiled.add(variant['variant_hash'])
+                    unique_compile_time += variant['compile_time']
                 
         return {
             'average_compile_time': np.mean(compile_times),
             'average_runtime_cost': np.mean(runtime_costs),
             'total_compile_time': sum(compile_times),
+            'unique_compile_time': unique_compile_time,
             'worst_variants': self._identify_worst_variants()
         }
         
@@ -278,9 +483,10 @@ class ShaderAnalyzer:
                     'shader': shader_path,
                     'variant_hash': sorted_variants[0]['variant_hash'],
                     'runtime_cost': sorted_variants[0]['runtime_cost'],
-                    'features': list(sorted_variants[0]['features'])
+                    'features': sorted(sorted_variants[0]['features'])
                 })
                 
+        worst_variants.sort(key=lambda x: (-x['runtime_cost'], x['shader']))
         return worst_variants[:5]  # 返回前5个最差变体
         
     def visualize_stats(self, output_dir: str):
@@ -324,7 +530,7 @@ class ShaderAnalyzer:
         plt.scatter(compile_times, runtime_costs, alpha=0.5)
         plt.title('Variant Performance Distribution')
         plt.xlabel('Compile Time (s)')
-        plt.ylabel('Runtime Cost (ms)')
+        plt.ylabel('Estimated Runtime Cost')
         
         plt.savefig(os.path.join(output_dir, 'variant_performance.png'))
         plt.close()
@@ -346,7 +552,7 @@ class ShaderAnalyzer:
         plt.xticks(range(len(features)), features, rotation=45)
         plt.title('Feature Performance Impact')
         plt.xlabel('Features')
-        plt.ylabel('Average Runtime Cost (ms)')
+        plt.ylabel('Average Estimated Runtime Cost')
         
         plt.tight_layout()
         plt.savefig(os.path.join(output_dir, 'feature_impact.png'))
@@ -376,6 +582,10 @@ def main():
     print("\nShader Analysis Summary:")
     print(f"Total Shaders: {report['shader_stats']['total_shaders']}")
     print(f"Total Variants: {report['shader_stats']['total_variants']}")
+    print(f"Unique Compiles: {report['shader_stats']['unique_compiles']}")
+    if report['shader_stats']['truncated_shaders']:
+        print(f"  (excluding {len(report['shader_stats']['truncated_shaders'])} shaders "
+              f"with more than {analyzer.MAX_SPECIALIZED_VARIANTS} relevant variants)")
     print(f"Total Features: {report['shader_stats']['total_features']}")
     
     # 打印优化建议
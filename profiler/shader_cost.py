@@ -0,0 +1,349 @@
+"""
+Static Shader Cost Model
+-----------------------
+
+这个工具用于在没有GPU的情况下静态估算GLSL指令开销，主要功能：
+
+1. 统计维度:
+   - 纹理采样次数
+   - 超越函数(sin/exp/pow/sqrt等)次数
+   - ALU运算次数
+   - 分支数量
+
+2. 估算方式:
+   - 常量循环次数展开(#define / const int / 字面量)
+   - 用户函数按调用点内联累加
+   - 按权重折算为统一的开销分数
+
+3. 使用方法:
+   cost = estimate_shader_cost(tokenize_glsl(source))
+   cost['cost']
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from glsl_lexer import is_directive, parse_directive
+
+# 各类操作的相对开销权重
+COST_WEIGHTS = {
+    'alu': 1.0,
+    'transcendental': 4.0,
+    'texture': 8.0,
+    'branch': 1.0
+}
+
+# 无法确定次数的循环按此次数估算
+DEFAULT_LOOP_TRIPS = 8
+
+TEXTURE_FUNCTIONS = {
+    'texture', 'textureLod', 'textureGrad', 'textureProj', 'textureProjLod',
+    'textureOffset', 'textureLodOffset', 'textureGradOffset', 'textureGather',
+    'textureGatherOffset', 'texelFetch', 'texelFetchOffset',
+    'texture1D', 'texture2D', 'texture3D', 'textureCube', 'texture2DLod',
+    'texture2DProj', 'textureCubeLod', 'shadow2D', 'shadow2DProj'
+}
+
+TRANSCENDENTAL_FUNCTIONS = {
+    'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'sinh', 'cosh', 'tanh',
+    'exp', 'exp2', 'log', 'log2', 'pow', 'sqrt', 'inversesqrt'
+}
+
+# 内置函数折算的 (ALU, 超越函数) 次数
+BUILTIN_COSTS = {
+    'dot': (1, 0), 'cross': (2, 0), 'normalize': (2, 1), 'length': (1, 1),
+    'distance': (2, 1), 'reflect': (3, 0), 'refract': (6, 1), 'faceforward': (2, 0),
+    'mix': (2, 0), 'clamp': (2, 0), 'smoothstep': (4, 0), 'step': (1, 0),
+    'min': (1, 0), 'max': (1, 0), 'abs': (1, 0), 'sign': (1, 0),
+    'floor': (1, 0), 'ceil': (1, 0), 'fract': (1, 0), 'mod': (2, 0), 'round': (1, 0),
+    'radians': (1, 0), 'degrees': (1, 0), 'saturate': (1, 0),
+    'dFdx': (1, 0), 'dFdy': (1, 0), 'fwidth': (2, 0),
+    'transpose': (0, 0), 'inverse': (20, 1), 'determinant': (6, 0),
+    'textureSize': (1, 0)
+}
+
+ALU_OPERATORS = {
+    '+', '-', '*', '/', '%', '+=', '-=', '*=', '/=', '%=', '++', '--',
+    '<', '>', '<=', '>=', '==', '!=', '&&', '||', '^^', '!',
+    '&', '|', '^', '<<', '>>', '&=', '|=', '^=', '<<=', '>>=', '?'
+}
+
+BRANCH_TOKENS = {'if', 'switch', '?'}
+
+INT_PATTERN = re.compile(r'[+-]?\d+$')
+
+def _find_matching(tokens: List[str], start: int, open_token: str, close_token: str) -> int:
+    """查找与start处的开括号匹配的闭括号位置"""
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i] == open_token:
+            depth += 1
+        elif tokens[i] == close_token:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(tokens) - 1
+
+def _statement_end(tokens: List[str], start: int) -> int:
+    """单条语句(无花括号的循环体)的结束位置"""
+    if start < len(tokens) and tokens[start] == '{':
+        return _find_matching(tokens, start, '{', '}')
+    depth = 0
+    for i in range(start, len(tokens)):
+        token = tokens[i]
+        if token in ('(', '{'):
+            depth += 1
+        elif token in (')', '}'):
+            depth -= 1
+        elif token == ';' and depth == 0:
+            return i
+    return len(tokens) - 1
+
+def collect_constants(tokens: List[str]) -> Dict[str, int]:
+    """收集整数常量: #define NAME 64 与 const int NAME = 64;"""
+    constants = {}
+    for i, token in enumerate(tokens):
+        if is_directive(token):
+            name, args = parse_directive(token)
+            parts = args.split()
+            if name == 'define' and len(parts) == 2 and INT_PATTERN.match(parts[1]):
+                constants[parts[0]] = int(parts[1])
+        elif (token == 'const' and i + 5 < len(tokens)
+              and tokens[i + 1] in ('int', 'uint') and tokens[i + 3] == '='
+              and tokens[i + 5] == ';'):
+            value = _int_value(tokens[i + 4], constants)
+            if value is not None:
+                constants[tokens[i + 2]] = value
+    return constants
+
+def _int_value(token: str, constants: Dict[str, int]) -> Optional[int]:
+    """字面量或已知常量的整数值"""
+    token = token.rstrip('uU')
+    if INT_PATTERN.match(token):
+        return int(token)
+    return constants.get(token)
+
+def loop_trip_count(header: List[str], constants: Dict[str, int]) -> Optional[int]:
+    """
+    根据for循环头估算循环次数
+
+    参数:
+        header: '('与')'之间的记号, 如 int i = 0 ; i < STEPS ; i ++
+
+    返回:
+        int: 常量循环次数, 无法确定时返回None
+    """
+    if header.count(';') != 2:
+        return None
+    first = header.index(';')
+    second = header.index(';', first + 1)
+    init, cond, step = header[:first], header[first + 1:second], header[second + 1:]
+
+    # 初始化: [type] var = value  (允许负号)
+    if '=' not in init:
+        return None
+    eq = init.index('=')
+    var = init[eq - 1] if eq > 0 else None
+    start_tokens = init[eq + 1:]
+    start = _signed_value(start_tokens, constants)
+
+    # 条件: var < / <= / > / >= bound
+    if len(cond) < 3 or cond[0] != var or cond[1] not in ('<', '<=', '>', '>='):
+        return None
+    bound = _signed_value(cond[2:], constants)
+
+    # 步长: var++ / ++var / var-- / --var / var += k / var -= k
+    if step in ([var, '++'], ['++', var]):
+        stride = 1
+    elif step in ([var, '--'], ['--', var]):
+        stride = -1
+    elif len(step) >= 3 and step[0] == var and step[1] in ('+=', '-='):
+        value = _signed_value(step[2:], constants)
+        if value is None:
+            return None
+        stride = value if step[1] == '+=' else -value
+    else:
+        return None
+
+    if start is None or bound is None or stride == 0:
+        return None
+
+    if cond[1] in ('<', '<='):
+        span = bound - start + (1 if cond[1] == '<=' else 0)
+        trips = -(-span // stride) if stride > 0 else None
+    else:
+        span = start - bound + (1 if cond[1] == '>=' else 0)
+        trips = -(-span // -stride) if stride < 0 else None
+
+    if trips is None:
+        return None
+    return max(0, trips)
+
+def _signed_value(tokens: List[str], constants: Dict[str, int]) -> Optional[int]:
+    """解析 [-] 整数/常量 形式的表达式"""
+    if len(tokens) == 1:
+        return _int_value(tokens[0], constants)
+    if len(tokens) == 2 and tokens[0] == '-':
+        value = _int_value(tokens[1], constants)
+        return -value if value is not None else None
+    return None
+
+def find_functions(tokens: List[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    查找顶层函数定义
+
+    返回:
+        Dict: 函数名 -> (函数体'{'位置, 匹配'}'位置)
+    """
+    functions = {}
+    depth = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '{':
+            if depth == 0 and i > 0 and tokens[i - 1] == ')':
+                # 回溯到参数列表的'(', 其前一个记号为函数名
+                paren_depth = 0
+                j = i - 1
+                while j >= 0:
+                    if tokens[j] == ')':
+                        paren_depth += 1
+                    elif tokens[j] == '(':
+                        paren_depth -= 1
+                        if paren_depth == 0:
+                            break
+                    j -= 1
+                if j > 0:
+                    end = _find_matching(tokens, i, '{', '}')
+                    functions[tokens[j - 1]] = (i, end)
+                    i = end + 1
+                    continue
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        i += 1
+    return functions
+
+class ShaderCostModel:
+    def __init__(self, tokens: List[str]):
+        self.tokens = [token for token in tokens if not is_directive(token)]
+        self.constants = collect_constants(tokens)
+        self.functions = find_functions(self.tokens)
+        self.function_costs = {}
+        self.loops = []
+
+    def _empty_counts(self) -> Dict[str, float]:
+        return {'alu': 0.0, 'transcendental': 0.0, 'texture': 0.0, 'branch': 0.0}
+
+    def function_cost(self, name: str, _stack: Tuple[str, ...] = ()) -> Dict[str, float]:
+        """单个函数的开销(已内联其调用的函数), 结果缓存"""
+        if name in self.function_costs:
+            return self.function_costs[name]
+        if name not in self.functions or name in _stack:
+            return self._empty_counts()
+
+        start, end = self.functions[name]
+        counts = self._range_cost(start + 1, end, name, _stack + (name,))
+        self.function_costs[name] = counts
+        return counts
+
+    def _range_cost(self, start: int, end: int, function: str,
+                    stack: Tuple[str, ...]) -> Dict[str, float]:
+        """统计记号区间的开销, 循环体按循环次数放大"""
+        tokens = self.tokens
+        counts = self._empty_counts()
+        multipliers = []  # (循环结束位置, 循环次数)
+        scale = 1
+
+        i = start
+        while i < end:
+            if multipliers and i > multipliers[-1][0]:
+                while multipliers and i > multipliers[-1][0]:
+                    multipliers.pop()
+                scale = 1
+                for _, trips in multipliers:
+                    scale *= trips
+            token = tokens[i]
+            next_token = tokens[i + 1] if i + 1 < len(tokens) else ''
+
+            if token in ('for', 'while') and next_token == '(':
+                header_end = _find_matching(tokens, i + 1, '(', ')')
+                trips = None
+                if token == 'for':
+                    trips = loop_trip_count(tokens[i + 2:header_end], self.constants)
+                body_end = _statement_end(tokens, header_end + 1)
+                self.loops.append({
+                    'function': function,
+                    'kind': token,
+                    'trip_count': trips,
+                    'constant': trips is not None
+                })
+                trips = DEFAULT_LOOP_TRIPS if trips is None else trips
+                counts['branch'] += scale
+                if trips == 0:
+                    # 循环体不会执行
+                    i = body_end + 1
+                    continue
+                multipliers.append((body_end, trips))
+                scale *= trips
+            elif token == 'do' and next_token == '{':
+                body_end = _find_matching(tokens, i + 1, '{', '}')
+                self.loops.append({
+                    'function': function,
+                    'kind': 'do',
+                    'trip_count': None,
+                    'constant': False
+                })
+                counts['branch'] += scale
+                multipliers.append((body_end, DEFAULT_LOOP_TRIPS))
+                scale *= DEFAULT_LOOP_TRIPS
+            elif next_token == '(' and token in TEXTURE_FUNCTIONS:
+                counts['texture'] += scale
+            elif next_token == '(' and token in TRANSCENDENTAL_FUNCTIONS:
+                counts['transcendental'] += scale
+            elif next_token == '(' and token in BUILTIN_COSTS:
+                alu, transcendental = BUILTIN_COSTS[token]
+                counts['alu'] += alu * scale
+                counts['transcendental'] += transcendental * scale
+            elif next_token == '(' and token in self.functions and token != function:
+                callee = self.function_cost(token, stack)
+                for key, value in callee.items():
+                    counts[key] += value * scale
+            elif token in BRANCH_TOKENS:
+                counts['branch'] += scale
+                if token == '?':
+                    counts['alu'] += scale
+            elif token in ALU_OPERATORS:
+                counts['alu'] += scale
+            i += 1
+
+        return counts
+
+    def estimate(self, entry: str = 'main') -> Dict:
+        """估算入口函数的开销"""
+        counts = self.function_cost(entry)
+        return {
+            'alu': int(counts['alu']),
+            'transcendental': int(counts['transcendental']),
+            'texture_samples': int(counts['texture']),
+            'branches': int(counts['branch']),
+            'loops': list(self.loops),
+            'cost': weighted_cost(counts)
+        }
+
+def weighted_cost(counts: Dict[str, float]) -> float:
+    """按权重折算开销分数"""
+    return round(sum(counts[key] * weight for key, weight in COST_WEIGHTS.items()), 2)
+
+def estimate_shader_cost(tokens: List[str], entry: str = 'main') -> Dict:
+    """
+    估算Shader入口函数的静态开销
+
+    参数:
+        tokens: glsl_lexer产生的记号列表
+        entry: 入口函数名
+
+    返回:
+        Dict: ALU/超越函数/纹理采样/分支次数、循环信息和加权开销
+    """
+    return ShaderCostModel(tokens).estimate(entry)
@@ -0,0 +1,314 @@
+"""
+Shader Preprocessor Specialization
+---------------------------------
+
+这个工具用于按变体关键字求值#if/#ifdef条件块，主要功能：
+
+1. 预处理:
+   - 一次性把源码拆分为代码段和条件块树
+   - 求值#if/#ifdef/#ifndef/#elif/#else
+   - 跟踪条件块内的#define/#undef
+
+2. 变体特化:
+   - 输出变体实际生效的代码段序列和记号
+   - 只按条件中引用的宏做记忆化, 未被测试的关键字共享结果
+   - 代码段序列相同的变体视为同一份代码
+   - 按特化后的记号内容计算哈希, 代码段不同但内容相同的变体也能合并
+
+3. 使用方法:
+   pp = ShaderPreprocessor(tokenize_glsl(source))
+   pp.specialize({'FOG_ON'})
+   pp.specialized_tokens({'FOG_ON'})
+   pp.content_hash({'FOG_ON'})
+
+注意: 关键字只通过条件编译影响代码, 不对代码中的宏做展开。
+"""
+
+import hashlib
+import re
+from typing import Dict, FrozenSet, List, Tuple
+
+from glsl_lexer import is_directive, parse_directive, tokenize_glsl
+
+CONDITIONAL_DIRECTIVES = {'if', 'ifdef', 'ifndef', 'elif', 'else', 'endif'}
+
+MACRO_NAME_PATTERN = re.compile(r'(\w+)(\([^)]*\))?\s*(.*)', re.DOTALL)
+
+# 条件表达式二元运算符优先级(由低到高)
+BINARY_PRECEDENCE = [
+    ('||',), ('&&',), ('|',), ('^',), ('&',),
+    ('==', '!='), ('<', '>', '<=', '>='), ('<<', '>>'),
+    ('+', '-'), ('*', '/', '%')
+]
+
+class ConditionParser:
+    """把#if条件表达式解析为嵌套元组"""
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self):
+        if not self.tokens:
+            return ('int', 0)
+        return self._binary(0)
+
+    def _peek(self) -> str:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ''
+
+    def _next(self) -> str:
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _binary(self, level: int):
+        if level >= len(BINARY_PRECEDENCE):
+            return self._unary()
+        node = self._binary(level + 1)
+        while self._peek() in BINARY_PRECEDENCE[level]:
+            op = self._next()
+            node = ('bin', op, node, self._binary(level + 1))
+        return node
+
+    def _unary(self):
+        token = self._peek()
+        if token in ('!', '-', '+', '~'):
+            self._next()
+            return ('unary', token, self._unary())
+        return self._primary()
+
+    def _primary(self):
+        token = self._next()
+        if token == '(':
+            node = self._binary(0)
+            if self._peek() == ')':
+                self._next()
+            return node
+        if token == 'defined':
+            if self._peek() == '(':
+                self._next()
+                name = self._next()
+                if self._peek() == ')':
+                    self._next()
+            else:
+                name = self._next()
+            return ('defined', name)
+        number = re.match(r'(\d+)', token)
+        if number:
+            return ('int', int(number.group(1)))
+        return ('name', token)
+
+def condition_names(node) -> set:
+    """条件表达式中引用的宏名"""
+    kind = node[0]
+    if kind in ('defined', 'name'):
+        return {node[1]}
+    if kind == 'unary':
+        return condition_names(node[2])
+    if kind == 'bin':
+        return condition_names(node[2]) | condition_names(node[3])
+    return set()
+
+def evaluate_condition(node, env: Dict[str, str], depth: int = 0) -> int:
+    """在宏环境中求值条件表达式, 未定义的标识符为0"""
+    kind = node[0]
+    if kind == 'int':
+        return node[1]
+    if kind == 'defined':
+        return int(node[1] in env)
+    if kind == 'name':
+        return _macro_value(node[1], env, depth)
+    if kind == 'unary':
+        value = evaluate_condition(node[2], env, depth)
+        return {'!': int(not value), '-': -value, '+': value, '~': ~value}[node[1]]
+
+    op, left = node[1], evaluate_condition(node[2], env, depth)
+    # 短路求值
+    if op == '&&':
+        return int(bool(left) and bool(evaluate_condition(node[3], env, depth)))
+    if op == '||':
+        return int(bool(left) or bool(evaluate_condition(node[3], env, depth)))
+    right = evaluate_condition(node[3], env, depth)
+    if op in ('/', '%') and right == 0:
+        return 0
+    return {
+        '|': lambda: left | right, '^': lambda: left ^ right, '&': lambda: left & right,
+        '==': lambda: int(left == right), '!=': lambda: int(left != right),
+        '<': lambda: int(left < right), '>': lambda: int(left > right),
+        '<=': lambda: int(left <= right), '>=': lambda: int(left >= right),
+        '<<': lambda: left << right, '>>': lambda: left >> right,
+        '+': lambda: left + right, '-': lambda: left - right,
+        '*': lambda: left * right, '/': lambda: int(left / right), '%': lambda: left % right
+    }[op]()
+
+def _macro_value(name: str, env: Dict[str, str], depth: int) -> int:
+    """宏的整数值, 值为其他宏时递归展开"""
+    if name not in env or depth > 16:
+        return 0
+    value = env[name].strip()
+    if not value:
+        return 1
+    tokens = tokenize_glsl(value)
+    return evaluate_condition(ConditionParser(tokens).parse(), env, depth + 1)
+
+class ShaderPreprocessor:
+    def __init__(self, tokens: List[str]):
+        self.segments = []      # 代码段: 记号列表
+        self.segment_sizes = []
+        self.tree = []          # 节点: ('code', 段号) / ('define', 段号, 名, 值) /
+                                #       ('undef', 段号, 名) / ('if', [(条件, 子节点)])
+        self.tested_macros = set()
+        self._memo = {}
+        self._hashes = {}       # 生效代码段序列 -> 内容哈希
+        self._build(tokens)
+
+    def _add_segment(self, tokens: List[str]) -> int:
+        self.segments.append(tokens)
+        self.segment_sizes.append(len(tokens))
+        return len(self.segments) - 1
+
+    def _build(self, tokens: List[str]):
+        """把记号流拆分为代码段和条件块树"""
+        stack = [self.tree]   # 当前写入的子节点列表
+        blocks = []           # 当前打开的条件块分支列表
+        pending = []
+
+        def flush():
+            if pending:
+                stack[-1].append(('code', self._add_segment(list(pending))))
+                pending.clear()
+
+        for token in tokens:
+            if not is_directive(token):
+                pending.append(token)
+                continue
+
+            name, args = parse_directive(token)
+            if name not in CONDITIONAL_DIRECTIVES and name not in ('define', 'undef'):
+                pending.append(token)
+                continue
+
+            flush()
+            if name in ('if', 'ifdef', 'ifndef'):
+                branches = [(self._parse_condition(name, args), [])]
+                stack[-1].append(('if', branches))
+                blocks.append(branches)
+                stack.append(branches[0][1])
+            elif name in ('elif', 'else') and blocks:
+                condition = self._parse_condition('if', args) if name == 'elif' else None
+                blocks[-1].append((condition, []))
+                stack[-1] = blocks[-1][-1][1]
+            elif name == 'endif' and blocks:
+                blocks.pop()
+                stack.pop()
+            elif name == 'define':
+                match = MACRO_NAME_PATTERN.match(args)
+                if match:
+                    macro, params, value = match.groups()
+                    stack[-1].append(('define', self._add_segment([token]), macro,
+                                      value if not params else '1'))
+            elif name == 'undef':
+                stack[-1].append(('undef', self._add_segment([token]), args.split()[0] if args else ''))
+        flush()
+
+    def _parse_condition(self, name: str, args: str):
+        """解析条件指令为表达式元组, 并记录被测试的宏"""
+        if name == 'ifdef':
+            node = ('defined', args.split()[0] if args else '')
+        elif name == 'ifndef':
+            node = ('unary', '!', ('defined', args.split()[0] if args else ''))
+        else:
+            node = ConditionParser(tokenize_glsl(args)).parse()
+        self.tested_macros |= condition_names(node)
+        return node
+
+    def specialize(self, keywords) -> Tuple[int, ...]:
+        """
+        求值变体生效的代码段序列
+
+        参数:
+            keywords: 启用的关键字集合
+
+        返回:
+            Tuple[int]: 生效代码段编号, 相同序列即相同代码
+        """
+        key = frozenset(keywords) & self.tested_macros
+        if key not in self._memo:
+            env = {keyword: '1' for keyword in key}
+            active = []
+            self._walk(self.tree, env, active)
+            self._memo[key] = tuple(active)
+        return self._memo[key]
+
+    def _walk(self, nodes: list, env: Dict[str, str], active: List[int]):
+        for node in nodes:
+            kind = node[0]
+            if kind == 'code':
+                active.append(node[1])
+            elif kind == 'define':
+                active.append(node[1])
+                env[node[2]] = node[3]
+            elif kind == 'undef':
+                active.append(node[1])
+                env.pop(node[2], None)
+            else:
+                for condition, children in node[1]:
+                    if condition is None or evaluate_condition(condition, env):
+                        self._walk(children, env, active)
+                        break
+
+    def unconditional_macros(self) -> set:
+        """在所有条件块之外#define(且之后未被#undef)的宏, 不受外部关键字影响"""
+        defined = set()
+        for node in self.tree:
+            if node[0] == 'define':
+                defined.add(node[2])
+            elif node[0] == 'undef':
+                defined.discard(node[2])
+        return defined
+
+    def relevant_keywords(self, keywords) -> FrozenSet[str]:
+        """关键字中真正被条件编译测试的部分"""
+        return frozenset(keywords) & self.tested_macros
+
+    def specialized_tokens(self, keywords) -> List[str]:
+        """变体特化后的记号列表"""
+        tokens = []
+        for segment in self.specialize(keywords):
+            tokens.extend(self.segments[segment])
+        return tokens
+
+    def specialized_source(self, keywords) -> str:
+        """变体特化后的源码(记号以空格分隔, 预处理指令单独成行)"""
+        lines, current = [], []
+        for token in self.specialized_tokens(keywords):
+            if is_directive(token):
+                if current:
+                    lines.append(' '.join(current))
+                    current = []
+                lines.append(token)
+            else:
+                current.append(token)
+        if current:
+            lines.append(' '.join(current))
+        return '\n'.join(lines)
+
+    def content_hash(self, keywords) -> str:
+        """
+        变体特化后代码内容的哈希
+
+        记号逐个以换行分隔参与哈希, 与代码段的切分位置无关;
+        结果按生效代码段序列缓存。
+        """
+        signature = self.specialize(keywords)
+        digest = self._hashes.get(signature)
+        if digest is None:
+            hasher = hashlib.md5()
+            for segment in signature:
+                hasher.update(''.join(token + '\n' for token in self.segments[segment]).encode())
+            digest = self._hashes[signature] = hasher.hexdigest()
+        return digest
+
+    def token_count(self, keywords) -> int:
+        """变体特化后的记号数量, 只累加预先统计的段长度"""
+        return sum(self.segment_sizes[segment] for segment in self.specialize(keywords))
@@ -0,0 +1,232 @@
+"""
+Shader Variant Space
+-------------------
+
+这个工具用于描述和枚举Shader关键字变体空间，主要功能：
+
+1. 变体建模:
+   - 解析multi_compile/shader_feature关键字组
+   - 组内关键字互斥, 组间自由组合
+   - 支持依赖/互斥裁剪规则
+
+2. 优化目标:
+   - 组合计数, 无需生成变体列表
+   - 按需惰性枚举, 变体以整数位掩码表示
+   - 大量关键字时不再耗尽内存
+
+3. 使用方法:
+   space = VariantSpace(parse_keyword_groups(pragma_lines))
+   space.count()
+   for mask in space.iter_masks(limit=100): ...
+"""
+
+import re
+from itertools import islice, product
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+# 关键字组中表示"不启用任何关键字"的占位符
+EMPTY_KEYWORDS = {'_', '__'}
+
+PRAGMA_PATTERN = re.compile(
+    r'^\s*#\s*pragma\s+(multi_compile|shader_feature)(?:_\w+)?\s+(.*)$'
+)
+
+def parse_keyword_groups(lines: List[str]) -> List[List[Optional[str]]]:
+    """
+    解析#pragma multi_compile/shader_feature关键字组
+
+    参数:
+        lines: 预处理指令行
+
+    返回:
+        List: 关键字组列表, 每组为互斥选项, None表示不启用
+    """
+    groups = []
+    for line in lines:
+        match = PRAGMA_PATTERN.match(line)
+        if not match:
+            continue
+
+        kind, args = match.groups()
+        options = [None if token in EMPTY_KEYWORDS else token for token in args.split()]
+        if not options:
+            continue
+
+        # shader_feature只有一个关键字时隐含"关闭"选项
+        if kind == 'shader_feature' and len(options) == 1 and options[0] is not None:
+            options.insert(0, None)
+
+        # 同组重复选项只保留一次
+        groups.append(list(dict.fromkeys(options)))
+    return groups
+
+class VariantSpace:
+    def __init__(self, groups: List[List[Optional[str]]] = None):
+        self.groups = []         # 每组为互斥选项列表
+        self.keyword_bits = {}   # 关键字 -> 位掩码
+        self.rules = []          # (类型, 关键字位, 关键字位)
+        for options in groups or []:
+            self.add_group(options)
+
+    @classmethod
+    def from_features(cls, features) -> 'VariantSpace':
+        """每个特性作为一个独立开关, 与旧的2^N组合方式一致"""
+        return cls([[None, feature] for feature in sorted(features)])
+
+    @property
+    def keywords(self) -> List[str]:
+        """按位序排列的全部关键字"""
+        return sorted(self.keyword_bits, key=self.keyword_bits.get)
+
+    def add_group(self, options: List[Optional[str]]):
+        """添加一个互斥关键字组"""
+        if not options:
+            return
+        for keyword in options:
+            if keyword is not None and keyword not in self.keyword_bits:
+                self.keyword_bits[keyword] = 1 << len(self.keyword_bits)
+        self.groups.append(list(options))
+
+    def add_toggle(self, keyword: str):
+        """添加一个开/关两态的独立关键字"""
+        if keyword not in self.keyword_bits:
+            self.add_group([None, keyword])
+
+    def require(self, keyword: str, dependency: str):
+        """裁剪规则: 启用keyword时必须同时启用dependency"""
+        self.rules.append(('requires', self._bit(keyword), self._bit(dependency)))
+
+    def exclude(self, keyword_a: str, keyword_b: str):
+        """裁剪规则: 两个关键字不能同时启用"""
+        self.rules.append(('excludes', self._bit(keyword_a), self._bit(keyword_b)))
+
+    def project(self, keywords) -> Tuple['VariantSpace', int]:
+        """
+        把变体空间投影到指定关键字上
+
+        参数:
+            keywords: 关心的关键字(如被#if测试的宏)
+
+        返回:
+            (子空间, 倍数): 子空间只保留含这些关键字或受规则约束的组,
+            子空间中每个变体对应原空间中"倍数"个变体
+        """
+        keywords = set(keywords)
+        rule_bits = 0
+        for _, bit_a, bit_b in self.rules:
+            rule_bits |= bit_a | bit_b
+
+        projected = VariantSpace()
+        multiplicity = 1
+        for options in self.groups:
+            relevant = any(k in keywords for k in options if k is not None)
+            if relevant or any(bit & rule_bits for bit in self._group_bits(options)):
+                projected.add_group(options)
+            else:
+                multiplicity *= len(options)
+
+        names = {bit: keyword for keyword, bit in self.keyword_bits.items()}
+        for kind, bit_a, bit_b in self.rules:
+            if kind == 'requires':
+                projected.require(names[bit_a], names[bit_b])
+            else:
+                projected.exclude(names[bit_a], names[bit_b])
+        return projected, multiplicity
+
+    def _bit(self, keyword: str) -> int:
+        if keyword not in self.keyword_bits:
+            raise KeyError(f"Unknown shader keyword: {keyword}")
+        return self.keyword_bits[keyword]
+
+    def _group_bits(self, options: List[Optional[str]]) -> List[int]:
+        """组内每个选项对应的位掩码"""
+        return [self.keyword_bits[k] if k is not None else 0 for k in options]
+
+    def is_valid(self, mask: int) -> bool:
+        """检查位掩码是否满足所有裁剪规则"""
+        for kind, bit_a, bit_b in self.rules:
+            if kind == 'requires':
+                if mask & bit_a and not mask & bit_b:
+                    return False
+            elif mask & bit_a and mask & bit_b:
+                return False
+        return True
+
+    def _split_groups(self):
+        """把关键字组分为受规则约束的组和自由组"""
+        rule_bits = 0
+        for _, bit_a, bit_b in self.rules:
+            rule_bits |= bit_a | bit_b
+
+        constrained, free = [], []
+        for options in self.groups:
+            bits = self._group_bits(options)
+            if any(bit & rule_bits for bit in bits):
+                constrained.append(bits)
+            else:
+                free.append(bits)
+        return constrained, free
+
+    def _constrained_masks(self, constrained: List[List[int]]) -> Iterator[int]:
+        """枚举受约束组中满足规则的部分掩码"""
+        for combo in product(*constrained):
+            mask = 0
+            for bit in combo:
+                mask |= bit
+            if self.is_valid(mask):
+                yield mask
+
+    def count(self) -> int:
+        """组合计数变体总数, 只枚举受规则约束的组"""
+        constrained, free = self._split_groups()
+
+        total = 1
+        for bits in free:
+            total *= len(bits)
+        if constrained:
+            total *= sum(1 for _ in self._constrained_masks(constrained))
+        return total
+
+    def iter_masks(self, limit: int = None) -> Iterator[int]:
+        """
+        惰性枚举变体位掩码
+
+        参数:
+            limit: 最多返回的变体数量, 默认全部
+        """
+        constrained, free = self._split_groups()
+
+        def generate():
+            for base in self._constrained_masks(constrained):
+                for combo in product(*free):
+                    mask = base
+                    for bit in combo:
+                        mask |= bit
+                    yield mask
+
+        return islice(generate(), limit)
+
+    def mask_to_keywords(self, mask: int) -> FrozenSet[str]:
+        """位掩码转换为关键字集合"""
+        return frozenset(k for k, bit in self.keyword_bits.items() if mask & bit)
+
+    def keywords_to_mask(self, keywords) -> int:
+        """关键字集合转换为位掩码"""
+        mask = 0
+        for keyword in keywords:
+            mask |= self._bit(keyword)
+        return mask
+
+    def iter_variants(self, limit: int = None) -> Iterator[FrozenSet[str]]:
+        """惰性枚举变体的关键字集合"""
+        for mask in self.iter_masks(limit):
+            yield self.mask_to_keywords(mask)
+
+    def summary(self) -> Dict:
+        """变体空间统计信息"""
+        return {
+            'keyword_groups': len(self.groups),
+            'keywords': len(self.keyword_bits),
+            'rules': len(self.rules),
+            'total_variants': self.count()
+        }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 分析器模块以文件名互相导入, 测试时把profiler目录加入搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,30 @@
+import numpy as np
+import trimesh
+
+from mesh_analyzer import MeshAnalyzer
+
+def test_extra_passes_do_not_change_lod_suggestions(tmp_path):
+    # 高面数模型和它平移后的副本: 有LOD建议, 也有重复簇
+    mesh = trimesh.creation.icosphere(subdivisions=5)
+    mesh.vertices *= 1 + 0.1 * np.random.default_rng(2).random((len(mesh.vertices), 1))
+    mesh.export(tmp_path / 'rock.obj')
+    mesh.apply_translation([10.0, 0.0, 0.0])
+    mesh.export(tmp_path / 'rock_copy.obj')
+
+    analyzer = MeshAnalyzer()
+    analyzer.scan_models(str(tmp_path))
+    analyzer.analyze_optimization_potential()
+    lod_only = analyzer.generate_report(str(tmp_path / 'before.json'))['optimization_potential']
+
+    for _ in range(2):
+        analyzer.analyze_optimization_potential()
+        analyzer.analyze_vertex_cache()
+        analyzer.analyze_vertex_format()
+        analyzer.find_duplicates()
+    report = analyzer.generate_report(str(tmp_path / 'after.json'))
+
+    assert report['optimization_potential'] == lod_only
+    assert {s['type'] for s in lod_only['suggestions']} == {'high_poly'}
+    assert report['duplicates']['clusters'] == 1
+    assert report['vertex_cache_analysis']['analyzed_models'] == 2
+    assert len(report['vertex_format_analysis']['suggestions']) == 2
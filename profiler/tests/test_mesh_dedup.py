@@ -0,0 +1,76 @@
+import numpy as np
+
+from mesh_dedup import cluster_meshes, geometry_hashes, shapes_match
+
+def _bumpy_sphere(rings: int, rng: np.random.Generator):
+    """半径随机扰动的经纬球面网格, 顶点数为rings²"""
+    u, v = np.meshgrid(np.linspace(0, np.pi, rings),
+                       np.linspace(0, 2 * np.pi, rings, endpoint=False), indexing='ij')
+    r = 1 + 0.2 * rng.random(u.shape)
+    vertices = np.stack([r * np.sin(u) * np.cos(v), r * np.sin(u) * np.sin(v), r * np.cos(u)],
+                        axis=-1).reshape(-1, 3)
+    index = np.arange(rings * rings).reshape(rings, rings)
+    a, b = index[:-1], np.roll(index, -1, axis=1)[:-1]
+    c, d = index[1:], np.roll(index, -1, axis=1)[1:]
+    faces = np.concatenate([np.stack([a, b, c], axis=-1).reshape(-1, 3),
+                            np.stack([b, d, c], axis=-1).reshape(-1, 3)])
+    return vertices, faces
+
+def _rotation(rng: np.random.Generator) -> np.ndarray:
+    q, _ = np.linalg.qr(rng.normal(size=(3, 3)))
+    return q * np.sign(np.linalg.det(q))
+
+def test_rotated_float32_copies_match():
+    rng = np.random.default_rng(7)
+    for rings in (32, 100):
+        vertices, faces = _bumpy_sphere(rings, rng)
+        original = geometry_hashes(vertices, faces)
+        for _ in range(10):
+            transformed = (vertices @ _rotation(rng).T * rng.uniform(0.5, 3.0)
+                           + rng.normal(size=3) * 50).astype(np.float32)
+            # 顶点顺序也打乱
+            order = rng.permutation(len(vertices))
+            inverse = np.argsort(order)
+            geometry = {'a': (vertices, faces), 'b': (transformed[order], inverse[faces])}
+            copy = geometry_hashes(*geometry['b'])
+            clusters = cluster_meshes({'a': original, 'b': copy}, geometry.get)
+            assert [sorted(members) for members in clusters] == [['a', 'b']]
+
+def test_identical_copy_has_same_exact_hash():
+    vertices, faces = _bumpy_sphere(20, np.random.default_rng(1))
+    original = geometry_hashes(vertices, faces)
+    copy = geometry_hashes(vertices.copy(), np.roll(faces, 1, axis=1))
+    assert copy['exact_hash'] == original['exact_hash']
+
+def test_different_shapes_with_same_topology_do_not_match():
+    rng = np.random.default_rng(3)
+    geometry = {'a': _bumpy_sphere(32, rng), 'b': _bumpy_sphere(32, rng)}
+    first, second = geometry_hashes(*geometry['a']), geometry_hashes(*geometry['b'])
+    assert first['shape_hash'] == second['shape_hash']
+    assert cluster_meshes({'a': first, 'b': second}, geometry.get) == []
+
+def _terrain_tile(size: int, extent: float, rng: np.random.Generator):
+    """size x size顶点的规则网格地形块, 高度随机且不超过0.5"""
+    x, y = np.meshgrid(np.linspace(0, extent, size), np.linspace(0, extent, size), indexing='ij')
+    vertices = np.stack([x, y, 0.5 * rng.random(x.shape)], axis=-1).reshape(-1, 3)
+    index = np.arange(size * size).reshape(size, size)
+    a, b, c, d = index[:-1, :-1], index[1:, :-1], index[:-1, 1:], index[1:, 1:]
+    faces = np.concatenate([np.stack([a, b, c], axis=-1).reshape(-1, 3),
+                            np.stack([b, d, c], axis=-1).reshape(-1, 3)])
+    return vertices, faces
+
+def test_terrain_tiles_with_same_grid_do_not_match():
+    rng = np.random.default_rng(5)
+    geometry = {name: _terrain_tile(64, 100.0, rng) for name in ('a', 'b')}
+    hashes = {name: geometry_hashes(*mesh) for name, mesh in geometry.items()}
+    # 形状描述几乎相同, 只有对齐后的逐顶点残差能区分
+    assert shapes_match(hashes['a'], hashes['b'])
+    assert cluster_meshes(hashes, geometry.get) == []
+
+def test_moved_terrain_tile_matches():
+    rng = np.random.default_rng(9)
+    vertices, faces = _terrain_tile(64, 100.0, rng)
+    moved = (vertices @ _rotation(rng).T + [250.0, -80.0, 3.0]).astype(np.float32)
+    geometry = {'a': (vertices, faces), 'b': (moved, faces)}
+    hashes = {name: geometry_hashes(*mesh) for name, mesh in geometry.items()}
+    assert cluster_meshes(hashes, geometry.get) == [['a', 'b']]
@@ -0,0 +1,32 @@
+import pytest
+
+from mesh_probe import obj_stats
+
+OBJ_TEXT = (
+    "# exported\n"
+    "v 1.0 2.0 3.0 # trailing comment\n"
+    "v\t-1.5 2.25 -3.125 1.0\r\n"
+    "v 0 0 0 0.5 0.5 0.5\n"
+    "vn 0 0 1\n"
+    "f 1 2 3 4\n"
+    "f 1 2 3\n"
+    "f 1/1/1 2/2/2 3/3/3 4/4/4 5/5/5\n"
+    "v 10 20 30"
+)
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 16, 1 << 20])
+def test_obj_stats_independent_of_chunk_size(tmp_path, chunk_size):
+    # 小于一行的块不含换行, 必须整块并入下一块
+    path = tmp_path / 'mesh.obj'
+    path.write_text(OBJ_TEXT)
+    stats = obj_stats(str(path), chunk_size)
+    assert stats['vertices'] == 4
+    assert stats['faces'] == 2 + 1 + 3
+    assert stats['bounds'] == [[-1.5, 0.0, -3.125], [10.0, 20.0, 30.0]]
+    assert stats['attributes'] == ['POSITION', 'NORMAL']
+
+def test_obj_stats_rejects_short_vertex(tmp_path):
+    path = tmp_path / 'bad.obj'
+    path.write_text("v 1 2\nv 1 2 3\n")
+    with pytest.raises(ValueError):
+        obj_stats(str(path))
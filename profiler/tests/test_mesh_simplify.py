@@ -0,0 +1,62 @@
+import numpy as np
+
+from mesh_simplify import simplify_levels, weld_vertices
+
+def _uv_sphere(rings: int, segments: int):
+    """单位球面, 极点和接缝处的重复顶点留给weld_vertices合并"""
+    u, v = np.meshgrid(np.linspace(0, np.pi, rings), np.linspace(0, 2 * np.pi, segments + 1),
+                       indexing='ij')
+    vertices = np.stack([np.sin(u) * np.cos(v), np.sin(u) * np.sin(v), np.cos(u)],
+                        axis=-1).reshape(-1, 3)
+    # 去掉sin(pi)等舍入残差和-0.0, 让重复顶点的坐标完全相同
+    return np.round(vertices, 12) + 0.0, _quad_faces(rings, segments + 1)
+
+def _grid(size: int):
+    x, y = np.meshgrid(np.linspace(0, 1, size), np.linspace(0, 1, size), indexing='ij')
+    vertices = np.stack([x, y, np.zeros_like(x)], axis=-1).reshape(-1, 3)
+    return vertices, _quad_faces(size, size)
+
+def _quad_faces(rows: int, columns: int) -> np.ndarray:
+    index = np.arange(rows * columns).reshape(rows, columns)
+    a, b, c, d = index[:-1, :-1], index[:-1, 1:], index[1:, :-1], index[1:, 1:]
+    return np.concatenate([np.stack([a, c, b], axis=-1).reshape(-1, 3),
+                           np.stack([b, c, d], axis=-1).reshape(-1, 3)])
+
+def _edge_use_counts(faces: np.ndarray) -> np.ndarray:
+    edges = np.sort(np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]]), axis=1)
+    return np.unique(edges, axis=0, return_counts=True)[1]
+
+def test_weld_merges_seams_and_drops_degenerate_faces():
+    vertices, faces = _uv_sphere(10, 12)
+    welded, welded_faces = weld_vertices(vertices, faces)
+    assert len(welded) == 8 * 12 + 2
+    assert np.all(_edge_use_counts(welded_faces) == 2)
+
+def test_sphere_levels_stay_closed_and_near_surface():
+    levels = simplify_levels(*_uv_sphere(40, 48), {'medium': 1500, 'low': 400})
+    assert len(levels['low']['faces']) < len(levels['medium']['faces'])
+    for level in levels.values():
+        vertices, faces = level['vertices'], level['faces'].astype(np.int64)
+        assert len(faces) <= level['target_faces'] + 2
+        assert faces.max() < len(vertices)
+        assert np.all((faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) &
+                      (faces[:, 2] != faces[:, 0]))
+        # 闭合流形: 每条边恰好被两个三角形共用
+        assert np.all(_edge_use_counts(faces) == 2)
+        radii = np.linalg.norm(vertices, axis=1)
+        assert np.abs(radii - 1).max() < 0.1
+        assert level['relative_error'] < 0.1
+
+def test_flat_grid_simplifies_without_error_or_shrinking():
+    vertices, faces = _grid(21)
+    level = simplify_levels(vertices, faces, {'low': 50})['low']
+    assert len(level['faces']) <= 52
+    assert level['max_error'] < 1e-6
+    assert np.allclose(level['vertices'][:, 2], 0)
+    # 边界约束保持轮廓
+    assert np.allclose(level['vertices'][:, :2].min(axis=0), 0)
+    assert np.allclose(level['vertices'][:, :2].max(axis=0), 1)
+    # 三角形朝向与原网格一致(+Z)
+    corners = level['vertices'][level['faces'].astype(np.int64)]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    assert np.all(normals[:, 2] > 0)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from frustum_culling import frustum_planes, make_camera
+from occlusion_raster import DepthPyramid, rasterize_boxes
+
+SAMPLES = np.linspace(0.02, 0.98, 6)
+
+def _face_points(lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """盒子六个面上的网格采样点"""
+    a, b = np.meshgrid(SAMPLES, SAMPLES, indexing='ij')
+    a, b = a.ravel(), b.ravel()
+    points = []
+    for axis in range(3):
+        u, v = [other for other in range(3) if other != axis]
+        for side in (lower, upper):
+            face = np.empty((len(a), 3))
+            face[:, axis] = side[axis]
+            face[:, u] = lower[u] + a * (upper[u] - lower[u])
+            face[:, v] = lower[v] + b * (upper[v] - lower[v])
+            points.append(face)
+    return np.concatenate(points)
+
+def _blocked(origin: np.ndarray, points: np.ndarray, lower: np.ndarray,
+             upper: np.ndarray) -> np.ndarray:
+    """从origin到各点的线段是否先穿过某个盒子(slab法, 点在t=1处)"""
+    direction = points - origin
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / direction[:, np.newaxis, :]
+        t0 = (lower[np.newaxis] - origin) * inverse
+        t1 = (upper[np.newaxis] - origin) * inverse
+    t_near = np.nanmax(np.minimum(t0, t1), axis=2)
+    t_far = np.nanmin(np.maximum(t0, t1), axis=2)
+    # 穿过盒子内部(不是擦边)并且在到达该点之前进入
+    return np.any((t_near < 1 - 1e-6) & (t_far > t_near + 1e-6) & (t_far > 0), axis=1)
+
+def _in_frustum(camera, points: np.ndarray) -> np.ndarray:
+    planes = frustum_planes([camera])[0]
+    return np.all(points @ planes[:, :3].T + planes[:, 3] >= 0, axis=1)
+
+def _scene(rng: np.random.Generator):
+    # 相机前方几堵墙, 墙前后散布小盒子
+    walls_min = np.array([[-30, 0, 40], [5, 0, 25], [-12, 0, 60]], dtype=np.float64)
+    walls_max = walls_min + [[25, 12, 2], [20, 8, 2], [30, 20, 2]]
+    centers = rng.uniform([-40, 0, 5], [40, 15, 90], size=(400, 3))
+    sizes = rng.uniform(0.3, 3.0, size=(400, 3))
+    return walls_min, walls_max, centers - sizes / 2, centers + sizes / 2
+
+def test_occlusion_never_culls_visible_boxes():
+    rng = np.random.default_rng(4)
+    occluders_min, occluders_max, boxes_min, boxes_max = _scene(rng)
+    candidates_min = np.concatenate([occluders_min, boxes_min])
+    candidates_max = np.concatenate([occluders_max, boxes_max])
+
+    culled = 0
+    for position, target in [([0, 5, 0], [0, 5, 50]), ([10, 8, -5], [-5, 4, 60]),
+                             ([-20, 3, 10], [10, 6, 70])]:
+        camera = make_camera(position, target=target, far=200)
+        depth, _ = rasterize_boxes(camera, occluders_min, occluders_max, 256, 128)
+        occluded = DepthPyramid(depth).test_boxes(camera, candidates_min, candidates_max)['occluded']
+        culled += int(occluded.sum())
+        for index in np.flatnonzero(occluded):
+            points = _face_points(candidates_min[index], candidates_max[index])
+            points = points[_in_frustum(camera, points)]
+            blocked = _blocked(camera.position, points, occluders_min, occluders_max)
+            assert blocked.all(), f"box {index} culled but visible from {position}"
+    # 墙后确实有物件被剔除, 测试不是空跑
+    assert culled > 50
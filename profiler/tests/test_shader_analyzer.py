@@ -0,0 +1,28 @@
+from shader_analyzer import ShaderAnalyzer
+
+SHADER = """\
+#pragma multi_compile _ FOG_LINEAR FOG_EXP
+#define STEPS 64
+uniform float x;
+void main() {
+#if STEPS > 32
+    x = 1.0;
+#endif
+#ifdef USE_SHADOW
+    x = 2.0;
+#endif
+}
+"""
+
+def test_only_external_tested_macros_become_toggles(tmp_path):
+    path = tmp_path / 'water.frag'
+    path.write_text(SHADER)
+    analyzer = ShaderAnalyzer()
+    analyzer.analyze_files([str(path)])
+    analyzer.analyze_variants()
+
+    space = analyzer.variants[str(path)]
+    # STEPS在文件内无条件定义, 不是开关; USE_SHADOW只被#ifdef测试, 由外部注入
+    assert 'STEPS' not in space.keyword_bits
+    assert 'USE_SHADOW' in space.keyword_bits
+    assert space.count() == 3 * 2
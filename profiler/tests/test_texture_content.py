@@ -0,0 +1,28 @@
+import numpy as np
+from PIL import Image
+
+from texture_content import analyze_texture_content, load_reduced
+
+def test_16bit_gradient_is_not_constant(tmp_path):
+    # 16位高度图: 按8位截断时全部为255
+    gradient = np.tile(np.linspace(1000, 65535, 4096).astype(np.uint16), (64, 1))
+    path = tmp_path / 'height.png'
+    Image.fromarray(gradient).save(path)
+    assert Image.open(path).mode == 'I;16'
+
+    pixels, levels = load_reduced(str(path))
+    assert pixels.shape == (32, 2048, 1) and levels == 1
+    assert pixels[0, 0, 0] < 10 and pixels[0, -1, 0] == 255
+    assert not analyze_texture_content(str(path))['constant']
+
+def test_palette_image_is_reduced(tmp_path):
+    indices = np.tile(np.arange(4096) % 4, (64, 1)).astype(np.uint8)
+    image = Image.fromarray(indices, 'P')
+    image.putpalette([255, 0, 0, 0, 255, 0, 0, 0, 255, 255, 255, 255])
+    path = tmp_path / 'palette.png'
+    image.save(path)
+
+    pixels, levels = load_reduced(str(path))
+    assert pixels.shape == (32, 2048, 3) and levels == 1
+    stats = analyze_texture_content(str(path))
+    assert not stats['grayscale'] and stats['alpha_usage'] == 'none'
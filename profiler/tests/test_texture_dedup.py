@@ -0,0 +1,17 @@
+import numpy as np
+from PIL import Image
+
+from texture_dedup import cluster_duplicates, perceptual_hashes
+
+def test_palette_and_16bit_copies_are_hashed(tmp_path):
+    # 同一张灰度图分别保存为8位、调色板和16位PNG
+    x, y = np.meshgrid(np.linspace(0, 1, 512), np.linspace(0, 1, 512))
+    gray = ((np.sin(6 * x) * np.cos(4 * y) + 1) * 127.5).astype(np.uint8)
+    paths = {name: str(tmp_path / f'{name}.png') for name in ('l8', 'palette', 'l16')}
+    Image.fromarray(gray).save(paths['l8'])
+    Image.fromarray(gray).convert('P').save(paths['palette'])
+    Image.fromarray(gray.astype(np.uint16) * 257).save(paths['l16'])
+
+    hashes = {path: perceptual_hashes(path)['phash'] for path in paths.values()}
+    assert [sorted(members) for members in cluster_duplicates(hashes, 6)] == \
+        [sorted(paths.values())]
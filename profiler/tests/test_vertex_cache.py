@@ -0,0 +1,68 @@
+from collections import OrderedDict, deque
+
+import numpy as np
+import pytest
+
+from vertex_cache import fifo_misses, lru_misses, simulate_vertex_cache, tipsify
+
+def _reference_fifo(indices, cache_size: int) -> int:
+    cache = deque(maxlen=cache_size)
+    misses = 0
+    for vertex in indices:
+        if vertex not in cache:
+            cache.append(vertex)
+            misses += 1
+    return misses
+
+def _reference_lru(indices, cache_size: int) -> int:
+    cache = OrderedDict()
+    misses = 0
+    for vertex in indices:
+        if vertex in cache:
+            cache.move_to_end(vertex)
+        else:
+            misses += 1
+            cache[vertex] = True
+            if len(cache) > cache_size:
+                cache.popitem(last=False)
+    return misses
+
+def _grid_faces(size: int) -> np.ndarray:
+    index = np.arange((size + 1) ** 2).reshape(size + 1, size + 1)
+    a, b, c, d = index[:-1, :-1], index[:-1, 1:], index[1:, :-1], index[1:, 1:]
+    return np.concatenate([np.stack([a, b, c], axis=-1).reshape(-1, 3),
+                           np.stack([b, d, c], axis=-1).reshape(-1, 3)])
+
+def _access_patterns():
+    rng = np.random.default_rng(11)
+    # 顶点数与缓存大小相近时命中和挤出都频繁, 长间隔访问走LRU的逐个计数路径
+    yield rng.integers(0, 24, 5000)
+    yield rng.integers(0, 300, 5000)
+    yield np.concatenate([rng.integers(0, 40, 2000), np.arange(2000), rng.integers(0, 40, 2000)])
+    yield _grid_faces(30).ravel()
+    yield rng.permutation(_grid_faces(30)).ravel()
+
+@pytest.mark.parametrize('cache_size', [1, 4, 16, 32])
+def test_fifo_matches_reference(cache_size):
+    for indices in _access_patterns():
+        assert fifo_misses(indices, cache_size) == _reference_fifo(indices.tolist(), cache_size)
+
+@pytest.mark.parametrize('cache_size', [1, 4, 16, 32])
+def test_lru_matches_reference(cache_size):
+    for indices in _access_patterns():
+        assert lru_misses(indices, cache_size) == _reference_lru(indices.tolist(), cache_size)
+
+def test_tipsify_outputs_permutation_of_faces():
+    rng = np.random.default_rng(5)
+    faces = rng.permutation(_grid_faces(40)).astype(np.uint32)
+    optimized = tipsify(faces, cache_size=16)
+    assert optimized.dtype == faces.dtype
+    assert optimized.shape == faces.shape
+    # 每个三角形原样出现一次(绕序不变)
+    assert sorted(map(tuple, optimized.tolist())) == sorted(map(tuple, faces.tolist()))
+
+def test_tipsify_reduces_acmr_of_shuffled_grid():
+    faces = np.random.default_rng(2).permutation(_grid_faces(40))
+    before = simulate_vertex_cache(faces, 16)['acmr']
+    after = simulate_vertex_cache(tipsify(faces, cache_size=16), 16)['acmr']
+    assert after < before
@@ -35,16 +35,40 @@ from collections import defaultdict
 import shutil
 from typing import Dict, List, Tuple
 import sys
+from texture_probe import probe_texture
+from texture_memory import (PLATFORM_PROFILES, has_alpha, is_block_compressed,
+                            normalize_pixel_format, platform_texture_memory, texture_memory)
+from texture_content import MAX_ANALYSIS_DIMENSION, analyze_texture_content
+from texture_dedup import cluster_duplicates, perceptual_hashes
 
 class TextureAnalyzer:
+    FILE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tga', '.dds', '.psd', '.ktx', '.ktx2')
+    CACHE_KIND = 'texture/v3'  # 记录格式变化时递增版本号
+    CONTENT_CACHE_KIND = 'texture-content/v2'
+    HASH_CACHE_KIND = 'texture-phash/v1'
+    # 内容分析确认alpha全不透明/二值时可改用的格式
+    OPAQUE_FORMATS = {'BC2': 'BC1', 'BC3': 'BC1', 'BC7': 'BC1', 'ETC2_RGBA8': 'ETC2_RGB8',
+                      'ETC2_RGB8A1': 'ETC2_RGB8', 'LA8': 'L8', 'RGBA4': 'RGB565'}
+    BINARY_ALPHA_FORMATS = {'BC2': 'BC1', 'BC3': 'BC1', 'BC7': 'BC1',
+                            'ETC2_RGBA8': 'ETC2_RGB8A1'}
+
     def __init__(self):
         self.textures = {}
         self.stats = defaultdict(int)
         self.optimization_suggestions = []
         self.memory_usage = 0
+        self.content_stats = {}  # 贴图路径 -> 内容统计(可选的内容分析)
+        self.perceptual_hashes = {}  # 贴图路径 -> {'dhash', 'phash'}
+        self.duplicate_clusters = []
+        self.cache = None  # 可选的ResultCache, 用于增量分析
         
         # 定义标准
         self.MAX_TEXTURE_SIZE = 2048
+        self.MIN_TEXTURE_SIZE = 64  # 内容分析建议缩小时的下限
+        # 各目标平台的贴图显存预算(字节), 可修改后重新生成报告做what-if分析
+        self.platform_budgets = {
+            platform: profile['budget'] for platform, profile in PLATFORM_PROFILES.items()
+        }
         self.RECOMMENDED_FORMATS = {'.png', '.jpg', '.dds', '.tga'}
         self.SIZE_CATEGORIES = {
             'small': 512,
@@ -56,56 +80,97 @@ class TextureAnalyzer:
     def scan_textures(self, texture_path: str):
         """扫描贴图资源"""
         print(f"Scanning textures in: {texture_path}")
+        self.analyze_files(self.collect_files(texture_path))
         
+    def collect_files(self, texture_path: str) -> List[str]:
+        """收集目录下的所有贴图文件"""
+        texture_files = []
         for root, _, files in os.walk(texture_path):
             for file in files:
                 if self._is_texture_file(file):
-                    self._analyze_texture(os.path.join(root, file))
+                    texture_files.append(os.path.join(root, file))
+        return texture_files
+        
+    def analyze_files(self, texture_paths: List[str]):
+        """逐个分析给定的贴图文件"""
+        for texture_path in texture_paths:
+            self._analyze_texture(texture_path)
+            
+    def merge(self, other: 'TextureAnalyzer'):
+        """合并另一个分析器(通常来自工作进程)的扫描结果"""
+        self.textures.update(other.textures)
+        self.memory_usage += other.memory_usage
+        for key, value in other.stats.items():
+            self.stats[key] += value
                     
     def _is_texture_file(self, filename: str) -> bool:
         """检查是否为贴图文件"""
-        return any(filename.lower().endswith(ext) for ext in 
-                  ('.png', '.jpg', '.jpeg', '.tga', '.dds', '.psd'))
+        return filename.lower().endswith(self.FILE_EXTENSIONS)
                   
     def _analyze_texture(self, texture_path: str):
         """分析单个贴图文件"""
         try:
-            with Image.open(texture_path) as img:
-                size = os.path.getsize(texture_path)
-                width, height = img.size
-                format_name = img.format
-                
-                texture_info = {
-                    'path': texture_path,
-                    'size': size,
-                    'dimensions': (width, height),
-                    'format': format_name,
-                    'memory': self._calculate_memory_usage(width, height, format_name),
-                    'compressed': self._is_compressed_format(format_name)
-                }
-                
-                self.textures[texture_path] = texture_info
-                self.memory_usage += texture_info['memory']
-                
-                # 更新统计信息
-                self._update_stats(texture_info)
+            texture_info = self.cache.get(self.CACHE_KIND, texture_path) if self.cache else None
+            if texture_info is None:
+                texture_info = self._load_texture_info(texture_path)
+                if self.cache:
+                    self.cache.put(self.CACHE_KIND, texture_path, texture_info)
+                    
+            self.textures[texture_path] = texture_info
+            self.memory_usage += texture_info['memory']
+            
+            # 更新统计信息
+            self._update_stats(texture_info)
                 
         except Exception as e:
             print(f"Error analyzing texture {texture_path}: {e}")
             
-    def _calculate_memory_usage(self, width: int, height: int, format_name: str) -> int:
-        """计算贴图内存占用"""
-        bytes_per_pixel = 4  # 默认RGBA
-        if format_name in ['L', 'P']:
-            bytes_per_pixel = 1
-        elif format_name in ['RGB']:
-            bytes_per_pixel = 3
+    def _load_texture_info(self, texture_path: str) -> dict:
+        """读取贴图文件头, 生成单个贴图的分析记录"""
+        header = probe_texture(texture_path) or self._probe_with_pil(texture_path)
+        size = os.path.getsize(texture_path)
+        width, height = header['width'], header['height']
+        pixel_format = normalize_pixel_format(header['pixel_format'])
+        layers = header['layers'] * header['faces']
+        
+        return {
+            'path': texture_path,
+            'size': size,
+            'dimensions': (width, height),
+            'format': header['format'],
+            'pixel_format': pixel_format,
+            'mip_levels': header['mip_levels'],
+            'layers': layers,
+            'depth': header['depth'],
+            'memory': self._calculate_memory_usage(
+                width, height, pixel_format, header['mip_levels'], layers, header['depth']
+            ),
+            'compressed': self._is_compressed_format(pixel_format)
+        }
+        
+    def _probe_with_pil(self, texture_path: str) -> dict:
+        """文件头无法识别时退回PIL读取贴图信息(不解码像素)"""
+        with Image.open(texture_path) as img:
+            width, height = img.size
+            return {
+                'format': img.format,
+                'width': width,
+                'height': height,
+                'pixel_format': img.mode,
+                'mip_levels': 1,
+                'depth': 1,
+                'layers': 1,
+                'faces': 1
+            }
             
-        return width * height * bytes_per_pixel
+    def _calculate_memory_usage(self, width: int, height: int, pixel_format: str,
+                                mip_levels: int = 1, layers: int = 1, depth: int = 1) -> int:
+        """按像素格式计算贴图显存占用, 包含mip链、立方体面和数组层"""
+        return texture_memory(width, height, pixel_format, mip_levels, layers, depth)
         
-    def _is_compressed_format(self, format_name: str) -> bool:
-        """检查是否为压缩格式"""
-        return format_name.lower() in ['dds', 'pvr', 'ktx']
+    def _is_compressed_format(self, pixel_format: str) -> bool:
+        """检查是否为GPU块压缩格式(BCn/ETC/ASTC), 与文件容器无关"""
+        return is_block_compressed(normalize_pixel_format(pixel_format))
         
     def _update_stats(self, texture_info: dict):
         """更新统计信息"""
@@ -123,6 +188,10 @@ class TextureAnalyzer:
         # 更新格���统计
         self.stats[f'format_{texture_info["format"].lower()}_count'] += 1
         
+        # 缺少mip链的贴图
+        if texture_info['mip_levels'] == 1 and max(width, height) > 1:
+            self.stats['missing_mips_count'] += 1
+            
         # 更新压缩状态统计
         if texture_info['compressed']:
             self.stats['compressed_count'] += 1
@@ -134,29 +203,241 @@ class TextureAnalyzer:
         for path, info in self.textures.items():
             width, height = info['dimensions']
             
-            # 检查过大的贴图
+            pixel_format = info['pixel_format']
+            mip_levels, layers, depth = info['mip_levels'], info['layers'], info['depth']
+            
+            # 检查过大的贴图: 按2的幂缩小到上限以内, 去掉对应的顶层mip
             if max(width, height) > self.MAX_TEXTURE_SIZE:
+                shift = 0
+                while max(width, height) >> shift > self.MAX_TEXTURE_SIZE:
+                    shift += 1
+                new_width, new_height = max(1, width >> shift), max(1, height >> shift)
                 self.optimization_suggestions.append({
                     'texture': path,
                     'type': 'oversized',
                     'current_size': f"{width}x{height}",
-                    'suggested_size': f"{self.MAX_TEXTURE_SIZE}x{self.MAX_TEXTURE_SIZE}",
+                    'suggested_size': f"{new_width}x{new_height}",
                     'memory_save': info['memory'] - self._calculate_memory_usage(
-                        self.MAX_TEXTURE_SIZE, 
-                        self.MAX_TEXTURE_SIZE, 
-                        info['format']
+                        new_width, new_height, pixel_format,
+                        max(1, mip_levels - shift), layers, depth
                     )
                 })
                 
             # 检查未压缩的贴图
             if not info['compressed'] and info['size'] > 1024 * 1024:  # 1MB
+                target_format = 'BC7' if has_alpha(pixel_format) else 'BC1'
                 self.optimization_suggestions.append({
                     'texture': path,
                     'type': 'uncompressed',
                     'current_size': self._format_size(info['size']),
-                    'suggested_format': 'DDS/BC7',
-                    'memory_save': info['memory'] * 0.75  # 估计压缩后可节省75%
+                    'suggested_format': f'DDS/{target_format}',
+                    'memory_save': info['memory'] - self._calculate_memory_usage(
+                        width, height, target_format, mip_levels, layers, depth
+                    )
+                })
+                
+    def analyze_content(self, max_dimension: int = MAX_ANALYSIS_DIMENSION):
+        """
+        可选的贴图内容分析
+        
+        以降低的分辨率解码每张贴图, 统计各级mip高频能量、alpha使用、
+        灰度/纯色, 给出安全的缩小、通道精简和通道打包建议。
+        """
+        for path, info in self.textures.items():
+            try:
+                content = (self.cache.get(self.CONTENT_CACHE_KIND, path)
+                           if self.cache else None)
+                if content is None:
+                    content = analyze_texture_content(path, max_dimension)
+                    if self.cache:
+                        self.cache.put(self.CONTENT_CACHE_KIND, path, content)
+                self.content_stats[path] = content
+                self.optimization_suggestions.extend(
+                    self._content_suggestions(path, info, content)
+                )
+            except Exception as e:
+                print(f"Error analyzing texture content {path}: {e}")
+                
+        self.optimization_suggestions.extend(self._channel_pack_suggestions())
+        
+    def _content_suggestions(self, path: str, info: dict, content: dict) -> List[Dict]:
+        """根据单张贴图的内容统计生成建议"""
+        suggestions = []
+        width, height = info['dimensions']
+        pixel_format = info['pixel_format']
+        
+        def memory_as(new_width, new_height, new_format, mip_levels=info['mip_levels']):
+            return self._calculate_memory_usage(
+                new_width, new_height, new_format, mip_levels, info['layers'], info['depth']
+            )
+            
+        if content['constant']:
+            suggestions.append({
+                'texture': path,
+                'type': 'constant_color',
+                'color': content['mean_color'],
+                'memory_save': info['memory'] - memory_as(4, 4, pixel_format, 1)
+            })
+            return suggestions
+            
+        # 缩小: 高频能量可忽略的顶层mip, 不低于MIN_TEXTURE_SIZE
+        shift = content['safe_downscale']
+        while shift and max(width, height) >> shift < self.MIN_TEXTURE_SIZE:
+            shift -= 1
+        if shift:
+            new_width, new_height = max(1, width >> shift), max(1, height >> shift)
+            suggestions.append({
+                'texture': path,
+                'type': 'content_downscale',
+                'current_size': f"{width}x{height}",
+                'suggested_size': f"{new_width}x{new_height}",
+                'memory_save': info['memory'] - memory_as(
+                    new_width, new_height, pixel_format, max(1, info['mip_levels'] - shift)
+                )
+            })
+            
+        # 灰度图用单通道格式存储
+        if content['grayscale'] and content['alpha_usage'] in ('none', 'opaque') \
+                and pixel_format not in ('L8', 'L16', 'R8', 'R16', 'BC4', 'EAC_R11'):
+            target_format = 'BC4' if info['compressed'] else 'R8'
+            suggestions.append({
+                'texture': path,
+                'type': 'single_channel',
+                'suggested_format': target_format,
+                'memory_save': info['memory'] - memory_as(width, height, target_format)
+            })
+        elif content['alpha_usage'] == 'opaque' and pixel_format in self.OPAQUE_FORMATS:
+            target_format = self.OPAQUE_FORMATS[pixel_format]
+            suggestions.append({
+                'texture': path,
+                'type': 'unused_alpha',
+                'suggested_format': target_format,
+                'memory_save': info['memory'] - memory_as(width, height, target_format)
+            })
+        elif content['alpha_usage'] == 'binary' and pixel_format in self.BINARY_ALPHA_FORMATS:
+            target_format = self.BINARY_ALPHA_FORMATS[pixel_format]
+            suggestions.append({
+                'texture': path,
+                'type': 'binary_alpha',
+                'suggested_format': target_format,
+                'memory_save': info['memory'] - memory_as(width, height, target_format)
+            })
+        return suggestions
+        
+    def _channel_pack_suggestions(self) -> List[Dict]:
+        """同目录、同尺寸的灰度贴图每4张打包进一张RGBA贴图"""
+        groups = defaultdict(list)
+        for path, content in self.content_stats.items():
+            info = self.textures[path]
+            if (content['grayscale'] and not content['constant']
+                    and content['alpha_usage'] in ('none', 'opaque')):
+                groups[(os.path.dirname(path), info['dimensions'])].append(path)
+                
+        suggestions = []
+        for (_, (width, height)), paths in sorted(groups.items()):
+            paths.sort()
+            for start in range(0, len(paths), 4):
+                members = paths[start:start + 4]
+                if len(members) < 2:
+                    continue
+                infos = [self.textures[path] for path in members]
+                compressed = any(info['compressed'] for info in infos)
+                packed_format = 'BC7' if compressed else 'RGBA8'
+                packed_memory = self._calculate_memory_usage(
+                    width, height, packed_format,
+                    max(info['mip_levels'] for info in infos),
+                    max(info['layers'] for info in infos),
+                    max(info['depth'] for info in infos)
+                )
+                suggestions.append({
+                    'texture': members[0],
+                    'type': 'channel_pack',
+                    'textures': members,
+                    'suggested_format': packed_format,
+                    'texture_fetches_saved': len(members) - 1,
+                    'memory_save': max(0, sum(info['memory'] for info in infos) - packed_memory)
                 })
+        return suggestions
+        
+    def find_duplicates(self, max_distance: int = 6, hash_kind: str = 'phash') -> List[Dict]:
+        """
+        按感知哈希查找近似重复的贴图
+        
+        参数:
+            max_distance: 64位哈希允许的最大汉明距离
+            hash_kind: 'phash' 或 'dhash'
+            
+        返回:
+            List: 重复簇, 保留显存最大的一张, 其余可合并
+        """
+        for path in self.textures:
+            if path in self.perceptual_hashes:
+                continue
+            try:
+                hashes = self.cache.get(self.HASH_CACHE_KIND, path) if self.cache else None
+                if hashes is None:
+                    hashes = perceptual_hashes(path)
+                    if self.cache:
+                        self.cache.put(self.HASH_CACHE_KIND, path, hashes)
+                self.perceptual_hashes[path] = hashes
+            except Exception as e:
+                print(f"Error hashing texture {path}: {e}")
+                
+        clusters = cluster_duplicates(
+            {path: hashes[hash_kind] for path, hashes in self.perceptual_hashes.items()},
+            max_distance
+        )
+        
+        self.duplicate_clusters = []
+        for members in clusters:
+            keep = min(members, key=lambda path: (-self.textures[path]['memory'], path))
+            reclaimable = sum(self.textures[path]['memory'] for path in members if path != keep)
+            self.duplicate_clusters.append({
+                'keep': keep,
+                'duplicates': [path for path in members if path != keep],
+                'reclaimable_memory': reclaimable
+            })
+        self.duplicate_clusters.sort(key=lambda c: -c['reclaimable_memory'])
+        return self.duplicate_clusters
+        
+    def _summarize_content(self) -> Dict:
+        """内容分析统计"""
+        alpha_usage = defaultdict(int)
+        for content in self.content_stats.values():
+            alpha_usage[content['alpha_usage']] += 1
+        return {
+            'analyzed_textures': len(self.content_stats),
+            'grayscale': sum(1 for c in self.content_stats.values() if c['grayscale']),
+            'constant': sum(1 for c in self.content_stats.values() if c['constant']),
+            'downscale_candidates': sum(
+                1 for c in self.content_stats.values() if c['safe_downscale']
+            ),
+            'alpha_usage': dict(alpha_usage)
+        }
+        
+    def estimate_platform_memory(self) -> Dict[str, Dict]:
+        """
+        估算各目标平台的贴图显存占用
+        
+        未压缩或平台不支持的格式按平台格式转换, 并生成完整mip链,
+        结果与platform_budgets中的预算比较。
+        """
+        estimates = {}
+        for platform, budget in self.platform_budgets.items():
+            memory = sum(
+                platform_texture_memory(
+                    info['dimensions'][0], info['dimensions'][1], info['pixel_format'],
+                    platform, info['layers'], info['depth']
+                )
+                for info in self.textures.values()
+            )
+            estimates[platform] = {
+                'memory': self._format_size(memory),
+                'budget': self._format_size(budget),
+                'utilization': round(memory / budget, 4) if budget else None,
+                'over_budget': memory > budget
+            }
+        return estimates
                 
     def _format_size(self, size_in_bytes: int) -> str:
         """格式化文件大小"""
@@ -183,7 +464,21 @@ class TextureAnalyzer:
                 'compression_stats': {
                     'compressed': self.stats['compressed_count'],
                     'uncompressed': self.stats['uncompressed_count']
-                }
+                },
+                'missing_mips': self.stats['missing_mips_count']
+            },
+            'platform_memory': self.estimate_platform_memory(),
+            'content_analysis': self._summarize_content(),
+            'duplicates': {
+                'clusters': len(self.duplicate_clusters),
+                'duplicate_textures': sum(len(c['duplicates']) for c in self.duplicate_clusters),
+                'reclaimable_memory': self._format_size(
+                    sum(c['reclaimable_memory'] for c in self.duplicate_clusters)
+                ),
+                'groups': [
+                    dict(c, reclaimable_memory=self._format_size(c['reclaimable_memory']))
+                    for c in self.duplicate_clusters
+                ]
             },
             'optimization_potential': {
                 'total_suggestions': len(self.optimization_suggestions),
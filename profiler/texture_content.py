@@ -0,0 +1,204 @@
+"""
+Texture Content Statistics
+-------------------------
+
+这个工具用于按贴图内容给出降采样和通道打包建议，主要功能：
+
+1. 统计维度:
+   - 每级mip的高频能量(该级相对下一级丢失的细节)
+   - alpha通道使用情况(全不透明 / 二值 / 渐变)
+   - 是否为灰度图或纯色图
+
+2. 优化目标:
+   - JPEG解码时用PIL draft直接得到低分辨率图像, 其他格式解码后用reduce缩小
+   - NumPy向量化统计, 按行分块处理, 8k贴图也只占用有限内存
+
+3. 使用方法:
+   stats = analyze_texture_content(path)
+   stats['safe_downscale'], stats['alpha_usage'], stats['grayscale']
+
+注意: PIL只对JPEG支持按比例缩小解码。PNG/TGA等格式总是以原分辨率
+完整解码一次(8k RGBA约256MB), 之后才缩小到分析分辨率, 峰值内存和解码
+时间与原图大小成正比; 后续统计只在缩小后的图像上按行分块进行。
+
+分析分辨率低于原图时, 原图最高几级mip的能量无法直接测量。
+自然图像的频谱随频率衰减, 因此只有在最细的已测频段能量可以忽略时,
+才推断更高频段同样可以忽略。
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+MAX_ANALYSIS_DIMENSION = 2048  # 内容分析的最大分辨率
+BAND_ROWS = 256                # 每次处理的行数, 必须为偶数
+HIGH_FREQUENCY_THRESHOLD = 0.03  # 相对能量低于此值的mip层视为可丢弃
+GRAYSCALE_TOLERANCE = 4        # 各通道最大差值不超过此值视为灰度
+CONSTANT_TOLERANCE = 4         # 各通道取值范围不超过此值视为纯色
+MIN_ENERGY_SIZE = 4            # mip金字塔的最小边长
+
+LUMINANCE_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def convert_8bit(img: Image.Image) -> Image.Image:
+    """
+    转换为8位的L/RGB/RGBA图像
+
+    16位和32位整数灰度按0~65535线性缩放到0~255(直接convert('L')会截断到255);
+    调色板和1位图像展开为RGB(A)/L。reduce只支持8位模式, 需要先转换。
+    """
+    if img.mode.startswith('I'):
+        pixels = np.clip(np.asarray(img), 0, 65535) // 257
+        return Image.fromarray(pixels.astype(np.uint8), 'L')
+    if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+        mode = 'RGBA'
+    elif img.mode in ('1', 'L', 'F'):
+        mode = 'L'
+    else:
+        mode = 'RGB'
+    return img if img.mode == mode else img.convert(mode)
+
+def load_reduced(path: str, max_dimension: int = MAX_ANALYSIS_DIMENSION) -> Tuple[np.ndarray, int]:
+    """
+    以降低的分辨率解码贴图
+
+    只有JPEG在解码阶段缩小; 其他格式先完整解码并转换为8位, 再reduce,
+    峰值内存为原图大小。
+
+    返回:
+        (uint8数组 H×W×C, 缩小的mip级数)
+    """
+    with Image.open(path) as img:
+        original_width = img.size[0]
+        target = (max(1, img.size[0] * max_dimension // max(img.size)),
+                  max(1, img.size[1] * max_dimension // max(img.size)))
+        # JPEG在解码阶段按1/2/4/8缩小; 其他格式draft无效果, 下面的转换会触发完整解码
+        img.draft(img.mode, target)
+        img = convert_8bit(img)
+
+        factor = 1
+        while max(img.size) // factor > max_dimension:
+            factor *= 2
+        if factor > 1:
+            img = img.reduce(factor)
+        pixels = np.asarray(img, dtype=np.uint8)
+
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    levels = max(0, int(round(np.log2(original_width / pixels.shape[1]))))
+    return pixels, levels
+
+def _luminance(band: np.ndarray) -> np.ndarray:
+    """像素块转换为float32亮度"""
+    if band.shape[2] >= 3:
+        return band[:, :, :3].astype(np.float32) @ LUMINANCE_WEIGHTS
+    return band[:, :, 0].astype(np.float32)
+
+def _downsample_energy(level: np.ndarray, band_rows: int) -> Tuple[float, np.ndarray]:
+    """
+    2x2平均降采样, 统计降采样丢失的细节能量
+
+    返回:
+        (残差平方和, 下一级亮度图)
+    """
+    height = level.shape[0] // 2 * 2
+    width = level.shape[1] // 2 * 2
+    next_level = np.empty((height // 2, width // 2), dtype=np.float32)
+    energy = 0.0
+    for start in range(0, height, band_rows):
+        band = level[start:min(start + band_rows, height), :width]
+        if band.dtype != np.float32:
+            band = _luminance(band)
+        blocks = band.reshape(band.shape[0] // 2, 2, width // 2, 2)
+        mean = blocks.mean(axis=(1, 3))
+        next_level[start // 2:start // 2 + mean.shape[0]] = mean
+        energy += float(np.square(blocks - mean[:, np.newaxis, :, np.newaxis]).sum())
+    return energy, next_level
+
+def mip_energies(pixels: np.ndarray, band_rows: int = BAND_ROWS) -> List[float]:
+    """每级mip相对下一级丢失的高频能量, 以全图方差归一化"""
+    pixel_count = pixels.shape[0] * pixels.shape[1]
+    total = 0.0
+    total_sq = 0.0
+    for start in range(0, pixels.shape[0], band_rows):
+        luminance = _luminance(pixels[start:start + band_rows])
+        total += float(luminance.sum(dtype=np.float64))
+        total_sq += float(np.square(luminance, dtype=np.float64).sum())
+    variance = total_sq / pixel_count - (total / pixel_count) ** 2
+    if variance <= 1e-6:
+        return []
+
+    energies = []
+    level = pixels
+    while min(level.shape[0], level.shape[1]) >= MIN_ENERGY_SIZE:
+        level_pixels = (level.shape[0] // 2 * 2) * (level.shape[1] // 2 * 2)
+        energy, level = _downsample_energy(level, band_rows)
+        energies.append(energy / level_pixels / variance)
+    return energies
+
+def channel_stats(pixels: np.ndarray, band_rows: int = BAND_ROWS) -> Dict:
+    """按行分块统计alpha使用、灰度和纯色"""
+    channels = pixels.shape[2]
+    color_channels = min(channels, 3)
+    minimum = np.full(channels, 255, dtype=np.uint8)
+    maximum = np.zeros(channels, dtype=np.uint8)
+    max_spread = 0
+    binary_alpha = True
+
+    for start in range(0, pixels.shape[0], band_rows):
+        band = pixels[start:start + band_rows]
+        flat = band.reshape(-1, channels)
+        minimum = np.minimum(minimum, flat.min(axis=0))
+        maximum = np.maximum(maximum, flat.max(axis=0))
+        if color_channels == 3:
+            color = flat[:, :3]
+            spread = int((color.max(axis=1).astype(np.int16) - color.min(axis=1)).max())
+            max_spread = max(max_spread, spread)
+        if channels == 4 and binary_alpha:
+            alpha = flat[:, 3]
+            binary_alpha = bool(np.all((alpha == 0) | (alpha == 255)))
+
+    if channels < 4 or minimum[3] == 255:
+        alpha_usage = 'opaque' if channels == 4 else 'none'
+    elif binary_alpha:
+        alpha_usage = 'binary'
+    else:
+        alpha_usage = 'gradient'
+
+    ranges = maximum[:color_channels].astype(np.int16) - minimum[:color_channels]
+    return {
+        'alpha_usage': alpha_usage,
+        'grayscale': max_spread <= GRAYSCALE_TOLERANCE,
+        'constant': bool(ranges.max() <= CONSTANT_TOLERANCE),
+        'mean_color': [int(v) for v in (minimum.astype(np.int16) + maximum) // 2]
+    }
+
+def analyze_texture_content(path: str, max_dimension: int = MAX_ANALYSIS_DIMENSION,
+                            band_rows: int = BAND_ROWS) -> Dict:
+    """
+    分析单个贴图的内容
+
+    返回:
+        Dict: alpha使用、灰度/纯色判断、各级mip高频能量和可安全缩小的mip级数
+    """
+    pixels, skipped_levels = load_reduced(path, max_dimension)
+    stats = channel_stats(pixels, band_rows)
+    energies = mip_energies(pixels, band_rows) if not stats['constant'] else []
+
+    # 从最细的已测频段开始, 连续可忽略的层数
+    negligible = 0
+    for energy in energies:
+        if energy >= HIGH_FREQUENCY_THRESHOLD:
+            break
+        negligible += 1
+    safe_downscale = skipped_levels + negligible if negligible else 0
+
+    stats.update({
+        'analyzed_size': (pixels.shape[1], pixels.shape[0]),
+        'mip_energy': [
+            {'level': skipped_levels + i, 'energy': round(energy, 6)}
+            for i, energy in enumerate(energies)
+        ],
+        'safe_downscale': safe_downscale
+    })
+    return stats
@@ -0,0 +1,150 @@
+"""
+Texture Perceptual Hash Deduplication
+------------------------------------
+
+这个工具用于查找近似重复的贴图，主要功能：
+
+1. 感知哈希:
+   - dHash: 9x8灰度图相邻像素的明暗梯度
+   - pHash: 32x32灰度图DCT低频8x8系数与中值比较
+   - 两者都是64位整数, 对重新导出、缩放、轻微调色不敏感
+
+2. 近邻查找:
+   - 多索引汉明查找: 哈希分段建桶, 只比较至少一段相同的哈希
+   - 桶内比较用NumPy向量化, 避免Python层的两两比较
+   - 按传递闭包合并为重复簇
+
+3. 使用方法:
+   hashes = {path: perceptual_hashes(path)['phash'] for path in paths}
+   cluster_duplicates(hashes, max_distance=6)
+"""
+
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image
+
+from texture_content import convert_8bit
+
+HASH_SIZE = 8
+PHASH_SIZE = 32
+BLOCK_ROWS = 1024  # 桶内比较每次处理的行数
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """正交DCT-II变换矩阵"""
+    k = np.arange(size)[:, np.newaxis]
+    n = np.arange(size)[np.newaxis, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+DCT_MATRIX = _dct_matrix(PHASH_SIZE)
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """布尔数组按行优先打包为整数"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+def dhash(gray: Image.Image) -> int:
+    """差值哈希: 每行相邻像素的明暗关系"""
+    pixels = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR),
+                        dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+def phash(gray: Image.Image) -> int:
+    """DCT感知哈希: 低频系数(去掉直流分量)与中值比较"""
+    pixels = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.BILINEAR),
+                        dtype=np.float32)
+    coefficients = DCT_MATRIX @ pixels @ DCT_MATRIX.T
+    low = coefficients[:HASH_SIZE, :HASH_SIZE].ravel()
+    median = np.median(low[1:])
+    return _bits_to_int(low > median)
+
+def perceptual_hashes(path: str) -> Dict[str, int]:
+    """解码小尺寸灰度图并计算dHash和pHash"""
+    with Image.open(path) as img:
+        # JPEG直接按1/8解码, 其他格式先转为8位灰度(reduce不支持调色板和16位),
+        # 再用reduce缩到小尺寸后重采样
+        img.draft('L', (PHASH_SIZE * 2, PHASH_SIZE * 2))
+        gray = convert_8bit(img).convert('L')
+        factor = max(1, min(gray.size) // (PHASH_SIZE * 2))
+        if factor > 1:
+            gray = gray.reduce(factor)
+    return {'dhash': dhash(gray), 'phash': phash(gray)}
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """uint64数组逐元素统计置位数"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def near_duplicate_pairs(hashes: np.ndarray, max_distance: int,
+                         block_rows: int = BLOCK_ROWS) -> np.ndarray:
+    """
+    多索引汉明查找: 返回汉明距离不超过max_distance的下标对
+
+    把64位哈希切成max_distance+1段, 由抽屉原理, 距离不超过max_distance的
+    两个哈希至少有一段完全相同; 只在同段值的桶内做向量化比较。
+
+    参数:
+        hashes: 去重后的uint64哈希数组
+
+    返回:
+        np.ndarray: N×2下标对(可能重复)
+    """
+    segments = max_distance + 1
+    bounds = np.linspace(0, 64, segments + 1).astype(int)
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        keys = (hashes >> np.uint64(low)) & np.uint64((1 << int(high - low)) - 1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        multiple = ends - starts > 1
+        for start, end in zip(starts[multiple], ends[multiple]):
+            members = order[start:end]
+            member_hashes = hashes[members]
+            # 大桶按行分块, 内存与block_rows×桶大小成正比
+            for row in range(0, len(members) - 1, block_rows):
+                rows = slice(row, min(row + block_rows, len(members)))
+                distance = popcount(member_hashes[rows, np.newaxis] ^ member_hashes[np.newaxis, :])
+                row_index, col_index = np.nonzero(distance <= max_distance)
+                row_index += row
+                upper = col_index > row_index
+                pairs.append(np.stack([members[row_index[upper]], members[col_index[upper]]], axis=1))
+    return np.concatenate(pairs)
+
+def cluster_duplicates(hashes: Dict[str, int], max_distance: int) -> List[List[str]]:
+    """
+    把哈希距离不超过max_distance的贴图合并为重复簇(传递闭包)
+
+    返回:
+        List: 每个簇的路径列表(至少两个成员)
+    """
+    paths = list(hashes)
+    values = np.array([hashes[path] for path in paths], dtype=np.uint64)
+    # 哈希相同的贴图先归为一组, 只在不同的哈希之间查找
+    unique, inverse = np.unique(values, return_inverse=True)
+
+    parent = list(range(len(unique)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for a, b in near_duplicate_pairs(unique, max_distance).tolist():
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = {}
+    for path, index in zip(paths, inverse.ravel().tolist()):
+        clusters.setdefault(find(index), []).append(path)
+    return sorted(
+        (sorted(members) for members in clusters.values() if len(members) > 1),
+        key=lambda members: members[0]
+    )
@@ -0,0 +1,158 @@
+"""
+Texture GPU Memory Model
+-----------------------
+
+这个工具用于按真实像素格式计算贴图显存占用，主要功能：
+
+1. 格式支持:
+   - 未压缩格式按每像素字节数计算(RGB8等三通道格式按GPU实际的4字节对齐)
+   - BC1~BC7、ETC1/ETC2/EAC、ASTC NxM 按压缩块计算
+   - 完整mip链、立方体贴图面、数组层和体积贴图深度
+
+2. 平台预算:
+   - 按目标平台的压缩格式做what-if估算
+   - 与平台显存预算比较
+
+3. 使用方法:
+   texture_memory(2048, 2048, 'BC7', mip_levels=12)
+   platform_texture_memory(2048, 2048, 'RGBA8', 'mobile')
+"""
+
+import re
+from typing import Optional, Tuple
+
+# 未压缩格式每像素字节数(GPU上的实际存储大小)
+BYTES_PER_PIXEL = {
+    'R8': 1, 'A8': 1, 'L8': 1, 'RG8': 2, 'LA8': 2,
+    'RGB8': 4, 'RGBA8': 4, 'P8': 4, 'CMYK8': 4,  # 24位和调色板格式在GPU上展开为RGBA8
+    'R16': 2, 'L16': 2, 'R16F': 2, 'RG16': 4, 'LA16': 4, 'RG16F': 4,
+    'RGB16': 8, 'RGBA16': 8, 'RGBA16F': 8,
+    'R32F': 4, 'RG32F': 8, 'RGB32F': 12, 'RGBA32F': 16,
+    'RGB565': 2, 'RGB5A1': 2, 'RGBA4': 2, 'RGB10A2': 4, 'RG11B10F': 4
+}
+
+# PIL模式 -> 像素格式(文件头无法识别时使用)
+PIL_MODES = {
+    '1': 'L8', 'L': 'L8', 'P': 'P8', 'LA': 'LA8', 'PA': 'P8', 'RGB': 'RGB8',
+    'RGBA': 'RGBA8', 'RGBX': 'RGBA8', 'CMYK': 'CMYK8', 'YCbCr': 'RGB8',
+    'I;16': 'L16', 'I;16B': 'L16', 'I': 'R32F', 'F': 'R32F'
+}
+
+# 块压缩格式 -> (块宽, 块高, 每块字节数)
+BLOCK_FORMATS = {
+    'BC1': (4, 4, 8), 'BC4': (4, 4, 8),
+    'BC2': (4, 4, 16), 'BC3': (4, 4, 16), 'BC5': (4, 4, 16),
+    'BC6H': (4, 4, 16), 'BC7': (4, 4, 16),
+    'ETC1': (4, 4, 8), 'ETC2_RGB8': (4, 4, 8), 'ETC2_RGB8A1': (4, 4, 8),
+    'EAC_R11': (4, 4, 8), 'ETC2_RGBA8': (4, 4, 16), 'EAC_RG11': (4, 4, 16),
+    'BASIS': (4, 4, 16)  # 运行时转码, 按BC7/ASTC 4x4的上限估算
+}
+
+# 带alpha通道的格式(调色板格式可能含透明色, 按带alpha处理)
+ALPHA_FORMATS = {
+    'A8', 'LA8', 'LA16', 'P8', 'RGBA8', 'RGBA16', 'RGBA16F', 'RGBA32F',
+    'RGB5A1', 'RGBA4', 'RGB10A2',
+    'BC2', 'BC3', 'BC7', 'ETC2_RGBA8', 'ETC2_RGB8A1', 'BASIS'
+}
+
+ASTC_PATTERN = re.compile(r'ASTC_(\d+)x(\d+)$')
+
+# 目标平台: 支持的压缩格式族、转换目标格式和显存预算
+PLATFORM_PROFILES = {
+    'pc': {
+        'families': ('BC',),
+        'opaque_format': 'BC1',
+        'alpha_format': 'BC7',
+        'budget': 2048 * 1024 * 1024
+    },
+    'console': {
+        'families': ('BC',),
+        'opaque_format': 'BC7',
+        'alpha_format': 'BC7',
+        'budget': 3072 * 1024 * 1024
+    },
+    'mobile': {
+        'families': ('ASTC', 'ETC', 'EAC'),
+        'opaque_format': 'ASTC_6x6',
+        'alpha_format': 'ASTC_4x4',
+        'budget': 512 * 1024 * 1024
+    },
+    'mobile_low': {
+        'families': ('ETC', 'EAC'),
+        'opaque_format': 'ETC2_RGB8',
+        'alpha_format': 'ETC2_RGBA8',
+        'budget': 256 * 1024 * 1024
+    }
+}
+
+def normalize_pixel_format(pixel_format: str) -> str:
+    """PIL模式转换为像素格式命名, 其他格式原样返回"""
+    return PIL_MODES.get(pixel_format, pixel_format)
+
+def block_info(pixel_format: str) -> Optional[Tuple[int, int, int]]:
+    """块压缩格式的(块宽, 块高, 每块字节数), 未压缩格式返回None"""
+    if pixel_format in BLOCK_FORMATS:
+        return BLOCK_FORMATS[pixel_format]
+    match = ASTC_PATTERN.match(pixel_format)
+    if match:
+        return int(match.group(1)), int(match.group(2)), 16
+    return None
+
+def is_block_compressed(pixel_format: str) -> bool:
+    """是否为GPU块压缩格式"""
+    return block_info(pixel_format) is not None
+
+def has_alpha(pixel_format: str) -> bool:
+    """像素格式是否带alpha通道"""
+    pixel_format = normalize_pixel_format(pixel_format)
+    if pixel_format in ALPHA_FORMATS:
+        return True
+    # ASTC是否带alpha无法从格式判断, 按带alpha处理
+    return ASTC_PATTERN.match(pixel_format) is not None
+
+def full_mip_count(width: int, height: int, depth: int = 1) -> int:
+    """完整mip链的层数"""
+    return max(width, height, depth, 1).bit_length()
+
+def texture_memory(width: int, height: int, pixel_format: str, mip_levels: int = 1,
+                   layers: int = 1, depth: int = 1) -> int:
+    """
+    计算贴图显存占用
+
+    参数:
+        pixel_format: 像素格式(texture_probe命名或PIL模式)
+        mip_levels: mip层数
+        layers: 数组层数 × 立方体面数
+
+    返回:
+        int: 字节数
+    """
+    pixel_format = normalize_pixel_format(pixel_format)
+    block = block_info(pixel_format)
+    block_w, block_h, block_bytes = block or (1, 1, BYTES_PER_PIXEL.get(pixel_format, 4))
+
+    total = 0
+    for level in range(max(1, mip_levels)):
+        level_w = max(1, width >> level)
+        level_h = max(1, height >> level)
+        level_d = max(1, depth >> level)
+        blocks_x = -(-level_w // block_w)
+        blocks_y = -(-level_h // block_h)
+        total += blocks_x * blocks_y * block_bytes * level_d
+    return total * max(1, layers)
+
+def platform_format(pixel_format: str, platform: str) -> str:
+    """贴图在目标平台上的存储格式: 平台已支持的压缩格式保持不变, 否则转换"""
+    profile = PLATFORM_PROFILES[platform]
+    pixel_format = normalize_pixel_format(pixel_format)
+    if is_block_compressed(pixel_format) and pixel_format.startswith(profile['families']):
+        return pixel_format
+    return profile['alpha_format'] if has_alpha(pixel_format) else profile['opaque_format']
+
+def platform_texture_memory(width: int, height: int, pixel_format: str, platform: str,
+                            layers: int = 1, depth: int = 1) -> int:
+    """what-if估算: 贴图转换为平台格式并生成完整mip链后的显存占用"""
+    return texture_memory(
+        width, height, platform_format(pixel_format, platform),
+        full_mip_count(width, height, depth), layers, depth
+    )
@@ -0,0 +1,303 @@
+"""
+Texture Header Probe
+-------------------
+
+这个工具用于只读取文件头获取贴图信息，主要功能：
+
+1. 支持格式:
+   - PNG (IHDR)
+   - JPEG (SOF标记)
+   - TGA
+   - DDS (DDS_HEADER / DX10扩展头, BCn格式和mip数量)
+   - KTX / KTX2
+   - PSD
+
+2. 优化目标:
+   - 不解码像素, 不加载PIL插件
+   - 每个文件只读取几百字节
+   - 未知格式返回None, 由调用方退回PIL
+
+3. 使用方法:
+   info = probe_texture(path)
+   info['width'], info['height'], info['pixel_format'], info['mip_levels']
+
+像素格式命名: 未压缩格式为通道+位数(如 RGBA8 / RGB8 / L8 / RGBA16F),
+块压缩格式为 BC1~BC7 / ETC1 / ETC2_RGB8 / ETC2_RGBA8 / EAC_R11 / ASTC_4x4 等。
+"""
+
+import os
+import struct
+from typing import Dict, Optional
+
+HEADER_BYTES = 148  # DDS头(4+124)加DX10扩展头(20)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+KTX_SIGNATURE = b'\xabKTX 11\xbb\r\n\x1a\n'
+KTX2_SIGNATURE = b'\xabKTX 20\xbb\r\n\x1a\n'
+
+# PNG颜色类型 -> 通道
+PNG_COLOR_TYPES = {0: 'L', 2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+
+# JPEG帧起始标记(SOF0~SOF15, 排除DHT/JPG/DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_COMPONENTS = {1: 'L8', 3: 'RGB8', 4: 'CMYK8'}
+
+ASTC_BLOCKS = ['4x4', '5x4', '5x5', '6x5', '6x6', '8x5', '8x6', '8x8',
+               '10x5', '10x6', '10x8', '10x10', '12x10', '12x12']
+
+# DDS FourCC -> 像素格式 (含D3DFMT数值形式的浮点格式)
+DDS_FOURCC = {
+    b'DXT1': 'BC1', b'DXT2': 'BC2', b'DXT3': 'BC2', b'DXT4': 'BC3', b'DXT5': 'BC3',
+    b'ATI1': 'BC4', b'BC4U': 'BC4', b'BC4S': 'BC4',
+    b'ATI2': 'BC5', b'BC5U': 'BC5', b'BC5S': 'BC5',
+    b'ETC ': 'ETC1', b'ETC1': 'ETC1',
+    struct.pack('<I', 36): 'RGBA16', struct.pack('<I', 111): 'R16F',
+    struct.pack('<I', 112): 'RG16F', struct.pack('<I', 113): 'RGBA16F',
+    struct.pack('<I', 114): 'R32F', struct.pack('<I', 115): 'RG32F',
+    struct.pack('<I', 116): 'RGBA32F'
+}
+
+# DXGI_FORMAT -> 像素格式
+DXGI_FORMATS = {
+    2: 'RGBA32F', 6: 'RGB32F', 10: 'RGBA16F', 11: 'RGBA16', 16: 'RG32F',
+    24: 'RGB10A2', 26: 'RG11B10F', 27: 'RGBA8', 28: 'RGBA8', 29: 'RGBA8',
+    34: 'RG16F', 35: 'RG16', 41: 'R32F', 49: 'RG8', 54: 'R16F', 56: 'R16',
+    61: 'R8', 65: 'A8', 85: 'RGB565', 86: 'RGB5A1', 87: 'RGBA8', 88: 'RGBA8',
+    90: 'RGBA8', 91: 'RGBA8', 92: 'RGBA8', 93: 'RGBA8', 115: 'RGBA4'
+}
+DXGI_FORMATS.update({code: 'BC1' for code in (70, 71, 72)})
+DXGI_FORMATS.update({code: 'BC2' for code in (73, 74, 75)})
+DXGI_FORMATS.update({code: 'BC3' for code in (76, 77, 78)})
+DXGI_FORMATS.update({code: 'BC4' for code in (79, 80, 81)})
+DXGI_FORMATS.update({code: 'BC5' for code in (82, 83, 84)})
+DXGI_FORMATS.update({code: 'BC6H' for code in (94, 95, 96)})
+DXGI_FORMATS.update({code: 'BC7' for code in (97, 98, 99)})
+
+# OpenGL internalformat (KTX1) -> 像素格式
+GL_FORMATS = {
+    0x8229: 'R8', 0x822B: 'RG8', 0x8051: 'RGB8', 0x8058: 'RGBA8',
+    0x8C41: 'RGB8', 0x8C43: 'RGBA8', 0x822D: 'R16F', 0x822F: 'RG16F',
+    0x881A: 'RGBA16F', 0x8814: 'RGBA32F', 0x8D62: 'RGB565', 0x8056: 'RGBA4',
+    0x8057: 'RGB5A1', 0x8059: 'RGB10A2', 0x8C3A: 'RG11B10F',
+    0x83F0: 'BC1', 0x83F1: 'BC1', 0x83F2: 'BC2', 0x83F3: 'BC3',
+    0x8C4C: 'BC1', 0x8C4D: 'BC1', 0x8C4E: 'BC2', 0x8C4F: 'BC3',
+    0x8DBB: 'BC4', 0x8DBC: 'BC4', 0x8DBD: 'BC5', 0x8DBE: 'BC5',
+    0x8E8C: 'BC7', 0x8E8D: 'BC7', 0x8E8E: 'BC6H', 0x8E8F: 'BC6H',
+    0x8D64: 'ETC1', 0x9270: 'EAC_R11', 0x9271: 'EAC_R11',
+    0x9272: 'EAC_RG11', 0x9273: 'EAC_RG11',
+    0x9274: 'ETC2_RGB8', 0x9275: 'ETC2_RGB8',
+    0x9276: 'ETC2_RGB8A1', 0x9277: 'ETC2_RGB8A1',
+    0x9278: 'ETC2_RGBA8', 0x9279: 'ETC2_RGBA8'
+}
+for _i, _block in enumerate(ASTC_BLOCKS):
+    GL_FORMATS[0x93B0 + _i] = GL_FORMATS[0x93D0 + _i] = f'ASTC_{_block}'
+
+# VkFormat (KTX2) -> 像素格式
+VK_FORMATS = {
+    0: 'BASIS',  # 超压缩格式, 运行时转码
+    2: 'RGBA4', 3: 'RGBA4', 4: 'RGB565', 5: 'RGB565', 6: 'RGB5A1', 7: 'RGB5A1',
+    9: 'R8', 15: 'R8', 16: 'RG8', 22: 'RG8', 23: 'RGB8', 29: 'RGB8',
+    37: 'RGBA8', 43: 'RGBA8', 44: 'RGBA8', 50: 'RGBA8', 64: 'RGB10A2',
+    76: 'R16F', 83: 'RG16F', 97: 'RGBA16F', 100: 'R32F', 103: 'RG32F',
+    109: 'RGBA32F', 122: 'RG11B10F'
+}
+for _i, _fmt in enumerate(['BC1', 'BC1', 'BC2', 'BC3', 'BC4', 'BC5', 'BC6H', 'BC7',
+                           'ETC2_RGB8', 'ETC2_RGB8A1', 'ETC2_RGBA8', 'EAC_R11', 'EAC_RG11']):
+    # 每种格式按(unorm, srgb/snorm)成对编号, BC1的RGB/RGBA两种各占一对
+    start = 131 + 2 * _i
+    VK_FORMATS[start] = VK_FORMATS[start + 1] = _fmt
+for _i, _block in enumerate(ASTC_BLOCKS):
+    VK_FORMATS[157 + 2 * _i] = VK_FORMATS[158 + 2 * _i] = f'ASTC_{_block}'
+
+# DDS_PIXELFORMAT标志
+DDPF_ALPHAPIXELS = 0x1
+DDPF_ALPHA = 0x2
+DDPF_FOURCC = 0x4
+DDPF_LUMINANCE = 0x20000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSCAPS2_CUBEMAP = 0x200
+DDSCAPS2_VOLUME = 0x200000
+DDS_RESOURCE_MISC_TEXTURECUBE = 0x4
+
+def probe_texture(path: str) -> Optional[Dict]:
+    """
+    只读取文件头获取贴图信息
+
+    返回:
+        Dict: format(容器格式)、width、height、pixel_format、mip_levels、
+              depth、layers、faces; 无法识别时返回None
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_BYTES)
+        if head.startswith(PNG_SIGNATURE):
+            return _probe_png(head)
+        if head.startswith(b'\xff\xd8'):
+            return _probe_jpeg(f)
+        if head.startswith(b'DDS '):
+            return _probe_dds(head)
+        if head.startswith(KTX_SIGNATURE):
+            return _probe_ktx(head)
+        if head.startswith(KTX2_SIGNATURE):
+            return _probe_ktx2(head)
+        if head.startswith(b'8BPS'):
+            return _probe_psd(head)
+        # TGA没有文件头魔数, 只按扩展名识别
+        if os.path.splitext(path)[1].lower() == '.tga':
+            return _probe_tga(head)
+    return None
+
+def _texture_info(format_name: str, width: int, height: int, pixel_format: str,
+                  mip_levels: int = 1, depth: int = 1, layers: int = 1,
+                  faces: int = 1) -> Dict:
+    return {
+        'format': format_name,
+        'width': width,
+        'height': height,
+        'pixel_format': pixel_format,
+        'mip_levels': max(1, mip_levels),
+        'depth': max(1, depth),
+        'layers': max(1, layers),
+        'faces': max(1, faces)
+    }
+
+def _probe_png(head: bytes) -> Optional[Dict]:
+    if len(head) < 29 or head[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', head[16:26])
+    channels = PNG_COLOR_TYPES.get(color_type)
+    if channels is None:
+        return None
+    # 低于8位的灰度/调色板按8位存储
+    return _texture_info('PNG', width, height, f'{channels}{max(8, bit_depth)}')
+
+def _probe_jpeg(f) -> Optional[Dict]:
+    """逐个跳过JPEG段, 直到遇到SOF帧头"""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            # 填充字节
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue  # 无长度字段的标记
+        if code == 0xD9:
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if code in JPEG_SOF_MARKERS:
+            frame = f.read(6)
+            if len(frame) < 6:
+                return None
+            _, height, width, components = struct.unpack('>BHHB', frame)
+            return _texture_info('JPEG', width, height,
+                                 JPEG_COMPONENTS.get(components, 'RGB8'))
+        f.seek(length - 2, os.SEEK_CUR)
+
+def _probe_tga(head: bytes) -> Optional[Dict]:
+    if len(head) < 18:
+        return None
+    image_type = head[2]
+    width, height, pixel_depth, descriptor = struct.unpack('<HHBB', head[12:18])
+    kind = image_type & ~0x8  # 9/10/11为对应的RLE压缩类型
+    if kind == 1:
+        pixel_format = 'P8'
+    elif kind == 2:
+        alpha_bits = descriptor & 0xF
+        pixel_format = {32: 'RGBA8', 24: 'RGB8',
+                        16: 'RGB5A1' if alpha_bits else 'RGB565',
+                        15: 'RGB565'}.get(pixel_depth)
+    elif kind == 3:
+        pixel_format = 'L16' if pixel_depth == 16 else 'L8'
+    else:
+        pixel_format = None
+    if pixel_format is None or not width or not height:
+        return None
+    return _texture_info('TGA', width, height, pixel_format)
+
+def _probe_dds(head: bytes) -> Optional[Dict]:
+    if len(head) < 128:
+        return None
+    (flags, height, width, _, depth, mip_count) = struct.unpack('<6I', head[8:32])
+    pf_flags, fourcc, bit_count = struct.unpack('<I4sI', head[80:92])
+    alpha_mask = struct.unpack('<I', head[104:108])[0]
+    caps2 = struct.unpack('<I', head[112:116])[0]
+
+    mip_levels = mip_count if flags & DDSD_MIPMAPCOUNT else 1
+    faces = 6 if caps2 & DDSCAPS2_CUBEMAP else 1
+    depth = depth if caps2 & DDSCAPS2_VOLUME else 1
+    layers = 1
+
+    if pf_flags & DDPF_FOURCC and fourcc == b'DX10':
+        if len(head) < 148:
+            return None
+        dxgi_format, _, misc_flag, array_size = struct.unpack('<4I', head[128:144])
+        pixel_format = DXGI_FORMATS.get(dxgi_format, f'DXGI_{dxgi_format}')
+        layers = array_size
+        if misc_flag & DDS_RESOURCE_MISC_TEXTURECUBE:
+            faces = 6
+    elif pf_flags & DDPF_FOURCC:
+        pixel_format = DDS_FOURCC.get(fourcc, fourcc.decode('latin-1').strip())
+    else:
+        pixel_format = _dds_uncompressed_format(pf_flags, bit_count, alpha_mask)
+    return _texture_info('DDS', width, height, pixel_format,
+                         mip_levels, depth, layers, faces)
+
+def _dds_uncompressed_format(pf_flags: int, bit_count: int, alpha_mask: int) -> str:
+    """根据DDS_PIXELFORMAT位数和掩码推断未压缩格式"""
+    has_alpha = bool(pf_flags & DDPF_ALPHAPIXELS and alpha_mask)
+    if pf_flags & DDPF_LUMINANCE:
+        if bit_count == 16:
+            return 'LA8' if has_alpha else 'L16'
+        return 'L8'
+    if pf_flags & DDPF_ALPHA:
+        return 'A8'
+    if bit_count == 32:
+        return 'RGBA8'
+    if bit_count == 24:
+        return 'RGB8'
+    if bit_count == 16:
+        if not has_alpha:
+            return 'RGB565'
+        return 'RGB5A1' if alpha_mask == 0x8000 else 'RGBA4'
+    if bit_count == 8:
+        return 'L8'
+    return f'RAW{bit_count}'
+
+def _probe_ktx(head: bytes) -> Optional[Dict]:
+    if len(head) < 64:
+        return None
+    endian = '<' if head[12:16] == b'\x01\x02\x03\x04' else '>'
+    (_, _, gl_format, internal_format, _, width, height, depth,
+     array_elements, faces, mip_levels) = struct.unpack(endian + '11I', head[16:60])
+    pixel_format = GL_FORMATS.get(internal_format, f'GL_{internal_format:#06x}')
+    return _texture_info('KTX', width, max(1, height), pixel_format,
+                         mip_levels, depth, array_elements, faces)
+
+def _probe_ktx2(head: bytes) -> Optional[Dict]:
+    if len(head) < 48:
+        return None
+    (vk_format, _, width, height, depth, layers, faces, levels,
+     supercompression) = struct.unpack('<9I', head[12:48])
+    pixel_format = VK_FORMATS.get(vk_format, f'VK_{vk_format}')
+    if supercompression and vk_format == 0:
+        pixel_format = 'BASIS'
+    return _texture_info('KTX2', width, max(1, height), pixel_format,
+                         levels, depth, layers, faces)
+
+def _probe_psd(head: bytes) -> Optional[Dict]:
+    if len(head) < 26:
+        return None
+    channels, height, width, bit_depth, color_mode = struct.unpack('>HIIHH', head[12:26])
+    if color_mode == 1:  # 灰度
+        base = 'LA' if channels > 1 else 'L'
+    elif color_mode == 2:  # 索引色
+        base = 'P'
+    else:
+        base = 'RGBA' if channels > 3 else 'RGB'
+    return _texture_info('PSD', width, height, f'{base}{bit_depth}')
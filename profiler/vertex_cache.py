@@ -0,0 +1,233 @@
+"""
+Post-Transform Vertex Cache Analysis
+-----------------------------------
+
+这个工具用于分析和优化索引缓冲区的顶点缓存命中率，主要功能：
+
+1. 缓存模拟:
+   - FIFO: 按未命中时间戳判断, 等价于固定大小的先进先出队列
+   - LRU: 按栈距离(上次访问以来访问过的不同顶点数)判断, NumPy向量化
+   - ACMR: 每个三角形平均未命中次数(0.5~3.0)
+   - ATVR: 未命中次数/被引用的顶点数(1.0为理想值)
+
+2. 索引重排:
+   - Tipsify(Sander等, 2007): 以顶点为扇心依次输出相邻三角形,
+     按缓存位置和剩余度数选择下一个扇心, 线性时间
+   - 只改变三角形顺序, 不改变顶点顺序和三角形绕序
+
+3. 使用方法:
+   stats = simulate_vertex_cache(faces, cache_size=16, policy='fifo')
+   optimized = tipsify(faces, vertex_count, cache_size=16)
+"""
+
+from typing import Dict
+
+import numpy as np
+
+CACHE_POLICIES = ('fifo', 'lru')
+LRU_WINDOW_FACTOR = 8  # LRU向量化判断时最长检查窗口(缓存大小的倍数)
+BLOCK_ACCESSES = 1 << 16  # 每次向量化判断的访问数
+
+def fifo_misses(indices: np.ndarray, cache_size: int) -> int:
+    """
+    FIFO缓存的未命中次数
+
+    每次未命中时间戳加一; 顶点上次写入缓存的时间戳与当前相差超过
+    cache_size即已被挤出。状态依赖未命中序列, 只能顺序扫描, 用列表
+    和整数运算保持每次访问的开销最小。
+    """
+    if len(indices) == 0:
+        return 0
+    stamps = [-cache_size - 1] * (int(indices.max()) + 1)
+    timestamp = 0
+    for vertex in indices.tolist():
+        if timestamp - stamps[vertex] > cache_size:
+            stamps[vertex] = timestamp
+            timestamp += 1
+    return timestamp
+
+def lru_misses(indices: np.ndarray, cache_size: int) -> int:
+    """
+    LRU缓存的未命中次数
+
+    第i次访问命中当且仅当上次访问p与i之间访问过的不同顶点少于cache_size。
+    区间内每个不同顶点恰好有一次"首次出现"(其上次访问不晚于p), 因此
+    不同顶点数 = (p, i)内上次访问位置<=p的访问数, 可以向量化计数:
+    - 间隔小于cache_size的一定命中
+    - 只看区间前window个位置, 计数已达cache_size的一定未命中
+    - 间隔不超过window的计数是精确的
+    剩下的少数长间隔访问逐个对整个区间计数, 结果与逐次模拟完全一致。
+    """
+    count = len(indices)
+    if count == 0:
+        return 0
+    # 每次访问的上一次访问位置, 首次访问为-1
+    order = np.argsort(indices, kind='stable')
+    sorted_indices = indices[order]
+    previous = np.full(count, -1, dtype=np.int64)
+    repeat = sorted_indices[1:] == sorted_indices[:-1]
+    previous[order[1:][repeat]] = order[:-1][repeat]
+
+    revisits = np.flatnonzero(previous >= 0)
+    gaps = revisits - previous[revisits] - 1
+    unresolved = revisits[gaps >= cache_size]
+    misses = count - len(revisits)
+
+    # 先用短窗口判断大部分明显未命中的访问, 剩下的再用长窗口
+    for window in (cache_size * 2, cache_size * LRU_WINDOW_FACTOR):
+        padded = np.concatenate([previous, np.full(window, count, dtype=np.int64)])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+        candidates = unresolved
+        undecided = []
+        for start in range(0, len(candidates), BLOCK_ACCESSES):
+            block = candidates[start:start + BLOCK_ACCESSES]
+            last = previous[block]
+            span = block - last - 1
+            inside = np.arange(window) < np.minimum(span, window)[:, np.newaxis]
+            distinct = np.count_nonzero(
+                (windows[last + 1] <= last[:, np.newaxis]) & inside, axis=1
+            )
+            misses += int(np.count_nonzero(distinct >= cache_size))
+            undecided.append(block[(distinct < cache_size) & (span > window)])
+        unresolved = np.concatenate(undecided) if undecided else candidates[:0]
+
+    for access in unresolved.tolist():
+        last = previous[access]
+        if np.count_nonzero(previous[last + 1:access] <= last) >= cache_size:
+            misses += 1
+    return misses
+
+def simulate_vertex_cache(faces: np.ndarray, cache_size: int = 16,
+                          policy: str = 'fifo') -> Dict:
+    """
+    模拟后变换顶点缓存
+
+    参数:
+        faces: 三角形索引(M×3)
+        cache_size: 缓存能容纳的顶点数
+        policy: 'fifo' 或 'lru'
+
+    返回:
+        Dict: 未命中次数、ACMR和ATVR
+    """
+    if policy not in CACHE_POLICIES:
+        raise ValueError(f"Unknown cache policy: {policy}")
+    indices = np.ascontiguousarray(faces, dtype=np.int64).ravel()
+    misses = (fifo_misses if policy == 'fifo' else lru_misses)(indices, cache_size)
+    triangles = len(indices) // 3
+    referenced = int(np.count_nonzero(np.bincount(indices))) if len(indices) else 0
+    return {
+        'policy': policy,
+        'cache_size': cache_size,
+        'misses': misses,
+        'acmr': misses / triangles if triangles else 0.0,
+        'atvr': misses / referenced if referenced else 0.0
+    }
+
+def tipsify(faces: np.ndarray, vertex_count: int = None, cache_size: int = 16) -> np.ndarray:
+    """
+    Tipsify三角形重排
+
+    参数:
+        faces: 三角形索引(M×3)
+        vertex_count: 顶点数, 默认为最大索引+1
+        cache_size: 目标FIFO缓存大小
+
+    返回:
+        np.ndarray: 重排后的三角形索引(M×3), dtype与输入相同
+    """
+    faces = np.asarray(faces)
+    triangle_count = len(faces)
+    if triangle_count == 0:
+        return faces.copy()
+    flat = faces.ravel().astype(np.int64)
+    if vertex_count is None:
+        vertex_count = int(flat.max()) + 1
+
+    # 顶点 -> 相邻三角形的CSR邻接表
+    order = np.argsort(flat, kind='stable')
+    offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(flat, minlength=vertex_count), out=offsets[1:])
+    adjacency = (order // 3).tolist()
+    offsets = offsets.tolist()
+    corners = flat.tolist()
+
+    live = np.diff(offsets).tolist()  # 每个顶点尚未输出的相邻三角形数
+    stamps = [0] * vertex_count
+    emitted = bytearray(triangle_count)
+    dead_end = []
+    output = []
+    timestamp = cache_size + 1
+    cursor = 0
+    fan = 0
+
+    while fan >= 0:
+        candidates = []
+        for triangle in adjacency[offsets[fan]:offsets[fan + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = 1
+            output.append(triangle)
+            base = triangle * 3
+            for vertex in corners[base:base + 3]:
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if timestamp - stamps[vertex] > cache_size:
+                    stamps[vertex] = timestamp
+                    timestamp += 1
+
+        # 选择仍在缓存中、且输出其剩余三角形后不会被挤出的最旧顶点
+        fan = -1
+        best = -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                age = timestamp - stamps[vertex]
+                priority = age if age + 2 * live[vertex] <= cache_size else 0
+                if priority > best:
+                    best = priority
+                    fan = vertex
+        if fan >= 0:
+            continue
+
+        # 死路: 先回溯最近输出的顶点, 再按顶点顺序找下一个
+        while dead_end:
+            vertex = dead_end.pop()
+            if live[vertex] > 0:
+                fan = vertex
+                break
+        else:
+            while cursor < vertex_count:
+                if live[cursor] > 0:
+                    fan = cursor
+                    break
+                cursor += 1
+
+    return faces[np.array(output, dtype=np.int64)]
+
+def analyze_vertex_cache(faces: np.ndarray, vertex_count: int = None,
+                         cache_size: int = 16, optimize: bool = True) -> Dict:
+    """
+    统计FIFO/LRU的ACMR和ATVR, 可选地给出Tipsify重排前后的对比
+
+    返回:
+        Dict: 三角形数, 'before'、'after'(各含fifo/lru统计)和'optimized_faces'
+    """
+    result = {
+        'cache_size': cache_size,
+        'triangles': len(faces),
+        'before': {
+            policy: simulate_vertex_cache(faces, cache_size, policy)
+            for policy in CACHE_POLICIES
+        },
+        'after': None,
+        'optimized_faces': None
+    }
+    if optimize:
+        optimized = tipsify(faces, vertex_count, cache_size)
+        result['after'] = {
+            policy: simulate_vertex_cache(optimized, cache_size, policy)
+            for policy in CACHE_POLICIES
+        }
+        result['optimized_faces'] = optimized
+    return result
@@ -0,0 +1,202 @@
+"""
+Vertex Format Compaction Analysis
+--------------------------------
+
+这个工具用于评估顶点属性压缩格式的精度损失和节省的显存，主要功能：
+
+1. 属性范围:
+   - 按网格实测位置包围盒、UV范围和法线分布
+   - 未知或未压缩的属性按float32计算原始大小
+
+2. 压缩格式:
+   - 位置: 相对包围盒的16位定点量化(unorm16×3)
+   - UV: half float; 超出容差且在[0, 1]内时改用unorm16
+   - 法线: 八面体映射, 2×8位或2×16位
+   - 每个属性按4字节对齐, 得到压缩后的顶点步长
+
+3. 精度评估:
+   - 全部用NumPy向量化编码再解码, 统计最大/平均误差
+   - 位置误差为绝对距离, UV误差换算为参考贴图尺寸下的texel数,
+     法线误差为角度
+
+4. 使用方法:
+   streams = {'POSITION': positions, 'NORMAL': normals, 'TEXCOORD_0': uvs}
+   result = analyze_vertex_format(streams)
+   result['stride'], result['compact_stride'], result['memory_save']
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+POSITION_TOLERANCE = 5e-4  # 位置量化允许的最大误差(场景单位, 米制下为0.5毫米)
+UV_REFERENCE_SIZE = 2048  # 换算UV误差的参考贴图尺寸
+UV_TOLERANCE_TEXELS = 0.25  # UV允许的最大误差(texel)
+NORMAL_TOLERANCE_DEGREES = 1.0  # 法线允许的最大角度误差
+ATTRIBUTE_ALIGNMENT = 4  # 顶点属性的字节对齐
+
+# 未压缩(float32)时各类属性每顶点的字节数, 按属性名前缀匹配
+FLOAT_ATTRIBUTE_SIZES = {
+    'POSITION': 12,
+    'NORMAL': 12,
+    'TANGENT': 16,
+    'TEXCOORD': 8,
+    'COLOR': 16,
+    'JOINTS': 8,
+    'WEIGHTS': 16
+}
+
+def attribute_size(name: str) -> int:
+    """未压缩属性每顶点的字节数"""
+    return FLOAT_ATTRIBUTE_SIZES.get(name.split('_')[0], 16)
+
+def vertex_stride(attributes) -> int:
+    """未压缩的顶点步长"""
+    return sum(attribute_size(name) for name in attributes)
+
+def _aligned(size: int) -> int:
+    return -(-size // ATTRIBUTE_ALIGNMENT) * ATTRIBUTE_ALIGNMENT
+
+def quantize_positions(positions: np.ndarray, bits: int = 16) -> Dict:
+    """
+    相对包围盒的定点量化误差
+
+    返回:
+        Dict: 包围盒、量化步长和最大/平均误差(场景单位)
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    lower = positions.min(axis=0)
+    extent = positions.max(axis=0) - lower
+    levels = (1 << bits) - 1
+    scale = np.where(extent > 0, extent / levels, 1.0)
+    decoded = np.round((positions - lower) / scale) * scale + lower
+    error = np.linalg.norm(decoded - positions, axis=1)
+    return {
+        'bounds': [lower.tolist(), (lower + extent).tolist()],
+        'step': float(scale.max()),
+        'max_error': float(error.max()),
+        'mean_error': float(error.mean())
+    }
+
+def half_float_error(values: np.ndarray) -> Tuple[float, float]:
+    """转换为half float再转回的(最大, 平均)绝对误差, 溢出记为无穷大"""
+    values = np.asarray(values, dtype=np.float32)
+    with np.errstate(over='ignore'):
+        decoded = values.astype(np.float16).astype(np.float32)
+    error = np.abs(decoded - values)
+    return float(error.max()), float(error.mean())
+
+def unorm16_error(values: np.ndarray) -> Tuple[float, float]:
+    """[0, 1]内的值量化为16位定点的(最大, 平均)绝对误差"""
+    values = np.asarray(values, dtype=np.float64)
+    decoded = np.round(values * 65535.0) / 65535.0
+    error = np.abs(decoded - values)
+    return float(error.max()), float(error.mean())
+
+def octahedral_encode(normals: np.ndarray, bits: int) -> np.ndarray:
+    """单位向量编码为八面体映射的有符号定点二维坐标"""
+    n = normals / np.abs(normals).sum(axis=1, keepdims=True)
+    folded = (1.0 - np.abs(n[:, [1, 0]])) * np.where(n[:, :2] >= 0, 1.0, -1.0)
+    xy = np.where(n[:, 2:3] >= 0, n[:, :2], folded)
+    levels = (1 << (bits - 1)) - 1
+    return np.round(np.clip(xy, -1.0, 1.0) * levels) / levels
+
+def octahedral_decode(xy: np.ndarray) -> np.ndarray:
+    """八面体映射坐标解码为单位向量"""
+    z = 1.0 - np.abs(xy).sum(axis=1)
+    t = np.maximum(-z, 0.0)
+    x = xy[:, 0] - np.where(xy[:, 0] >= 0, t, -t)
+    y = xy[:, 1] - np.where(xy[:, 1] >= 0, t, -t)
+    decoded = np.stack([x, y, z], axis=1)
+    return decoded / np.linalg.norm(decoded, axis=1, keepdims=True)
+
+def octahedral_error(normals: np.ndarray, bits: int) -> Tuple[float, float]:
+    """八面体编码的(最大, 平均)角度误差(度)"""
+    normals = np.asarray(normals, dtype=np.float64)
+    lengths = np.linalg.norm(normals, axis=1)
+    normals = normals[lengths > 0] / lengths[lengths > 0, np.newaxis]
+    if len(normals) == 0:
+        return 0.0, 0.0
+    decoded = octahedral_decode(octahedral_encode(normals, bits))
+    cosine = np.clip(np.einsum('ij,ij->i', normals, decoded), -1.0, 1.0)
+    angle = np.degrees(np.arccos(cosine))
+    return float(angle.max()), float(angle.mean())
+
+def _analyze_position(values: np.ndarray) -> Dict:
+    quantized = quantize_positions(values)
+    compact = quantized['max_error'] <= POSITION_TOLERANCE
+    return dict(quantized, format='unorm16x3' if compact else 'float32x3',
+                size=_aligned(6) if compact else 12)
+
+def _analyze_uv(values: np.ndarray) -> Dict:
+    half_max, half_mean = half_float_error(values)
+    result = {
+        'range': [values.min(axis=0).tolist(), values.max(axis=0).tolist()],
+        'half_max_texels': half_max * UV_REFERENCE_SIZE,
+        'half_mean_texels': half_mean * UV_REFERENCE_SIZE
+    }
+    if result['half_max_texels'] <= UV_TOLERANCE_TEXELS:
+        result.update(format='float16x2', size=4)
+    elif values.min() >= 0.0 and values.max() <= 1.0:
+        unorm_max, _ = unorm16_error(values)
+        result.update(format='unorm16x2', size=4,
+                      unorm16_max_texels=unorm_max * UV_REFERENCE_SIZE)
+    else:
+        result.update(format='float32x2', size=8)
+    return result
+
+def _analyze_normal(values: np.ndarray) -> Dict:
+    result = {}
+    for bits in (8, 16):
+        max_error, mean_error = octahedral_error(values, bits)
+        result[f'oct{bits}_max_degrees'] = max_error
+        result[f'oct{bits}_mean_degrees'] = mean_error
+    if result['oct8_max_degrees'] <= NORMAL_TOLERANCE_DEGREES:
+        result.update(format='oct8x2', size=_aligned(2))
+    elif result['oct16_max_degrees'] <= NORMAL_TOLERANCE_DEGREES:
+        result.update(format='oct16x2', size=4)
+    else:
+        result.update(format='float32x3', size=12)
+    return result
+
+def analyze_vertex_format(streams: Dict[str, np.ndarray],
+                          source_sizes: Dict[str, int] = None) -> Dict:
+    """
+    评估一个网格的顶点属性压缩
+
+    参数:
+        streams: 属性名 -> 顶点属性数组(N×分量数, 已解码为浮点)
+        source_sizes: 属性名 -> 源数据每顶点字节数, 缺省按float32计算
+
+    返回:
+        Dict: 各属性的格式选择和误差, 原始/压缩步长及节省的字节数
+    """
+    source_sizes = source_sizes or {}
+    attributes = {}
+    memory_save = 0
+    for name, values in sorted(streams.items()):
+        values = np.asarray(values)
+        if len(values) == 0:
+            continue
+        if name == 'POSITION':
+            result = _analyze_position(values)
+        elif name.startswith('TEXCOORD'):
+            result = _analyze_uv(values.astype(np.float32))
+        elif name == 'NORMAL':
+            result = _analyze_normal(values)
+        else:
+            result = {}
+        result['source_size'] = source_sizes.get(name, attribute_size(name))
+        if 'size' not in result or result['size'] >= result['source_size']:
+            # 源数据已经不大于压缩格式时保持原样
+            result.update(format='source', size=result['source_size'])
+        memory_save += (result['source_size'] - result['size']) * len(values)
+        attributes[name] = result
+
+    return {
+        'vertices': len(streams['POSITION']) if 'POSITION' in streams else 0,
+        'attributes': attributes,
+        'stride': sum(result['source_size'] for result in attributes.values()),
+        'compact_stride': sum(result['size'] for result in attributes.values()),
+        'memory_save': memory_save
+    }